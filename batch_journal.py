@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import time
+from folder_watcher import stat_key
+from markdown_sink import get_temp_path
+from output_archive import output_exists
+
+# 批量转换的持久化日志：每个输入的状态、选项摘要和输出文件追加写入输出目录下的JSONL文件，
+# 每条记录写入后立即 fsync。转换中途崩溃或被关闭后，可以只继续未完成的输入，
+# 已经完成的网页、PDF（远程接口调用）和大文件不必重新转换。
+# 输出文件本身由 markdown_sink 先写临时文件再原子替换，日志中记为完成的输出一定是完整的。
+
+JOURNAL_FILENAME = ".mdeverything_batch.jsonl"
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+# 不计入选项摘要、也不写入日志的选项：密钥，以及只影响并行度、不影响输出内容的选项
+SECRET_KEYS = ('app_id', 'secret_code', 'jina_api_key')
+RUNTIME_KEYS = ('image_workers', 'max_workers', 'parallel_sheets', 'isolate_jobs', 'memory_limit', 'cpu_limit',
+                'time_limit', 'deadline')
+# 日志中被覆盖的旧记录超过有效记录的这个倍数时，打开时重写压缩
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 1000
+
+def get_input_key(input_path):
+    """日志中标识输入的键：URL原样使用，文件使用绝对路径"""
+    if '://' in input_path:
+        return input_path
+    return os.path.abspath(input_path)
+
+def get_journal_options(options):
+    """去掉密钥和运行时选项后的转换选项，用于写入日志和计算摘要"""
+    return {key: value for key, value in options.items() if key not in SECRET_KEYS and key not in RUNTIME_KEYS}
+
+def options_hash(options):
+    """转换选项的摘要，选项变化后已完成的输入需要重新转换"""
+    data = json.dumps(get_journal_options(options), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+def get_source_key(input_path):
+    """文件输入的 [size, mtime_ns]，URL和不存在的文件为None"""
+    if '://' in input_path:
+        return None
+    key = stat_key(input_path)
+    return list(key) if key else None
+
+class BatchJournal:
+    """
+    追加写入的批量转换日志：输入 -> {state, hash, source, options, outputs, error}。
+
+    同一输入的后一条记录覆盖前一条；最后一行在写入中途崩溃而不完整时忽略该行。
+
+    :param path: 日志文件路径，通常为输出目录下的 JOURNAL_FILENAME
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.file = None
+        line_count = self.load()
+        if line_count > max(COMPACT_MIN_LINES, COMPACT_RATIO * len(self.entries)):
+            self.compact()
+
+    @classmethod
+    def for_output_dir(cls, output_dir):
+        return cls(os.path.join(output_dir, JOURNAL_FILENAME))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load(self):
+        """读取已有日志，返回行数"""
+        if not os.path.exists(self.path):
+            return 0
+        line_count = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line_count += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                key = record.pop('input', None)
+                if key is not None:
+                    self.entries[key] = dict(self.entries.get(key, {}), **record)
+        return line_count
+
+    def open(self):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+            # 上次在写入中途崩溃时最后一行没有换行，先补上，避免新记录接在残缺的行后面
+            if self.file.tell() > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self.file.write('\n')
+        return self.file
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def append(self, key, record):
+        """追加一条记录并落盘"""
+        self.entries[key] = dict(self.entries.get(key, {}), **record)
+        f = self.open()
+        f.write(json.dumps(dict(input=key, **record), ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    def compact(self):
+        """只保留每个输入的最终状态，先写临时文件再原子替换"""
+        self.close()
+        temp_path = get_temp_path(self.path)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for key, entry in self.entries.items():
+                f.write(json.dumps(dict(input=key, **entry), ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def is_done(self, input_path, options):
+        """输入已经以相同选项转换完成，源文件未改动且输出文件（或其所在的归档）都还在"""
+        entry = self.entries.get(get_input_key(input_path))
+        if not entry or entry.get('state') != DONE:
+            return False
+        if entry.get('hash') != options_hash(options) or entry.get('source') != get_source_key(input_path):
+            return False
+        return all(output_exists(path) for path in entry.get('outputs', ()))
+
+    def get_outputs(self, input_path):
+        entry = self.entries.get(get_input_key(input_path)) or {}
+        return list(entry.get('outputs', ()))
+
+    def start(self, input_path, options):
+        """记录一个即将转换的输入，连同其选项，以便不带输入参数也能继续"""
+        self.append(get_input_key(input_path), {
+            'state': PENDING,
+            'hash': options_hash(options),
+            'source': get_source_key(input_path),
+            'options': get_journal_options(options),
+            'outputs': [],
+            'error': None,
+            'time': time.time(),
+        })
+
+    def finish(self, input_path, options, outputs, error=None):
+        """
+        记录一个输入的转换结果。
+
+        :param outputs: 输出文件路径列表，为空表示转换失败
+        :param error: 失败原因
+        """
+        self.append(get_input_key(input_path), {
+            'state': DONE if outputs else FAILED,
+            'hash': options_hash(options),
+            'source': get_source_key(input_path),
+            'outputs': [os.path.abspath(path) for path in outputs],
+            'error': None if outputs else error,
+            'time': time.time(),
+        })
+
+    def iter_unfinished(self, options=None):
+        """
+        产出日志中未完成（等待中或失败）的输入及其选项。
+
+        :param options: 当前的转换选项，提供日志中没有保存的密钥和运行时选项
+        :return: (输入, 选项) 的迭代器
+        """
+        for key, entry in self.entries.items():
+            if entry.get('state') == DONE and self.is_done(key, entry.get('options', {})):
+                continue
+            yield key, dict(options or {}, **entry.get('options', {}))
@@ -0,0 +1,284 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from deadline import Deadline, install_cancel_event
+from document_probe import LOCAL, REMOTE, probe
+from job_sandbox import Budget, run_isolated
+
+# 混合批量转换的调度：先廉价探测每个输入的工作量，再按估计耗时从大到小提交，
+# 空闲的工作者总是领取剩余任务中最大的一个（最长任务优先），避免大文件排在最后单独运行。
+# 调用远程接口的任务和本地计算的任务分属两个通道，各自有独立的工作者，互不挤占。
+
+DEFAULT_REMOTE_WORKERS = 4
+
+class BatchJob:
+    """
+    一个待转换的输入。
+
+    :param input_path: 文件路径或URL
+    :param output_dir: 输出目录
+    :param options: 该输入的转换选项
+    """
+    __slots__ = ('input_path', 'output_dir', 'options', 'probe')
+
+    def __init__(self, input_path, output_dir, options):
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.options = options
+        self.probe = probe(input_path, options)
+
+class BatchResult:
+    """
+    单个任务的结果。
+
+    :param result: convert_file 的返回值，失败时为None
+    :param messages: 转换过程中产生的 (level, title, message) 列表，由调用方在主线程中显示
+    """
+    __slots__ = ('job', 'result', 'messages')
+
+    def __init__(self, job, result, messages):
+        self.job = job
+        self.result = result
+        self.messages = messages
+
+def run_job(input_path, output_dir, options, cancel_event=None):
+    """
+    在工作线程或工作进程中转换一个输入，收集提示信息而不直接显示。
+
+    :param cancel_event: 取消标志，为None时使用工作进程中安装的取消标志
+    """
+    from converter import Converter
+    messages = []
+    converter = Converter(notifier=lambda level, title, message: messages.append((level, title, message)))
+    try:
+        options = dict(options, deadline=Deadline.from_options(options, cancel_event))
+        result = converter.convert_file(input_path, output_dir, options)
+    except Exception as e:
+        messages.append(("critical", "错误", f"转换 {input_path} 失败: {str(e)}"))
+        result = None
+    return result, messages
+
+def submit_job(pool, job, cancel_event, output_dir=None):
+    """
+    提交一个任务，开启隔离模式时在受限子进程中运行
+
+    :param output_dir: 代替任务自身的输出目录，输出到归档时为该任务的临时目录
+    """
+    output_dir = output_dir or job.output_dir
+    budget = Budget.from_options(job.options)
+    if budget is not None:
+        return pool.submit(run_isolated, job.input_path, output_dir, job.options, budget, cancel_event)
+    if isinstance(pool, ProcessPoolExecutor):
+        # 工作进程启动时已安装取消标志，Event 不能随任务参数传递
+        return pool.submit(run_job, job.input_path, output_dir, job.options)
+    return pool.submit(run_job, job.input_path, output_dir, job.options, cancel_event)
+
+def order_jobs(jobs):
+    """按通道分组，每组按估计耗时从大到小排列，返回 {通道: [下标, ...]}"""
+    lanes = {LOCAL: [], REMOTE: []}
+    for index, job in enumerate(jobs):
+        lanes[job.probe.lane].append(index)
+    for indexes in lanes.values():
+        indexes.sort(key=lambda index: jobs[index].probe.cost, reverse=True)
+    return lanes
+
+def run_batch(jobs, local_workers=None, remote_workers=DEFAULT_REMOTE_WORKERS, on_done=None, journal=None,
+              cancel_event=None, archive=None):
+    """
+    并行转换一批任务。
+
+    本地任务在多个进程中运行以利用多核，远程任务在线程中运行（主要时间在等待网络）。
+    任务选项开启隔离模式时，每个任务在自己的受限子进程中运行，由工作线程等待其结束。
+    设置 cancel_event 后，正在运行的任务在下一次检查时停止，尚未开始的任务不再转换；
+    在调用线程中按 Ctrl+C 时同样设置取消标志，等正在运行的任务停止后再抛出 KeyboardInterrupt。
+
+    :param jobs: BatchJob 列表
+    :param local_workers: 本地通道的进程数，默认为CPU核数
+    :param remote_workers: 远程通道的线程数
+    :param on_done: 可选，每完成一个任务时以 BatchResult 调用
+    :param journal: 可选，BatchJournal，提交前记录每个任务，完成后立即记录结果
+    :param cancel_event: 可选，multiprocessing.Event，由其他线程设置以取消整批转换
+    :param archive: 可选，output_archive.OutputArchive。每个任务输出到本地临时目录，结束后立即写入归档，
+                    BatchResult.result 为归档成员路径列表
+    :return: 与 jobs 顺序一致的 BatchResult 列表
+    """
+    if cancel_event is None:
+        cancel_event = multiprocessing.Event()
+    lanes = order_jobs(jobs)
+    if journal is not None:
+        for job in jobs:
+            journal.start(job.input_path, job.options)
+    results = [None] * len(jobs)
+    local_workers = min(local_workers or os.cpu_count() or 1, max(1, len(lanes[LOCAL])))
+    remote_workers = min(remote_workers, max(1, len(lanes[REMOTE])))
+    # 只有一个本地任务时没有并行的必要，省去启动进程的开销；隔离的任务本身已在子进程中运行
+    isolated = any(Budget.from_options(jobs[index].options) for index in lanes[LOCAL])
+    if local_workers > 1 and not isolated:
+        local_pool = ProcessPoolExecutor(local_workers, initializer=install_cancel_event,
+                                         initargs=(cancel_event, True))
+    else:
+        local_pool = ThreadPoolExecutor(local_workers)
+    # 输出到归档时各任务的临时目录放在本地临时目录下，不在输出目录（可能是网络文件系统）中创建小文件
+    staging_root = tempfile.mkdtemp(prefix='mdeverything_staging_') if archive is not None else None
+    try:
+        with local_pool, ThreadPoolExecutor(remote_workers, thread_name_prefix='remote') as remote_pool:
+            futures = {}
+            for lane, pool in ((REMOTE, remote_pool), (LOCAL, local_pool)):
+                for index in lanes[lane]:
+                    staging_dir = None
+                    if staging_root is not None:
+                        staging_dir = os.path.join(staging_root, str(index))
+                        os.mkdir(staging_dir)
+                    futures[submit_job(pool, jobs[index], cancel_event, staging_dir)] = index
+
+            def collect(future):
+                index = futures[future]
+                staging_dir = os.path.join(staging_root, str(index)) if staging_root is not None else None
+                results[index] = collect_result(future, jobs[index], staging_dir, archive, journal, on_done)
+
+            try:
+                for future in as_completed(futures):
+                    collect(future)
+            except KeyboardInterrupt:
+                # 通知正在运行的任务停止，未开始的任务不再运行，已结束的任务仍然记录结果
+                cancel_event.set()
+                for future in futures:
+                    future.cancel()
+                for future in as_completed(futures):
+                    if not future.cancelled() and results[futures[future]] is None:
+                        collect(future)
+                raise
+    finally:
+        # 线程池和进程池退出时已等待全部任务结束
+        if staging_root is not None:
+            shutil.rmtree(staging_root, ignore_errors=True)
+    return results
+
+def iter_jobs(input_paths, output_dir, options, journal=None, resume=False, on_skipped=None):
+    """
+    逐个生成任务，断点续转时跳过日志中已完成的输入。
+
+    :param input_paths: 输入的迭代器，可以是边读取边产出的站点地图网页地址
+    :param on_skipped: 可选，跳过一个输入时以 (输入, 日志中记录的输出文件列表) 调用
+    """
+    for input_path in input_paths:
+        if resume and journal is not None and journal.is_done(input_path, options):
+            if on_skipped is not None:
+                on_skipped(input_path, journal.get_outputs(input_path))
+            continue
+        yield BatchJob(input_path, output_dir, options)
+
+def run_stream(jobs, workers=DEFAULT_REMOTE_WORKERS, on_done=None, journal=None, cancel_event=None, archive=None):
+    """
+    边读取边转换一串数量未知的任务（如站点地图中的网页），按完成顺序逐个产出 BatchResult。
+
+    任务在线程中运行（网页转换的主要时间在等待网络），同时提交的任务不超过 workers 的两倍，
+    一个任务结束才从 jobs 中再取一个，任务不汇总成列表，读到第一个任务后立即开始转换。
+    取消和 Ctrl+C 的处理同 run_batch；取消后不再从 jobs 中读取。
+
+    :param jobs: BatchJob 的迭代器
+    :param workers: 并行的线程数
+    :param on_done: 可选，每完成一个任务时以 BatchResult 调用
+    :param journal: 可选，BatchJournal，提交时记录每个任务，完成后立即记录结果
+    :param cancel_event: 可选，multiprocessing.Event，由其他线程设置以取消
+    :param archive: 可选，output_archive.OutputArchive，见 run_batch
+    """
+    if cancel_event is None:
+        cancel_event = multiprocessing.Event()
+    jobs = iter(jobs)
+    staging_root = tempfile.mkdtemp(prefix='mdeverything_staging_') if archive is not None else None
+    pending = {}
+    count = 0
+
+    def submit_next(pool):
+        nonlocal count
+        job = next(jobs, None)
+        if job is None:
+            return False
+        staging_dir = None
+        if staging_root is not None:
+            staging_dir = os.path.join(staging_root, str(count))
+            os.mkdir(staging_dir)
+        count += 1
+        if journal is not None:
+            journal.start(job.input_path, job.options)
+        pending[submit_job(pool, job, cancel_event, staging_dir)] = (job, staging_dir)
+        return True
+
+    def collect(future):
+        job, staging_dir = pending.pop(future)
+        return collect_result(future, job, staging_dir, archive, journal, on_done)
+
+    try:
+        with ThreadPoolExecutor(workers, thread_name_prefix='remote') as pool:
+            try:
+                exhausted = False
+                error = None
+                while True:
+                    while not exhausted and len(pending) < 2 * workers and not cancel_event.is_set():
+                        try:
+                            exhausted = not submit_next(pool)
+                        except Exception as e:
+                            # 读取任务失败（如站点地图下载中断）时不再读取，已提交的任务照常完成
+                            error = e
+                            exhausted = True
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield collect(future)
+                if error is not None:
+                    raise error
+            except (KeyboardInterrupt, GeneratorExit):
+                # 通知正在运行的任务停止，已结束的任务仍然记录结果
+                cancel_event.set()
+                for future in list(pending):
+                    if future.cancel():
+                        pending.pop(future)
+                for future in as_completed(list(pending)):
+                    collect(future)
+                raise
+    finally:
+        if staging_root is not None:
+            shutil.rmtree(staging_root, ignore_errors=True)
+
+def collect_result(future, job, staging_dir, archive, journal, on_done):
+    """取出一个已结束任务的结果，写入归档和日志，返回 BatchResult"""
+    try:
+        result, messages = future.result()
+    except Exception as e:
+        result, messages = None, [("critical", "错误", f"转换 {job.input_path} 失败: {str(e)}")]
+    if staging_dir is not None:
+        result, messages = archive_outputs(archive, job, staging_dir, result, messages)
+    batch_result = BatchResult(job, result, messages)
+    if journal is not None:
+        record_result(journal, batch_result)
+    if on_done is not None:
+        on_done(batch_result)
+    return batch_result
+
+def archive_outputs(archive, job, staging_dir, result, messages):
+    """把任务临时目录中的输出写入归档后删除临时目录，返回 (归档成员路径列表, 提示信息)"""
+    from output_archive import member_path
+    # 提示信息中的临时路径改为归档成员路径
+    prefix = os.path.join(staging_dir, '')
+    messages = [(level, title, message.replace(prefix, member_path(archive.path, '')))
+                for level, title, message in messages]
+    try:
+        members = archive.add_outputs(job.input_path, staging_dir, result)
+    except Exception as e:
+        members = None
+        messages = messages + [("critical", "错误", f"写入归档 {archive.path} 失败: {str(e)}")]
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return members or None, messages
+
+def record_result(journal, batch_result):
+    """把任务结果写入日志，失败时以其中的警告和错误作为原因"""
+    from converter import Converter
+    job = batch_result.job
+    outputs = Converter.as_list(batch_result.result) if batch_result.result else []
+    error = "\n".join(message for level, title, message in batch_result.messages if level != "information")
+    journal.finish(job.input_path, job.options, outputs, error or None)
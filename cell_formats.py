@@ -0,0 +1,698 @@
+import datetime
+import math
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from fractions import Fraction
+from xml.etree import ElementTree
+
+# 按单元格格式显示数值：读取 xl/styles.xml，把每个样式序号（单元格的 s 属性）对应的数字格式
+# 一次性编译为格式化函数，逐个单元格只需按 s 查表再调用，不再解析格式代码。
+# 相同的格式代码只编译一次；日期/时间、百分比、千位分隔符、小数位、科学计数、分数和带文字的格式
+# 按 Excel 的显示方式输出，无法识别的格式保留原始值。
+# 内置格式（numFmtId 小于164且文件中未定义）按简体中文 Excel 的显示方式取值。
+
+BUILTIN_FORMATS = {
+    0: 'General',
+    1: '0',
+    2: '0.00',
+    3: '#,##0',
+    4: '#,##0.00',
+    5: '"¥"#,##0;"¥"\\-#,##0',
+    6: '"¥"#,##0;[Red]"¥"\\-#,##0',
+    7: '"¥"#,##0.00;"¥"\\-#,##0.00',
+    8: '"¥"#,##0.00;[Red]"¥"\\-#,##0.00',
+    9: '0%',
+    10: '0.00%',
+    11: '0.00E+00',
+    12: '# ?/?',
+    13: '# ??/??',
+    14: 'yyyy/m/d',
+    15: 'd-mmm-yy',
+    16: 'd-mmm',
+    17: 'mmm-yy',
+    18: 'h:mm AM/PM',
+    19: 'h:mm:ss AM/PM',
+    20: 'h:mm',
+    21: 'h:mm:ss',
+    22: 'yyyy/m/d h:mm',
+    27: 'yyyy"年"m"月"',
+    28: 'm"月"d"日"',
+    29: 'm"月"d"日"',
+    30: 'm-d-yy',
+    31: 'yyyy"年"m"月"d"日"',
+    32: 'h"时"mm"分"',
+    33: 'h"时"mm"分"ss"秒"',
+    34: '上午/下午h"时"mm"分"',
+    35: '上午/下午h"时"mm"分"ss"秒"',
+    36: 'yyyy"年"m"月"',
+    37: '#,##0 ;(#,##0)',
+    38: '#,##0 ;[Red](#,##0)',
+    39: '#,##0.00;(#,##0.00)',
+    40: '#,##0.00;[Red](#,##0.00)',
+    45: 'mm:ss',
+    46: '[h]:mm:ss',
+    47: 'mm:ss.0',
+    48: '##0.0E+0',
+    49: '@',
+    50: 'yyyy"年"m"月"',
+    51: 'm"月"d"日"',
+    52: 'yyyy"年"m"月"',
+    53: 'm"月"d"日"',
+    54: 'm"月"d"日"',
+    55: '上午/下午h"时"mm"分"',
+    56: '上午/下午h"时"mm"分"ss"秒"',
+    57: 'yyyy"年"m"月"',
+    58: 'm"月"d"日"',
+}
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+               'November', 'December')
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+# 1900 日期系统：序号1为1900-01-01，Excel 把1900年当作闰年，序号60之后的日期须从1899-12-30起算
+EPOCH_1900 = datetime.date(1899, 12, 30).toordinal()
+EPOCH_1900_EARLY = datetime.date(1899, 12, 31).toordinal()
+EPOCH_1904 = datetime.date(1904, 1, 1).toordinal()
+# 条件格式段，如 [>=100]
+CONDITION = re.compile(r'^(<=|>=|<>|<|>|=)\s*(-?[\d.]+(?:[eE][+-]?\d+)?)$')
+CONDITIONS = {
+    '<': lambda value, limit: value < limit,
+    '>': lambda value, limit: value > limit,
+    '=': lambda value, limit: value == limit,
+    '<=': lambda value, limit: value <= limit,
+    '>=': lambda value, limit: value >= limit,
+    '<>': lambda value, limit: value != limit,
+}
+DATE_LETTERS = 'yYdDhHsSmMeE'
+AM_PM_MARKERS = ('AM/PM', 'A/P', '上午/下午')
+
+# 每个格式缓存的格式化结果数，超过后清空重来
+MEMO_SIZE = 65536
+
+LITERAL = 'literal'
+RAW = 'raw'
+ELAPSED = 'elapsed'
+ONE = Decimal(1)
+# 舍入位距离 .5 小于这一值时按 Decimal 精确舍入
+TIE_TOLERANCE = 1e-6
+
+def format_general(text):
+    """
+    常规格式：保留原始值，只把浮点误差形成的长小数（如 0.15300000000000002）和科学计数写法
+    整理为最多15位有效数字；不带小数点的整数（如长编号）原样保留。
+    """
+    if 'E' not in text and 'e' not in text and ('.' not in text or len(text) <= 15):
+        return text
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    return repr_number(float(format(value, '.15G')))
+
+def tokenize(section):
+    """
+    把一段格式代码切分为 (类型, 值) 列表：LITERAL 为原样输出的文字，RAW 为一个格式字符，
+    ELAPSED 为 [h]、[mm]、[ss] 等累计时间；颜色、区域等方括号内容被忽略，条件单独返回。
+
+    :return: (tokens, 条件或None)
+    """
+    tokens = []
+    condition = None
+    index = 0
+    length = len(section)
+    while index < length:
+        char = section[index]
+        if char == '"':
+            end = section.find('"', index + 1)
+            end = length if end == -1 else end
+            tokens.append((LITERAL, section[index + 1:end]))
+            index = end + 1
+        elif char == '\\' and index + 1 < length:
+            tokens.append((LITERAL, section[index + 1]))
+            index += 2
+        elif char == '_' and index + 1 < length:
+            # 占位与某个字符等宽的空白
+            tokens.append((LITERAL, ' '))
+            index += 2
+        elif char == '*' and index + 1 < length:
+            # 重复填充字符，在文本中没有意义
+            index += 2
+        elif char == '[':
+            end = section.find(']', index + 1)
+            end = length if end == -1 else end
+            content = section[index + 1:end]
+            lower = content.lower()
+            match = CONDITION.match(content.strip())
+            if match:
+                condition = (CONDITIONS[match.group(1)], float(match.group(2)))
+            elif lower and lower[0] in 'hms' and lower == lower[0] * len(lower):
+                tokens.append((ELAPSED, lower))
+            elif content.startswith('$'):
+                # 货币符号及区域，如 [$€-407]
+                symbol = content[1:].partition('-')[0]
+                if symbol:
+                    tokens.append((LITERAL, symbol))
+            index = end + 1
+        else:
+            tokens.append((RAW, char))
+            index += 1
+    return tokens, condition
+
+def split_sections(code):
+    """按不在引号、转义和方括号中的分号拆分格式代码"""
+    sections = []
+    current = []
+    quoted = False
+    bracket = False
+    escaped = False
+    for char in code:
+        if escaped:
+            escaped = False
+        elif char == '\\' and not quoted:
+            escaped = True
+        elif char == '"' and not bracket:
+            quoted = not quoted
+        elif char == '[' and not quoted:
+            bracket = True
+        elif char == ']' and not quoted:
+            bracket = False
+        elif char == ';' and not quoted and not bracket:
+            sections.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    sections.append(''.join(current))
+    return sections
+
+def raw_text(tokens):
+    return ''.join(value for kind, value in tokens if kind == RAW)
+
+def is_date_section(tokens):
+    if any(kind == ELAPSED for kind, value in tokens):
+        return True
+    raw = raw_text(tokens)
+    if 'general' in raw.lower():
+        return False
+    if any(marker in raw.upper() for marker in AM_PM_MARKERS):
+        return True
+    letters = [char for char in raw if char in DATE_LETTERS]
+    if not letters:
+        return False
+    # 只有 E 时是科学计数
+    if all(char in 'eE' for char in letters):
+        return False
+    if any(char in '#?' for char in raw):
+        return False
+    return True
+
+def compile_literals(tokens):
+    """数字和常规格式前后的文字：格式字符（如 $ - + ( ) 空格）原样输出"""
+    return ''.join(value for kind, value in tokens if kind in (LITERAL, RAW))
+
+class NumberSection:
+    """编译后的数字格式段"""
+
+    def __init__(self, tokens):
+        self.general = 'general' in raw_text(tokens).lower()
+        self.percent = sum(1 for kind, value in tokens if kind == RAW and value == '%')
+        # 指数部分（E+00）的占位符不属于数字本身
+        exponent_at = next((index for index, (kind, value) in enumerate(tokens[:-1])
+                            if kind == RAW and value in 'eE' and tokens[index + 1] in ((RAW, '+'), (RAW, '-'))),
+                           len(tokens))
+        positions = [index for index, (kind, value) in enumerate(tokens[:exponent_at])
+                     if kind == RAW and value in '0#?']
+        if self.general or not positions:
+            self.prefix = self.suffix = ''
+            self.placeholders = None
+            if self.general:
+                general_at = raw_text(tokens).lower().index('general')
+                before, after = self.split_general(tokens, general_at)
+                self.prefix, self.suffix = compile_literals(before), compile_literals(after)
+            else:
+                # 只有文字的格式段，如 "-"
+                self.prefix = compile_literals(tokens)
+            return
+        first, last = positions[0], positions[-1]
+        # 分母为固定数字的分数，如 # ?/4，分母不是占位符
+        if last + 1 < exponent_at and tokens[last + 1] == (RAW, '/'):
+            index = last + 2
+            while index < exponent_at and tokens[index][0] == RAW and tokens[index][1].isdigit():
+                index += 1
+            if index > last + 2:
+                last = index - 1
+        # 数字部分之后紧跟的指数部分：E+00
+        end = last + 1
+        body = [value for kind, value in tokens[first:end] if kind == RAW]
+        exponent = None
+        if end < len(tokens) and tokens[end][0] == RAW and tokens[end][1] in 'eE':
+            sign_end = end + 1
+            if sign_end < len(tokens) and tokens[sign_end][1] in '+-':
+                exponent_sign = tokens[sign_end][1]
+                digits_end = sign_end + 1
+                while digits_end < len(tokens) and tokens[digits_end][0] == RAW and tokens[digits_end][1] in '0#?':
+                    digits_end += 1
+                exponent = (exponent_sign, digits_end - sign_end - 1)
+                end = digits_end
+        # 千位分隔符后紧跟的逗号（在最后一个占位符之后）把数值缩小1000倍
+        self.scale = 0
+        while end < len(tokens) and tokens[end] == (RAW, ','):
+            self.scale += 1
+            end += 1
+        self.prefix = compile_literals(tokens[:first])
+        self.suffix = compile_literals(tokens[end:])
+        self.exponent = exponent
+        self.fraction = None
+        pattern = ''.join(body)
+        if '/' in pattern:
+            self.compile_fraction(pattern)
+            self.placeholders = pattern
+            return
+        integer, _, decimals = pattern.partition('.')
+        self.placeholders = pattern
+        self.has_point = '.' in pattern
+        self.thousands = ',' in integer.strip(',') and exponent is None
+        # 数字占位符之间的逗号是千位分隔符，小数点前的逗号表示缩小1000倍
+        self.scale += len(integer) - len(integer.rstrip(','))
+        integer = integer.replace(',', '')
+        self.min_integer = integer.count('0')
+        decimals = ''.join(char for char in decimals if char in '0#?')
+        self.decimals = len(decimals)
+        self.min_decimals = len(decimals.rstrip('#?'))
+        self.spec = f"{',' if self.thousands else ''}.{self.decimals}f"
+        self.quantum = Decimal(1).scaleb(-self.decimals)
+        self.tie_scale = 10.0 ** self.decimals
+        # 固定小数位、个位至少一位时 format 的结果即为最终输出
+        self.plain = self.min_integer == 1 and self.decimals == self.min_decimals and self.has_point == bool(self.decimals)
+
+    @staticmethod
+    def split_general(tokens, general_at):
+        """General 关键字前后的文字"""
+        count = 0
+        for index, (kind, value) in enumerate(tokens):
+            if kind == RAW:
+                if count == general_at:
+                    return tokens[:index], tokens[index + len('general'):]
+                count += 1
+        return tokens, []
+
+    def compile_fraction(self, pattern):
+        numerator, _, denominator = pattern.partition('/')
+        whole = None
+        if ' ' in numerator.strip():
+            whole, _, numerator = numerator.strip().rpartition(' ')
+        fixed = denominator.strip('#?0 ')
+        self.fraction = {
+            'whole': whole is not None,
+            'denominator': int(fixed) if fixed.isdigit() else None,
+            'digits': max(1, sum(1 for char in denominator if char in '#?0')),
+        }
+
+    def format(self, value):
+        """value 已取绝对值或按格式段的规则处理过符号"""
+        if self.placeholders is None:
+            if self.general:
+                return self.prefix + format_general(repr_number(value)) + self.suffix
+            return self.prefix
+        if self.percent or self.scale:
+            value = value * 100 ** self.percent / 1000 ** self.scale
+        if self.fraction is not None:
+            number = self.format_fraction(value)
+        elif self.exponent is not None:
+            number = self.format_exponent(value)
+        else:
+            number = self.format_decimal(value)
+        return self.prefix + number + self.suffix
+
+    def format_decimal(self, value):
+        # 只有恰好（在15位有效数字内）处于两个显示值中间时，format 的舍入才与 Excel 不同
+        scaled = abs(value) * self.tie_scale
+        if abs(scaled - int(scaled) - 0.5) < TIE_TOLERANCE:
+            value = round_half_up(value, self.quantum)
+        text = format(value, self.spec)
+        if self.plain:
+            return text
+        integer, _, decimals = text.partition('.')
+        if self.decimals > self.min_decimals:
+            decimals = decimals[:self.min_decimals] + decimals[self.min_decimals:].rstrip('0')
+        if integer.lstrip('-') == '0' and self.min_integer == 0:
+            integer = integer[:-1]
+        elif self.min_integer > 1 and not self.thousands:
+            negative = integer.startswith('-')
+            integer = ('-' if negative else '') + integer.lstrip('-').zfill(self.min_integer)
+        if self.has_point:
+            return f"{integer}.{decimals}"
+        return integer
+
+    def format_exponent(self, value):
+        sign, digits = self.exponent
+        number = to_decimal(value)
+        power = number.adjusted() if number else 0
+        mantissa = number.scaleb(-power).quantize(self.quantum, ROUND_HALF_UP)
+        if abs(mantissa) >= 10:
+            # 9.995 进位为 10.00 时改为 1.00 并增大指数
+            power += 1
+            mantissa = number.scaleb(-power).quantize(self.quantum, ROUND_HALF_UP)
+        mantissa = format(mantissa, 'f')
+        if self.decimals > self.min_decimals and '.' in mantissa:
+            mantissa = mantissa.rstrip('0')
+            if mantissa.endswith('.') and self.min_decimals == 0:
+                mantissa = mantissa[:-1]
+        power_sign = '-' if power < 0 else ('+' if sign == '+' else '')
+        return f"{mantissa}E{power_sign}{abs(power):0{max(digits, 1)}d}"
+
+    def format_fraction(self, value):
+        negative = value < 0
+        value = abs(value)
+        whole = int(value) if self.fraction['whole'] else 0
+        remainder = Fraction(value - whole).limit_denominator(10 ** self.fraction['digits'] - 1) \
+            if self.fraction['denominator'] is None else \
+            Fraction(int(round_half_up((value - whole) * self.fraction['denominator'], ONE)),
+                     self.fraction['denominator'])
+        if remainder >= 1 and self.fraction['whole']:
+            whole += int(remainder)
+            remainder -= int(remainder)
+        parts = []
+        if self.fraction['whole'] and (whole or not remainder):
+            parts.append(str(whole))
+        if remainder:
+            denominator = self.fraction['denominator'] or remainder.denominator
+            numerator = remainder * denominator
+            parts.append(f"{int(numerator)}/{denominator}")
+        elif not self.fraction['whole']:
+            parts.append("0")
+        return ('-' if negative else '') + ' '.join(parts)
+
+def to_decimal(value):
+    """取15位有效数字（Excel 的显示精度）转为 Decimal，1.005 这类数值不再因二进制误差变为 1.00499…"""
+    return Decimal(repr_number(float(format(value, '.15G'))))
+
+def round_half_up(value, quantum):
+    """
+    按 Excel 的方式舍入：0.5 远离零进位（Python 的 format 和 round 是四舍六入五成双）。
+
+    :param quantum: 保留的最小单位，如 Decimal('0.01')
+    :return: Decimal
+    """
+    number = to_decimal(value)
+    try:
+        return number.quantize(quantum, ROUND_HALF_UP)
+    except InvalidOperation:
+        # 数值过大，超出 Decimal 的精度，这时小数位已没有意义
+        return number
+
+def repr_number(value):
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+class DateSection:
+    """编译后的日期/时间格式段：格式代码在编译时切分为字段列表"""
+
+    def __init__(self, tokens, date1904=False):
+        self.epoch = EPOCH_1904 if date1904 else None
+        self.parts = []
+        self.subsecond_digits = 0
+        self.twelve_hour = False
+        self.compile(tokens)
+
+    def compile(self, tokens):
+        parts = []
+        index = 0
+        while index < len(tokens):
+            kind, value = tokens[index]
+            if kind == ELAPSED:
+                parts.append(['elapsed', value[0], len(value)])
+                index += 1
+                continue
+            if kind == LITERAL:
+                parts.append(['literal', value])
+                index += 1
+                continue
+            rest = ''.join(v if k == RAW else '\0' for k, v in tokens[index:index + 5])
+            marker = next((marker for marker in AM_PM_MARKERS if rest.upper().startswith(marker)), None)
+            if marker is not None:
+                parts.append(['ampm', marker])
+                self.twelve_hour = True
+                index += len(marker)
+                continue
+            lower = value.lower()
+            if lower in 'ymdhse':
+                count = 1
+                while index + count < len(tokens) and tokens[index + count][0] == RAW and \
+                        tokens[index + count][1].lower() == lower:
+                    count += 1
+                # e 为四位年份
+                parts.append(['field', 'y', 4] if lower == 'e' else ['field', lower, count])
+                index += count
+                continue
+            if value == '.' and parts and parts[-1][0] == 'field' and parts[-1][1] == 's':
+                count = 0
+                while index + 1 + count < len(tokens) and tokens[index + 1 + count] == (RAW, '0'):
+                    count += 1
+                if count:
+                    parts.append(['subsecond', count])
+                    self.subsecond_digits = max(self.subsecond_digits, count)
+                    index += 1 + count
+                    continue
+            parts.append(['literal', value])
+            index += 1
+        # m 紧跟在 h 之后或紧挨在 s 之前时表示分钟
+        fields = [part for part in parts if part[0] in ('field', 'elapsed')]
+        for position, part in enumerate(fields):
+            if part[0] == 'field' and part[1] == 'm' and part[2] <= 2:
+                previous = fields[position - 1] if position > 0 else None
+                following = fields[position + 1] if position + 1 < len(fields) else None
+                if (previous is not None and previous[1] == 'h') or (following is not None and following[1] == 's'):
+                    part[1] = 'minute'
+        self.parts = parts
+        # 编译为模板和取值函数列表，格式化时不再逐段判断
+        self.template = ''
+        self.getters = []
+        for part in parts:
+            if part[0] == 'literal':
+                self.template += part[1].replace('{', '{{').replace('}', '}}')
+            else:
+                self.template += '{}'
+                self.getters.append(self.compile_part(part))
+        self.needs_date = any(part[0] == 'field' and part[1] in 'ymd' for part in parts)
+        self.scale = 10 ** self.subsecond_digits
+        self.ticks_per_day = 86400 * self.scale
+
+    def compile_part(self, part):
+        """返回以 (日期, 时, 分, 秒, 秒的小数, 累计秒数) 为参数的取值函数"""
+        kind = part[0]
+        if kind == 'ampm':
+            marker = {'上午/下午': ('上午', '下午'), 'A/P': ('A', 'P')}.get(part[1], ('AM', 'PM'))
+            return lambda date, hour, minute, second, fraction, total: marker[hour >= 12]
+        if kind == 'subsecond':
+            digits, width = part[1], self.subsecond_digits
+            return lambda date, hour, minute, second, fraction, total: '.' + str(fraction).zfill(width)[:digits]
+        if kind == 'elapsed':
+            unit, width = {'h': 3600, 'm': 60, 's': 1}[part[1]], part[2]
+            return lambda date, hour, minute, second, fraction, total: str(total // unit).zfill(width)
+        field, count = part[1], part[2]
+        if field == 'y':
+            if count <= 2:
+                return lambda date, hour, minute, second, fraction, total: f"{date.year % 100:02d}"
+            return lambda date, hour, minute, second, fraction, total: str(date.year)
+        if field == 'm':
+            if count <= 2:
+                return lambda date, hour, minute, second, fraction, total: str(date.month).zfill(count)
+            length = {3: 3, 5: 1}.get(count)
+            return lambda date, hour, minute, second, fraction, total: MONTH_NAMES[date.month - 1][:length]
+        if field == 'd':
+            if count <= 2:
+                return lambda date, hour, minute, second, fraction, total: str(date.day).zfill(count)
+            length = 3 if count == 3 else None
+            return lambda date, hour, minute, second, fraction, total: DAY_NAMES[date.weekday()][:length]
+        width = min(count, 2)
+        if field == 'h':
+            if self.twelve_hour:
+                return lambda date, hour, minute, second, fraction, total: str(hour % 12 or 12).zfill(width)
+            return lambda date, hour, minute, second, fraction, total: str(hour).zfill(width)
+        if field == 'minute':
+            return lambda date, hour, minute, second, fraction, total: str(minute).zfill(width)
+        return lambda date, hour, minute, second, fraction, total: str(second).zfill(width)
+
+    def format(self, value):
+        if value < 0:
+            return None
+        # 按显示精度四舍五入到秒（或秒的小数位）
+        days, ticks = divmod(round(value * self.ticks_per_day), self.ticks_per_day)
+        seconds, fraction = divmod(ticks, self.scale)
+        date = None
+        if self.needs_date:
+            if self.epoch is not None:
+                date = datetime.date.fromordinal(self.epoch + days)
+            elif days < 61:
+                date = datetime.date.fromordinal(EPOCH_1900_EARLY + days)
+            else:
+                date = datetime.date.fromordinal(EPOCH_1900 + days)
+        hour, remainder = divmod(seconds, 3600)
+        minute, second = divmod(remainder, 60)
+        fields = (date, hour, minute, second, fraction, days * 86400 + seconds)
+        return self.template.format(*[getter(*fields) for getter in self.getters])
+
+class CellFormat:
+    """
+    一个数字格式代码编译后的格式化函数：按数值选择格式段（正数、负数、零、条件），
+    日期段把序号换算为日期，数字段按占位符输出；调用时传入单元格 <v> 的原始文本。
+    """
+
+    def __init__(self, code, date1904=False):
+        self.code = code
+        self.sections = []
+        for section in split_sections(code)[:4]:
+            tokens, condition = tokenize(section)
+            if raw_text(tokens).strip() == '@':
+                # 文本格式段只用于字符串单元格
+                self.sections.append((None, condition))
+            elif is_date_section(tokens):
+                self.sections.append((DateSection(tokens, date1904), condition))
+            else:
+                self.sections.append((NumberSection(tokens), condition))
+        self.has_conditions = any(condition is not None for section, condition in self.sections)
+        # 只有一个格式段时（最常见）直接调用该段，不必逐个值选择格式段
+        self.single = self.sections[0][0] if len(self.sections) == 1 and not self.has_conditions else None
+        # 日期列中相同的值很多且格式化较慢，结果按原始文本缓存；数字格式化本身很快，不缓存
+        self.memo = {} if any(isinstance(section, DateSection) for section, condition in self.sections) else None
+
+    def select(self, value):
+        """
+        选择数值使用的格式段（第4段只用于文字），返回 (格式段, 是否取绝对值)。
+
+        没有条件时依次为正数、负数、零；负数段自带符号，显示绝对值。有条件时取第一个满足条件的段，
+        都不满足时取没有条件的段。
+        """
+        sections = self.sections[:3]
+        if self.has_conditions:
+            for section, condition in sections:
+                if condition is not None and condition[0](value, condition[1]):
+                    return section, False
+            remaining = [section for section, condition in sections if condition is None]
+            return (remaining[0] if remaining else sections[-1][0]), False
+        if len(sections) == 1 or value > 0 or (value == 0 and len(sections) == 2):
+            return sections[0][0], False
+        if value < 0:
+            return sections[1][0], True
+        return sections[2][0], False
+
+    def __call__(self, text):
+        if self.memo is None:
+            return self.render(text)
+        formatted = self.memo.get(text)
+        if formatted is None:
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            formatted = self.memo[text] = self.render(text)
+        return formatted
+
+    def render(self, text):
+        try:
+            value = float(text)
+        except ValueError:
+            return text
+        if not math.isfinite(value):
+            return text
+        section = self.single
+        if section is not None:
+            use_absolute = False
+        else:
+            section, use_absolute = self.select(value)
+        if section is None:
+            return format_general(text)
+        try:
+            if isinstance(section, DateSection):
+                formatted = section.format(value)
+                return text if formatted is None else formatted
+            if use_absolute or value >= 0 or section.placeholders is None:
+                return section.format(abs(value) if use_absolute else value)
+            # 只有一个格式段的负数：负号加在最前面，舍入为零时不显示负号
+            formatted = section.format(-value)
+            return '-' + formatted if any(char in '123456789' for char in formatted) else formatted
+        except (OverflowError, ValueError):
+            return text
+
+def compile_format(code, date1904=False, cache=None):
+    """编译格式代码，cache 为 {(代码, date1904): 格式化函数}，相同的代码只编译一次；常规格式返回None"""
+    if code is None or code.strip().lower() in ('general', ''):
+        return None
+    key = (code, date1904)
+    if cache is not None and key in cache:
+        return cache[key]
+    try:
+        formatter = CellFormat(code, date1904)
+    except Exception:
+        # 无法识别的格式代码按常规格式显示，不影响整个工作表的转换
+        formatter = None
+    if cache is not None:
+        cache[key] = formatter
+    return formatter
+
+class CellStyles:
+    """
+    工作簿的单元格样式：样式序号（s属性的原始文本）-> 编译好的格式化函数。
+
+    :param formatters: {s属性文本: CellFormat}，常规格式的样式不在其中
+    """
+
+    def __init__(self, formatters=None):
+        self.formatters = formatters or {}
+
+    def format(self, style, text):
+        """按样式显示数值单元格，style 为单元格的 s 属性（可为None）"""
+        formatter = self.formatters.get(style)
+        if formatter is None:
+            return format_general(text)
+        return formatter(text)
+
+def read_cell_styles(archive):
+    """
+    读取 xl/styles.xml 中各样式的数字格式，每个不同的格式代码只编译一次。
+
+    :param archive: 已打开的 xlsx zipfile.ZipFile
+    :return: CellStyles，没有样式表时所有数值按常规格式显示
+    """
+    names = set(archive.namelist())
+    if 'xl/styles.xml' not in names:
+        return CellStyles()
+    date1904 = read_date1904(archive) if 'xl/workbook.xml' in names else False
+    codes = dict(BUILTIN_FORMATS)
+    format_ids = []
+    in_cell_xfs = False
+    with archive.open('xl/styles.xml') as data:
+        for event, element in ElementTree.iterparse(data, events=('start', 'end')):
+            tag = element.tag.rpartition('}')[2]
+            if event == 'start':
+                if tag == 'cellXfs':
+                    in_cell_xfs = True
+                continue
+            if tag == 'numFmt':
+                try:
+                    codes[int(element.get('numFmtId'))] = element.get('formatCode')
+                except (TypeError, ValueError):
+                    pass
+            elif tag == 'xf' and in_cell_xfs:
+                try:
+                    format_ids.append(int(element.get('numFmtId', 0)))
+                except ValueError:
+                    format_ids.append(0)
+            elif tag == 'cellXfs':
+                in_cell_xfs = False
+                element.clear()
+    cache = {}
+    formatters = {}
+    for index, format_id in enumerate(format_ids):
+        formatter = compile_format(codes.get(format_id), date1904, cache)
+        if formatter is not None:
+            formatters[str(index)] = formatter
+    return CellStyles(formatters)
+
+def read_date1904(archive):
+    """工作簿是否使用1904日期系统（workbookPr 的 date1904 属性）"""
+    with archive.open('xl/workbook.xml') as data:
+        for event, element in ElementTree.iterparse(data):
+            if element.tag.rpartition('}')[2] == 'workbookPr':
+                return element.get('date1904', '').lower() in ('1', 'true')
+            if element.tag.rpartition('}')[2] == 'sheets':
+                return False
+    return False
@@ -0,0 +1,317 @@
+import argparse
+import os
+import sys
+from contextlib import nullcontext
+from converter import Converter
+from file_handler import ensure_output_directory
+
+# 命令行入口：不导入PyQt，转换后端按输入类型按需加载
+
+DEFAULT_OPTIONS = {
+    'use_jina_ai': False,
+    'jina_api_key': '',
+    'ignore_links': False,
+    'ignore_images': False,
+    'body_width': 0,
+    'max_page_size': 100 * 1024 * 1024,
+    'html_parser': 'auto',
+    'localize_images': False,
+    'max_image_size': 20 * 1024 * 1024,
+    'image_workers': None,
+    'app_id': '',
+    'secret_code': '',
+    'dpi': 144,
+    'apply_document_tree': 1,
+    'table_flavor': 'md',
+    'get_image': 'none',
+    'page_start': 1,
+    'page_count': 1000,
+    'parse_mode': 'auto',
+    'selected_sheets': [],
+    'has_header': True,
+    'cell_range': '',
+    'columns': '',
+    'skip_empty_rows': False,
+    'skip_empty_columns': False,
+    'parallel_sheets': False,
+    'row_limit': 0,
+    'split_rows': 0,
+    'max_workers': None,
+    'image_width': 800,
+    'disable_image': False,
+    'optimize_images': True,
+    'disable_escaping': False,
+    'disable_notes': False,
+    'disable_color': False,
+    'enable_slides': False,
+    'min_block_size': 0,
+    'output_format': 'markdown',
+    'output_formats': ['markdown'],
+    'chunk_size': 0,
+    'chunk_unit': 'chars',
+    'max_part_size': 1024 * 1024 * 1024,
+    'max_archive_size': 4 * 1024 * 1024 * 1024,
+    'isolate_jobs': False,
+    'memory_limit': 0,
+    'cpu_limit': 0,
+    'time_limit': 0,
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mdeverything", description="多格式转换Markdown工具（命令行）")
+    parser.add_argument("inputs", nargs="*", help="输入文件路径或URL")
+    parser.add_argument("-o", "--output-dir", help="输出目录，默认为第一个输入文件所在目录")
+    parser.add_argument("--formats", default="markdown",
+                        help="输出格式，逗号分隔：markdown,wiki,qmd,text,json；一次解析同时输出多种格式")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="按标题分块，每块最多的字符数或token数，并为每个Markdown文件写出 <文件名>.chunks.jsonl 清单；0为不分块")
+    parser.add_argument("--chunk-unit", choices=["chars", "tokens"], default="chars",
+                        help="分块大小的单位：字符数或估计的token数")
+    parser.add_argument("--sheets", help="要转换的工作表，逗号分隔，默认全部")
+    parser.add_argument("--no-header", action="store_true", help="不将第一行视为表头")
+    parser.add_argument("--range", dest="cell_range", default="", help="单元格范围，如 A1:F50000")
+    parser.add_argument("--columns", default="", help="只转换这些列，如 A,C:E")
+    parser.add_argument("--skip-empty-rows", action="store_true", help="跳过空行")
+    parser.add_argument("--skip-empty-columns", action="store_true", help="跳过空列")
+    parser.add_argument("--row-limit", type=int, default=0, help="表格最多转换的数据行数，0为不限")
+    parser.add_argument("--split-rows", type=int, default=0, help="表格每个输出文件最多的数据行数，0为不拆分")
+    parser.add_argument("--parallel-sheets", action="store_true", help="多进程并行转换多个工作表")
+    parser.add_argument("--workers", type=int, help="并行转换的最大进程数，默认为CPU核数")
+    parser.add_argument("--app-id", default="", help="TextIn x-ti-app-id")
+    parser.add_argument("--secret-code", default="", help="TextIn x-ti-secret-code")
+    parser.add_argument("--jina-api-key", default="", help="使用Jina AI转换网页")
+    parser.add_argument("--ignore-links", action="store_true", help="忽略链接")
+    parser.add_argument("--ignore-images", action="store_true", help="忽略图片")
+    parser.add_argument("--localize-images", action="store_true", help="下载网页图片到 <文件名>_img 目录并改写为相对路径")
+    parser.add_argument("--max-image-size", type=int, default=20, help="单张图片最大大小（MB），0为不限")
+    parser.add_argument("--image-workers", type=int, help="同时下载图片的最大数量，默认8")
+    parser.add_argument("--html-parser", choices=["auto", "lxml", "html.parser"], default="auto",
+                        help="读取网页标题使用的HTML解析器，auto在安装了lxml时使用lxml")
+    parser.add_argument("--max-page-size", type=int, default=100, help="最大网页大小（MB），0为不限")
+    parser.add_argument("--image-width", type=int, default=800, help="PPT图片最大宽度（像素），更宽的图片会被缩小")
+    parser.add_argument("--keep-images", action="store_true", help="PPT图片保持原样，不缩放、不去重")
+    parser.add_argument("--jobs", type=int, help="批量转换时本地任务的并行进程数，默认为CPU核数")
+    parser.add_argument("--remote-jobs", type=int, default=4, help="批量转换时网页、PDF等远程任务的并行数")
+    parser.add_argument("--isolate", action="store_true",
+                        help="每个转换在单独的子进程中运行，超出下面的限制时只终止该任务")
+    parser.add_argument("--memory-limit", type=int, default=0, help="隔离模式下每个任务的内存上限（MB），0为不限")
+    parser.add_argument("--cpu-limit", type=int, default=0, help="隔离模式下每个任务的CPU时间上限（秒），0为不限")
+    parser.add_argument("--time-limit", type=int, default=0, help="隔离模式下每个任务的运行时间上限（秒），0为不限")
+    parser.add_argument("--max-part-size", type=int, default=1024,
+                        help="Word/Excel/PPT文件中单个部件解压后的最大大小（MB），0为不限")
+    parser.add_argument("--archive",
+                        help="把全部结果写入一个归档（.zip、.tar、.tar.gz、.tar.bz2、.tar.xz），不在输出目录中生成单独的文件；"
+                             "相对路径相对于输出目录")
+    parser.add_argument("--archive-store", action="store_true", help="zip归档不压缩")
+    parser.add_argument("--sitemap",
+                        help="转换站点地图（sitemap.xml、站点地图索引或 .xml.gz）或每行一个URL的列表文件中的全部网页，"
+                             "可为本地路径或URL，边读取边转换")
+    parser.add_argument("--url-pattern", help="只转换URL路径符合这些通配符模式的网页，逗号分隔，如 /docs/*")
+    parser.add_argument("--since", help="只转换站点地图中最后修改日期不早于这一天的网页，格式 YYYY-MM-DD")
+    parser.add_argument("--resume", action="store_true",
+                        help="继续输出目录中上次中断的批量转换：跳过已完成的输入；不指定输入时转换日志中所有未完成的输入")
+    parser.add_argument("--watch", action="store_true", help="将输入视为目录持续监视，自动转换新增或修改的文件")
+    parser.add_argument("--poll", action="store_true", help="监视时使用轮询而不是inotify")
+    parser.add_argument("--interval", type=float, default=2.0, help="轮询间隔（秒）")
+    parser.add_argument("--debounce", type=float, default=1.0, help="文件停止写入多少秒后再转换")
+    return parser
+
+def get_options(args):
+    """根据命令行参数构建转换选项"""
+    options = dict(DEFAULT_OPTIONS)
+    options.update({
+        'use_jina_ai': bool(args.jina_api_key),
+        'jina_api_key': args.jina_api_key,
+        'ignore_links': args.ignore_links,
+        'ignore_images': args.ignore_images,
+        'max_page_size': args.max_page_size * 1024 * 1024,
+        'html_parser': args.html_parser,
+        'localize_images': args.localize_images,
+        'max_image_size': args.max_image_size * 1024 * 1024,
+        'image_workers': args.image_workers,
+        'image_width': args.image_width,
+        'optimize_images': not args.keep_images,
+        'app_id': args.app_id,
+        'secret_code': args.secret_code,
+        'has_header': not args.no_header,
+        'cell_range': args.cell_range,
+        'columns': args.columns,
+        'skip_empty_rows': args.skip_empty_rows,
+        'skip_empty_columns': args.skip_empty_columns,
+        'parallel_sheets': args.parallel_sheets,
+        'row_limit': args.row_limit,
+        'split_rows': args.split_rows,
+        'max_workers': args.workers,
+        'chunk_size': args.chunk_size,
+        'chunk_unit': args.chunk_unit,
+        'max_part_size': args.max_part_size * 1024 * 1024,
+        'max_archive_size': 4 * args.max_part_size * 1024 * 1024,
+        # 指定任一资源限制即开启隔离模式
+        'isolate_jobs': bool(args.isolate or args.memory_limit or args.cpu_limit or args.time_limit),
+        'memory_limit': args.memory_limit,
+        'cpu_limit': args.cpu_limit,
+        'time_limit': args.time_limit,
+    })
+    options['output_formats'] = [name.strip() for name in args.formats.split(",") if name.strip()]
+    if args.sheets:
+        options['selected_sheets'] = [name.strip() for name in args.sheets.split(",") if name.strip()]
+    return options
+
+def get_input_options(options, input_path):
+    """为单个输入补全选项：未指定工作表时转换Excel文件的全部工作表"""
+    input_options = dict(options)
+    if not input_options['selected_sheets'] and input_path.lower().endswith('.xlsx'):
+        from excel2markdown import get_sheet_names
+        input_options['selected_sheets'] = get_sheet_names(input_path)
+    return input_options
+
+def convert_batch(args, output_dir, options):
+    """
+    探测各输入的工作量，按最长任务优先分通道并行转换。
+
+    每个输入的状态记录在输出目录的批量转换日志中；--resume 时跳过已完成的输入，
+    不指定输入时从日志中取出未完成的输入及其当时的选项。
+    指定 --archive 时全部结果写入该归档，各任务结束后立即追加。
+    """
+    from batch_journal import BatchJournal
+    from batch_scheduler import BatchJob, run_batch
+    from output_archive import OutputArchive
+    archive = None
+    if args.archive:
+        # 断点续转时追加到已有的归档
+        archive = OutputArchive(os.path.join(output_dir, args.archive), not args.archive_store, args.resume)
+    with BatchJournal.for_output_dir(output_dir) as journal, archive or nullcontext():
+        if args.inputs:
+            inputs = [(input_path, get_input_options(options, input_path)) for input_path in args.inputs]
+        else:
+            inputs = list(journal.iter_unfinished(options))
+
+        converted_files = []
+        jobs = []
+        for input_path, input_options in inputs:
+            if args.resume and journal.is_done(input_path, input_options):
+                converted_files.extend(journal.get_outputs(input_path))
+            else:
+                jobs.append(BatchJob(input_path, output_dir, input_options))
+        if args.resume:
+            print(f"跳过 {len(inputs) - len(jobs)} 个已完成的输入，继续转换 {len(jobs)} 个。")
+        for job in jobs:
+            print(f"{job.input_path}: {job.probe.kind}，估计 {job.probe.cost:.1f} 秒（{job.probe.lane}）")
+
+        def report(batch_result):
+            for level, title, message in batch_result.messages:
+                print(f"{title}: {message}")
+
+        for batch_result in run_batch(jobs, args.jobs, args.remote_jobs, on_done=report, journal=journal,
+                                      archive=archive):
+            if batch_result.result:
+                converted_files.extend(Converter.as_list(batch_result.result))
+    return converted_files
+
+def convert_sitemap(args, output_dir, options):
+    """
+    边读取站点地图边转换其中的网页，输出文件按网页地址命名。
+
+    网页不汇总成列表，同时提交的任务数有上限，读到第一个地址后立即开始转换；
+    日志和 --resume、--archive 的行为同 convert_batch。
+    """
+    import multiprocessing
+    from batch_journal import BatchJournal
+    from batch_scheduler import iter_jobs, run_stream
+    from deadline import Deadline
+    from output_archive import OutputArchive
+    from sitemap_reader import SitemapFilter, SitemapReader, parse_lastmod
+    options = dict(options, name_by_url=True)
+    cancel_event = multiprocessing.Event()
+    reader = SitemapReader(SitemapFilter(args.url_pattern, parse_lastmod(args.since)),
+                           Deadline(cancel_event=cancel_event),
+                           on_error=lambda location, error: print(f"警告: 读取 {location} 失败: {error}"))
+    archive = None
+    if args.archive:
+        archive = OutputArchive(os.path.join(output_dir, args.archive), not args.archive_store, args.resume)
+    converted_files = []
+    skipped = 0
+
+    def skip(input_path, outputs):
+        nonlocal skipped
+        skipped += 1
+        converted_files.extend(outputs)
+
+    def report(batch_result):
+        for level, title, message in batch_result.messages:
+            print(f"{title}: {message}")
+
+    with BatchJournal.for_output_dir(output_dir) as journal, archive or nullcontext():
+        jobs = iter_jobs(reader.iter_urls(args.sitemap), output_dir, options, journal, args.resume, skip)
+        for batch_result in run_stream(jobs, args.remote_jobs, on_done=report, journal=journal,
+                                       cancel_event=cancel_event, archive=archive):
+            if batch_result.result:
+                converted_files.extend(Converter.as_list(batch_result.result))
+    print(f"读取 {reader.seen} 个地址" + (f"，跳过 {skipped} 个已完成的网页" if args.resume else "") + "。")
+    return converted_files
+
+def watch(args, converter, options):
+    from folder_watcher import FolderWatcher
+    watcher = FolderWatcher(converter, args.inputs, args.output_dir, options,
+                            options_for=get_input_options, debounce=args.debounce,
+                            interval=args.interval, use_polling=args.poll)
+    print(f"正在监视: {', '.join(args.inputs)}（Ctrl+C 退出）")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.sitemap:
+        from sitemap_reader import parse_lastmod
+        if args.inputs or args.watch:
+            parser.error("--sitemap 不能与其他输入或 --watch 同时使用")
+        if not args.output_dir:
+            parser.error("--sitemap 需要用 -o 指定输出目录")
+        if args.since and not parse_lastmod(args.since):
+            parser.error("--since 的格式应为 YYYY-MM-DD")
+    elif args.url_pattern or args.since:
+        parser.error("--url-pattern 和 --since 只能与 --sitemap 同时使用")
+    elif not args.inputs and not args.resume:
+        parser.error("请指定输入文件路径或URL")
+    if not args.inputs and not args.output_dir:
+        parser.error("--resume 不指定输入时需要用 -o 指定上次的输出目录")
+    if args.archive:
+        from output_archive import get_archive_type
+        kind, tar_mode = get_archive_type(args.archive)
+        if args.watch:
+            parser.error("--archive 不能与 --watch 同时使用")
+        if kind is None:
+            parser.error("--archive 支持 .zip、.tar、.tar.gz、.tar.bz2、.tar.xz")
+        if args.resume and kind == 'tar' and tar_mode != 'w':
+            parser.error("压缩的tar归档不能追加，断点续转请使用 .zip 或 .tar")
+    converter = Converter()
+    options = get_options(args)
+    if args.watch:
+        return watch(args, converter, options)
+
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.inputs[0]))
+    ensure_output_directory(output_dir)
+
+    converted_files = []
+    try:
+        if args.sitemap:
+            converted_files = convert_sitemap(args, output_dir, options)
+        elif len(args.inputs) > 1 or args.resume or options['isolate_jobs'] or args.archive:
+            converted_files = convert_batch(args, output_dir, options)
+        else:
+            result = converter.convert_file(args.inputs[0], output_dir, get_input_options(options, args.inputs[0]))
+            converted_files.extend(Converter.as_list(result) if result else [])
+    except KeyboardInterrupt:
+        # 批量转换时正在运行的任务已停止，未完成的输入可用 --resume 继续
+        print("转换已取消。")
+        return 130
+
+    print(f"共转换 {len(converted_files)} 个文件。")
+    return 0 if converted_files else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
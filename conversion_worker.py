@@ -0,0 +1,151 @@
+import multiprocessing
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+class ConversionSignals(QObject):
+    progress = pyqtSignal(int)
+    # (生成的文件列表, 警告和错误列表, 是否已取消)
+    finished = pyqtSignal(list, list, bool)
+
+class ConversionWorker(QRunnable):
+    """
+    在后台线程中转换一批输入，界面保持响应，可随时取消。
+
+    探测各输入的工作量后按最长任务优先并行转换，网页/PDF等远程任务与本地任务分通道运行。
+    多个输入或勾选断点续转时，每个输入的状态记录在输出目录的日志中，断点续转时跳过已完成的输入。
+
+    :param input_paths: 输入文件路径或URL列表
+    :param output_dir: 输出目录
+    :param options: 转换选项
+    :param resume: 是否跳过日志中已完成的输入
+    :param archive_path: 可选，把全部结果写入这个 zip/tar 归档而不是输出目录（见 output_archive）
+    """
+
+    def __init__(self, input_paths, output_dir, options, resume=False, archive_path=None):
+        super().__init__()
+        self.input_paths = input_paths
+        self.output_dir = output_dir
+        self.options = options
+        self.resume = resume
+        self.archive_path = archive_path
+        # 同时传给工作进程，须为 multiprocessing.Event
+        self.cancel_event = multiprocessing.Event()
+        self.signals = ConversionSignals()
+
+    def cancel(self):
+        """请求取消：正在运行的任务在下一次检查时停止，外部程序和隔离的子进程被终止"""
+        self.cancel_event.set()
+
+    def run(self):
+        converted_files = []
+        problems = []
+        try:
+            converted_files, problems = self.convert()
+        except Exception as e:
+            problems.append(f"转换失败: {str(e)}")
+        self.signals.finished.emit(converted_files, problems, self.cancel_event.is_set())
+
+    def convert(self):
+        # 转换后端较重，在后台线程中首次使用时才导入
+        from batch_journal import BatchJournal
+        from batch_scheduler import BatchJob, run_batch
+        from converter import Converter
+        from output_archive import OutputArchive
+        converted_files = []
+        problems = []
+        done = 0
+
+        def report(batch_result):
+            nonlocal done
+            done += 1
+            self.signals.progress.emit(done)
+
+        journal = None
+        archive = None
+        if len(self.input_paths) > 1 or self.resume or self.archive_path:
+            journal = BatchJournal.for_output_dir(self.output_dir)
+        try:
+            if self.archive_path:
+                archive = OutputArchive(self.archive_path, append=self.resume)
+            jobs = []
+            for input_path in self.input_paths:
+                if self.resume and journal.is_done(input_path, self.options):
+                    converted_files.extend(journal.get_outputs(input_path))
+                    report(None)
+                else:
+                    jobs.append(BatchJob(input_path, self.output_dir, self.options))
+
+            for batch_result in run_batch(jobs, on_done=report, journal=journal, cancel_event=self.cancel_event,
+                                          archive=archive):
+                if batch_result.result:
+                    converted_files.extend(Converter.as_list(batch_result.result))
+                problems.extend(message for level, title, message in batch_result.messages
+                                if level != "information")
+        finally:
+            if archive is not None:
+                archive.close()
+            if journal is not None:
+                journal.close()
+        return converted_files, problems
+
+class SitemapConversionWorker(ConversionWorker):
+    """
+    在后台线程中边读取站点地图或URL列表边转换其中的网页，输出文件按网页地址命名。
+
+    网页地址不汇总成列表，也不显示在界面中；进度信号给出已转换的网页数。
+    其余参数同 ConversionWorker，日志始终写入输出目录。
+
+    :param sitemap: 站点地图（sitemap.xml、站点地图索引、.xml.gz）或URL列表文件的本地路径或URL
+    :param path_pattern: 可选，URL路径的通配符模式，见 sitemap_reader.SitemapFilter
+    :param since: 可选，datetime.date，只转换最后修改日期不早于这一天的网页
+    """
+
+    def __init__(self, sitemap, output_dir, options, resume=False, archive_path=None, path_pattern=None,
+                 since=None):
+        super().__init__([sitemap], output_dir, dict(options, name_by_url=True), resume, archive_path)
+        self.sitemap = sitemap
+        self.path_pattern = path_pattern
+        self.since = since
+
+    def convert(self):
+        from batch_journal import BatchJournal
+        from batch_scheduler import iter_jobs, run_stream
+        from converter import Converter
+        from deadline import Deadline
+        from output_archive import OutputArchive
+        from sitemap_reader import SitemapFilter, SitemapReader
+        converted_files = []
+        problems = []
+        done = 0
+
+        def report(batch_result):
+            nonlocal done
+            done += 1
+            self.signals.progress.emit(done)
+
+        def skip(input_path, outputs):
+            converted_files.extend(outputs)
+            report(None)
+
+        reader = SitemapReader(SitemapFilter(self.path_pattern, self.since), Deadline(cancel_event=self.cancel_event),
+                               on_error=lambda location, error: problems.append(f"读取 {location} 失败: {error}"))
+        archive = None
+        journal = BatchJournal.for_output_dir(self.output_dir)
+        try:
+            if self.archive_path:
+                archive = OutputArchive(self.archive_path, append=self.resume)
+            jobs = iter_jobs(reader.iter_urls(self.sitemap), self.output_dir, self.options, journal, self.resume,
+                             skip)
+            for batch_result in run_stream(jobs, on_done=report, journal=journal, cancel_event=self.cancel_event,
+                                           archive=archive):
+                if batch_result.result:
+                    converted_files.extend(Converter.as_list(batch_result.result))
+                problems.extend(message for level, title, message in batch_result.messages
+                                if level != "information")
+        except Exception as e:
+            # 已转换的网页照常返回，未完成的可以断点续转
+            problems.append(f"读取站点地图失败: {str(e)}")
+        finally:
+            if archive is not None:
+                archive.close()
+            journal.close()
+        return converted_files, problems
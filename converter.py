@@ -1,17 +1,54 @@
 import os
-from PyQt6.QtWidgets import QMessageBox
-from pdf2markdown import pdf_to_markdown
-from excel2markdown import excel_to_markdown
-from html2markdown import html_to_markdown, get_webpage_title
-from pptx2markdown import pptx_to_markdown
-from docx2markdown import docx_to_markdown
-import pypandoc
-from url_handler import is_url
+import zipfile
+from contextlib import nullcontext
+from converter_registry import ConverterRegistry
+from deadline import Deadline, get_deadline
+from document_ir import iter_raw_markdown
+from document_renderers import get_format_paths, write_documents
+from markdown_sink import get_output_path, get_safe_filename, get_url_file_name, write_markdown
+
+# 转换后端和PyQt都在首次使用时才导入，保证窗口启动和命令行转换足够快
 
 class Converter:
-    def __init__(self, parent, settings_handler):
+    def __init__(self, parent=None, settings_handler=None, notifier=None):
+        """
+        :param parent: 消息框的父窗口，为None时（命令行模式）消息输出到控制台
+        :param settings_handler: 设置处理器，为None时不保存设置
+        :param notifier: 可选，接收 (level, title, message) 的回调，设置后代替消息框和控制台输出
+        """
         self.parent = parent
         self.settings_handler = settings_handler
+        self.notifier = notifier
+        self.registry = self.create_registry()
+
+    def create_registry(self):
+        """创建并登记内置转换器，分派表只构建一次"""
+        registry = ConverterRegistry()
+        for scheme in ("http", "https", "ftp", "ftps"):
+            registry.register_scheme(scheme, self.convert_html)
+        registry.register_extension(".pdf", self.convert_pdf)
+        registry.register_extension(".xlsx", self.convert_excel)
+        registry.register_extension(".csv", self.convert_csv)
+        registry.register_extension(".tsv", self.convert_csv)
+        registry.register_extension(".pptx", self.convert_pptx)
+        registry.register_extension(".docx", self.convert_docx_latex)
+        registry.register_extension(".tex", self.convert_docx_latex)
+        return registry
+
+    def notify(self, level, title, message):
+        """
+        显示提示信息。
+
+        :param level: "information"、"warning" 或 "critical"
+        """
+        if self.notifier is not None:
+            self.notifier(level, title, message)
+            return
+        if self.parent is None:
+            print(f"{title}: {message}")
+            return
+        from PyQt6.QtWidgets import QMessageBox
+        getattr(QMessageBox, level)(self.parent, title, message)
 
     def convert_file(self, input_path, output_dir, options):
         """
@@ -22,24 +59,70 @@ class Converter:
         :param options: 转换选项
         :return: 生成的Markdown文件路径或路径列表
         """
-        if is_url(input_path):
-            return self.convert_html(input_path, output_dir, options)
-        elif os.path.isfile(input_path):
-            file_extension = os.path.splitext(input_path)[1].lower()
-            converters = {
-                ".pdf": self.convert_pdf,
-                ".xlsx": self.convert_excel,
-                ".pptx": self.convert_pptx,
-                ".docx": self.convert_docx_latex,
-                ".tex": self.convert_docx_latex
-            }
-            converter = converters.get(file_extension)
+        # 各转换器从选项中取得截止时间和取消标志，调用方没有提供时按 time_limit 创建
+        if options.get('deadline') is None:
+            options = dict(options, deadline=Deadline.from_options(options))
+        options['deadline'].check()
+        if self.registry.match_scheme(input_path) or os.path.isfile(input_path):
+            converter = self.registry.lookup(input_path)
             if converter:
-                return converter(input_path, output_dir, options)
+                if not self.check_archive(input_path, options):
+                    return None
+                result = converter(input_path, output_dir, options)
+                if result and options.get('chunk_size'):
+                    self.write_chunk_manifests(input_path, result, options)
+                return result
             else:
-                QMessageBox.warning(self.parent, "警告", f"不支持的文件格式: {input_path}")
+                self.notify("warning", "警告", f"不支持的文件格式: {input_path}")
         else:
-            QMessageBox.warning(self.parent, "警告", f"无效的文件路径或URL: {input_path}")
+            self.notify("warning", "警告", f"无效的文件路径或URL: {input_path}")
+
+    def check_archive(self, input_path, options):
+        """解析Word/Excel/PPT文件前检查各部件解压后的大小，超出限制时提示并返回False"""
+        from document_probe import OOXML_EXTENSIONS, check_archive_sizes
+        if os.path.splitext(input_path)[1].lower() not in OOXML_EXTENSIONS:
+            return True
+        try:
+            check_archive_sizes(input_path, options.get('max_part_size', 0), options.get('max_archive_size', 0))
+        except zipfile.BadZipFile as e:
+            self.notify("critical", "错误", f"无法读取 {input_path}: {str(e)}")
+            return False
+        except ValueError as e:
+            self.notify("critical", "错误", f"拒绝转换 {input_path}: {str(e)}")
+            return False
+        return True
+
+    def write_chunk_manifests(self, input_path, result, options):
+        """
+        为生成的每个Markdown文件写出按标题分块的JSONL清单，失败时提示，不影响转换结果。
+
+        Excel输出记录工作表名称；合并转换的网页、启用了分隔符（且不含备注）的幻灯片按分隔线记录网页地址或幻灯片序号。
+        """
+        from markdown_chunks import write_chunk_manifest
+        section_key = sections = None
+        extension = os.path.splitext(input_path)[1].lower()
+        if self.registry.match_scheme(input_path) and options.get('selected_links'):
+            section_key, sections = 'url', list(options['selected_links'])
+        elif extension == '.pptx' and options.get('enable_slides') and options.get('disable_notes'):
+            section_key = 'slide'
+        for output_path in self.as_list(result):
+            if not output_path.lower().endswith('.md'):
+                continue
+            origin = None
+            if extension == '.xlsx':
+                sheet_name = self.get_output_sheet(input_path, output_path, options.get('selected_sheets') or ())
+                origin = {'sheet': sheet_name} if sheet_name is not None else None
+            try:
+                write_chunk_manifest(output_path, input_path, options, origin, section_key, sections)
+            except Exception as e:
+                self.notify("warning", "警告", f"生成分块清单失败: {output_path}: {str(e)}")
+
+    def get_output_sheet(self, input_path, output_path, sheet_names):
+        """Excel输出文件（<name>-<工作表>.md 或其拆分部分）对应的工作表，按最长的名称匹配"""
+        prefix = f"{self.get_base_name(input_path)}-"
+        name = os.path.basename(output_path)
+        matches = [sheet for sheet in sheet_names if name.startswith(prefix + sheet)]
+        return max(matches, key=len) if matches else None
 
     def convert_html(self, input_path, output_dir, options):
         try:
@@ -49,97 +132,195 @@ class Converter:
             else:
                 return self.convert_single_html(input_path, output_dir, options)
         except Exception as e:
-            QMessageBox.critical(self.parent, "错误", f"转换HTML失败: {str(e)}")
+            self.notify("critical", "错误", f"转换HTML失败: {str(e)}")
 
     def convert_single_html(self, url, output_dir, options):
-        markdown_content = html_to_markdown(
-            url,
-            use_jina_ai=options.get('use_jina_ai', False),
-            jina_api_key=options.get('jina_api_key', ''),
-            ignore_links=options.get('ignore_links', False),
-            ignore_images=options.get('ignore_images', False),
-            body_width=options.get('body_width', None)
-        )
-        title = get_webpage_title(url)
-        safe_title = self.get_safe_filename(title)
-        output_file = os.path.join(output_dir, f"{safe_title}.md")
-        self.save_markdown(markdown_content, output_file)
-        return output_file
+        from html2markdown import iter_markdown, get_webpage_title
+        if options.get('name_by_url'):
+            # 批量转换站点地图时按地址命名：不同网页的标题常常相同，也省去一次读取标题的请求
+            base_name = get_url_file_name(url)
+        else:
+            title = get_webpage_title(url, options.get('html_parser', 'auto'), get_deadline(options))
+            base_name = self.get_safe_filename(title)
+        output_file = get_output_path(output_dir, base_name)
+        with self.create_image_localizer(options) as localizer:
+            chunks = iter_markdown(url, options)
+            if localizer is not None:
+                chunks = localizer.localize(chunks, output_file, url)
+            return self.save_markdown(chunks, output_file, options)
 
     def convert_multiple_links(self, links, output_dir, options):
-        all_content = []
+        output_file = get_output_path(output_dir, self.get_safe_filename("combined_webpages"))
+        with self.create_image_localizer(options) as localizer:
+            return self.save_markdown(self.iter_multiple_links(links, options, localizer, output_file), output_file,
+                                      options)
+
+    def iter_multiple_links(self, links, options, localizer=None, output_file=None):
+        """
+        逐个网页产出Markdown块，合并结果无需在内存中拼接
+
+        :param localizer: ImageLocalizer，为None时保留远程图片链接；多个网页共用一个以便跨网页去重
+        """
+        from html2markdown import iter_markdown, get_webpage_title
         for link in links:
-            markdown_content = html_to_markdown(
-                link,
-                use_jina_ai=options.get('use_jina_ai', False),
-                jina_api_key=options.get('jina_api_key', ''),
-                ignore_links=options.get('ignore_links', False),
-                ignore_images=options.get('ignore_images', False),
-                body_width=options.get('body_width', None)
-            )
-            title = get_webpage_title(link)
-            all_content.append(f"# {title}\n\n{markdown_content}\n\n---\n\n")
-        
-        combined_content = "".join(all_content)
-        safe_title = self.get_safe_filename("combined_webpages")
-        output_file = os.path.join(output_dir, f"{safe_title}.md")
-        self.save_markdown(combined_content, output_file)
-        return output_file
+            title = get_webpage_title(link, options.get('html_parser', 'auto'), get_deadline(options))
+            yield f"# {title}\n\n"
+            chunks = iter_markdown(link, options)
+            if localizer is not None:
+                chunks = localizer.localize(chunks, output_file, link)
+            yield from chunks
+            yield "\n\n---\n\n"
+
+    @staticmethod
+    def create_image_localizer(options):
+        """启用图片本地化时返回 ImageLocalizer，否则返回空的上下文"""
+        if not options.get('localize_images') or options.get('ignore_images'):
+            return nullcontext()
+        from image_localizer import ImageLocalizer, DEFAULT_MAX_WORKERS, DEFAULT_MAX_IMAGE_SIZE
+        return ImageLocalizer(max_workers=options.get('image_workers') or DEFAULT_MAX_WORKERS,
+                              max_image_size=options.get('max_image_size', DEFAULT_MAX_IMAGE_SIZE),
+                              deadline=options.get('deadline'))
 
     def convert_pdf(self, input_path, output_dir, options):
+        from pdf2markdown import iter_markdown
         try:
-            self.settings_handler.save_pdf_settings(options['app_id'], options['secret_code'])
-            markdown_content = pdf_to_markdown(input_path, **options)
-            output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(input_path))[0]}.md")
-            self.save_markdown(markdown_content, output_file)
-            return output_file
+            if self.settings_handler is not None:
+                self.settings_handler.save_pdf_settings(options['app_id'], options['secret_code'])
+            output_file = get_output_path(output_dir, self.get_base_name(input_path))
+            return self.save_markdown(iter_markdown(input_path, options), output_file, options)
         except Exception as e:
-            QMessageBox.critical(self.parent, "PDF转换错误", f"PDF转换失败: {str(e)}\n\n请检查pdf2markdown.py文件是否正确配置。")
+            self.notify("critical", "PDF转换错误", f"PDF转换失败: {str(e)}\n\n请检查pdf2markdown.py文件是否正确配置。")
 
     def convert_excel(self, input_path, output_dir, options):
+        from excel2markdown import excel_to_markdown, convert_sheets_parallel, SheetSelection
         selected_sheets = options['selected_sheets']
         if not selected_sheets:
-            QMessageBox.warning(self.parent, "警告", f"未选择 {os.path.basename(input_path)} 的工作表")
+            self.notify("warning", "警告", f"未选择 {os.path.basename(input_path)} 的工作表")
             return
 
         converted_files = []
-        for sheet_name in selected_sheets:
-            output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(input_path))[0]}-{sheet_name}.md")
+        sheets = [(sheet_name, get_output_path(output_dir, self.get_base_name(input_path), f"-{sheet_name}"))
+                  for sheet_name in selected_sheets]
+        selection = SheetSelection.from_options(options)
+        split_rows = options.get('split_rows', 0)
+        row_limit = options.get('row_limit', 0)
+        if self.wants_documents(options):
+            # 其他输出格式经由中间文档表示生成，不拆分文件
+            from excel2markdown import iter_document
+            for sheet_name, output_file in sheets:
+                get_deadline(options).check()
+                try:
+                    sheet_options = dict(options, sheet_name=sheet_name)
+                    converted_files.extend(self.as_list(
+                        self.write_document(iter_document(input_path, sheet_options), output_file, options)))
+                except Exception as e:
+                    self.notify("critical", "错误", f"转换工作表 '{sheet_name}' 失败: {str(e)}")
+            return converted_files
+
+        if options.get('parallel_sheets') and len(sheets) > 1:
+            results = convert_sheets_parallel(input_path, sheets, options['has_header'], selection,
+                                              options.get('max_workers'), split_rows, row_limit)
+            for sheet_name, output_files, error in results:
+                if error is None:
+                    converted_files.extend(output_files)
+                else:
+                    self.notify("critical", "错误", f"转换工作表 '{sheet_name}' 失败: {str(error)}")
+            return converted_files
+
+        for sheet_name, output_file in sheets:
+            get_deadline(options).check()
             try:
-                excel_to_markdown(input_path, output_file, sheet_name, options['has_header'])
-                converted_files.append(output_file)
+                converted_files.extend(excel_to_markdown(input_path, output_file, sheet_name, options['has_header'],
+                                                         selection, split_rows, row_limit))
             except Exception as e:
-                QMessageBox.critical(self.parent, "错误", f"转换工作表 '{sheet_name}' 失败: {str(e)}")
+                self.notify("critical", "错误", f"转换工作表 '{sheet_name}' 失败: {str(e)}")
         return converted_files
 
+    def convert_csv(self, input_path, output_dir, options):
+        from csv2markdown import csv_to_markdown, iter_document
+        try:
+            output_file = get_output_path(output_dir, self.get_base_name(input_path))
+            if self.wants_documents(options):
+                return self.write_document(iter_document(input_path, options), output_file, options)
+            return csv_to_markdown(input_path, output_file, options.get('has_header', True),
+                                   options.get('split_rows', 0), options.get('row_limit', 0))
+        except Exception as e:
+            self.notify("critical", "错误", f"CSV转换失败: {str(e)}")
+
     def convert_pptx(self, input_path, output_dir, options):
+        from pptx2markdown import pptx_to_markdown, iter_markdown
         try:
+            if self.wants_documents(options):
+                output_file = get_output_path(output_dir, self.get_base_name(input_path))
+                # 启用幻灯片分隔线且不含备注时，分隔线都在幻灯片之间（与分块清单的判断相同）
+                slides = options.get('enable_slides') and options.get('disable_notes')
+                return self.save_markdown(iter_markdown(input_path, options), output_file, options,
+                                          'slide' if slides else 'section')
             return pptx_to_markdown(input_path, output_dir, **options)
         except Exception as e:
-            QMessageBox.critical(self.parent, "错误", f"PPTX转换失败: {str(e)}")
+            self.notify("critical", "错误", f"PPTX转换失败: {str(e)}")
 
     def convert_docx_latex(self, input_path, output_dir, options):
         try:
-            output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(input_path))[0]}.md")
+            output_file = get_output_path(output_dir, self.get_base_name(input_path))
             if input_path.lower().endswith('.docx'):
-                docx_to_markdown(input_path, output_file)
+                from docx2markdown import iter_document
+                return self.write_document(iter_document(input_path, options), output_file, options)
             else:  # .tex 文件
-                pypandoc.convert_file(input_path, 'md', outputfile=output_file, format='latex')
-            return output_file
+                from latex2markdown import iter_markdown
+                return self.write_document(iter_raw_markdown(iter_markdown(input_path, options)), output_file, options)
         except Exception as e:
             self.show_conversion_error(e, input_path)
 
-    def save_markdown(self, content, filename):
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(content)
-            QMessageBox.information(self.parent, "成功", f"Markdown文件已保存为: {filename}")
-        except Exception as e:
-            QMessageBox.critical(self.parent, "错误", f"保存Markdown文件失败: {str(e)}")
+    def save_markdown(self, content, filename, options=None, break_kind='section'):
+        """
+        保存Markdown内容并提示，写入失败时异常交由调用方处理。
+
+        :param content: 字符串或转换器产出的块迭代器
+        :param filename: 输出文件路径
+        :param options: 转换选项，选择了其他输出格式时按中间文档渲染为各个格式
+        :param break_kind: 其他输出格式中Markdown分隔线对应的分界类型，见 document_ir.iter_raw_markdown
+        :return: 输出文件路径，多种格式时为路径列表
+        """
+        if options is not None and self.wants_documents(options):
+            if isinstance(content, str):
+                content = [content]
+            result = self.write_document(iter_raw_markdown(content, break_kind), filename, options)
+        else:
+            result = write_markdown(content, filename)
+        self.notify("information", "成功", f"Markdown文件已保存为: {', '.join(self.as_list(result))}")
+        return result
+
+    def write_document(self, nodes, output_file, options):
+        """
+        只遍历一次中间文档节点流，写出所选的全部输出格式。
+
+        :param output_file: Markdown输出路径，其他格式使用相同的文件名和各自的扩展名
+        :return: 单个输出路径，多种格式时为路径列表
+        """
+        outputs = write_documents(nodes, get_format_paths(output_file, self.get_output_formats(options)))
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    @staticmethod
+    def get_output_formats(options):
+        """所选的输出格式，默认只输出Markdown"""
+        return options.get('output_formats') or ['markdown']
+
+    def wants_documents(self, options):
+        """是否需要Markdown以外的输出格式"""
+        return self.get_output_formats(options) != ['markdown']
+
+    @staticmethod
+    def as_list(result):
+        return result if isinstance(result, list) else [result]
 
     @staticmethod
     def get_safe_filename(filename):
-        return "".join([c for c in filename if c.isalnum() or c in (' ', '-', '_')]).rstrip()
+        return get_safe_filename(filename)
+
+    @staticmethod
+    def get_base_name(input_path):
+        return os.path.splitext(os.path.basename(input_path))[0]
 
     def show_conversion_error(self, error, input_path):
         error_message = f"转换失败: {str(error)}\n"
@@ -148,4 +329,4 @@ class Converter:
             error_message += "可以尝试运行以下命令安装:\n"
             error_message += "pip install pypandoc\n"
             error_message += "并从 https://pandoc.org/installing.html 下载安装pandoc"
-        QMessageBox.critical(self.parent, "错误", error_message)
\ No newline at end of file
+        self.notify("critical", "错误", error_message)
\ No newline at end of file
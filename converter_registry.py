@@ -0,0 +1,92 @@
+import importlib
+import os
+from urllib.parse import urlparse
+
+ENTRY_POINT_GROUP = "mdeverything.converters"
+
+class ConverterRegistry:
+    """
+    按文件扩展名和URL协议登记转换器。
+
+    转换器目标可以是可调用对象、"模块:属性" 形式的字符串或入口点对象，
+    后两者只在第一次被用到时才导入，避免启动时加载全部转换后端。
+    第三方转换器通过 ``mdeverything.converters`` 入口点组注册：
+    名称以 "." 开头的视为扩展名（如 ".epub"），其余视为URL协议（如 "ipfs"）。
+    插件转换器的调用方式为 ``convert(input_path, output_dir, options)``。
+    """
+
+    def __init__(self, load_plugins=True):
+        self._extensions = {}
+        self._schemes = {}
+        self._resolved = {}
+        self._plugins_loaded = not load_plugins
+
+    def register_extension(self, extension, target):
+        """登记扩展名（含前导点）对应的转换器"""
+        self._extensions[extension.lower()] = target
+
+    def register_scheme(self, scheme, target):
+        """登记URL协议对应的转换器"""
+        self._schemes[scheme.lower()] = target
+
+    def extensions(self):
+        """返回所有已登记的扩展名"""
+        self.load_plugins()
+        return sorted(self._extensions)
+
+    def match_scheme(self, input_path):
+        """返回输入所用的已登记URL协议，不是已登记的URL时返回None"""
+        self.load_plugins()
+        scheme = urlparse(input_path).scheme.lower()
+        # 单字母协议是Windows盘符，不按URL处理
+        if len(scheme) > 1 and scheme in self._schemes:
+            return scheme
+        return None
+
+    def lookup(self, input_path):
+        """
+        查找输入对应的转换器。
+
+        :param input_path: 输入文件路径或URL
+        :return: 已解析的转换器，未登记时返回None
+        """
+        scheme = self.match_scheme(input_path)
+        if scheme:
+            return self.resolve(self._schemes[scheme])
+        file_extension = os.path.splitext(input_path)[1].lower()
+        target = self._extensions.get(file_extension)
+        if target is None:
+            return None
+        return self.resolve(target)
+
+    def resolve(self, target):
+        """把登记的目标解析为可调用对象，结果会被缓存"""
+        if callable(target):
+            return target
+        key = id(target) if hasattr(target, 'load') else target
+        if key not in self._resolved:
+            if hasattr(target, 'load'):
+                self._resolved[key] = target.load()
+            else:
+                module_name, _, attr = target.partition(':')
+                module = importlib.import_module(module_name)
+                self._resolved[key] = getattr(module, attr) if attr else module
+        return self._resolved[key]
+
+    def load_plugins(self):
+        """登记通过入口点安装的第三方转换器（只执行一次）"""
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        from importlib.metadata import entry_points
+        try:
+            plugins = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            print(f"无法读取转换器插件: {str(e)}")
+            return
+        for entry_point in plugins:
+            # 内置转换器优先，插件不能覆盖
+            if entry_point.name.startswith('.'):
+                self._extensions.setdefault(entry_point.name.lower(), entry_point)
+            else:
+                self._schemes.setdefault(entry_point.name.lower(), entry_point)
@@ -0,0 +1,89 @@
+import codecs
+import csv
+import os
+from markdown_table import iter_markdown_table, write_markdown_tables
+
+SNIFF_SIZE = 64 * 1024
+READ_BUFFER_SIZE = 1024 * 1024
+
+# 没有BOM时依次尝试的编码；gb18030 兼容 GBK/GB2312 导出的表格
+FALLBACK_ENCODINGS = ('utf-8', 'gb18030')
+
+def csv_to_markdown(file_path, output_path, has_header=True, split_rows=0, row_limit=0):
+    """
+    将CSV/TSV文件转换为Markdown格式的表格。
+
+    逐行流式读取和写出，内存占用与文件大小无关。
+
+    :param file_path: CSV或TSV文件路径
+    :param output_path: 输出Markdown文件路径
+    :param has_header: 是否将第一行视为表头
+    :param split_rows: 每个文件最多包含的数据行数，0为不拆分
+    :param row_limit: 最多转换的数据行数，0为不限制
+    :return: 写出的Markdown文件路径列表
+    """
+    encoding, dialect = sniff_csv(file_path)
+    with open_csv(file_path, encoding) as f:
+        outputs = write_markdown_tables(csv.reader(f, dialect), has_header, output_path, split_rows, row_limit)
+    for output in outputs:
+        print(f"Markdown文件已生成: {output}")
+    return outputs
+
+def iter_markdown(input_path, options):
+    """统一转换接口：逐行产出CSV/TSV的Markdown表格"""
+    encoding, dialect = sniff_csv(input_path)
+    with open_csv(input_path, encoding) as f:
+        yield from iter_markdown_table(csv.reader(f, dialect), options.get('has_header', True))
+
+def iter_document(input_path, options):
+    """中间文档接口：产出一个行保持流式读取的 Table 节点"""
+    from document_ir import table_from_rows
+    encoding, dialect = sniff_csv(input_path)
+    with open_csv(input_path, encoding) as f:
+        yield table_from_rows(csv.reader(f, dialect), options.get('has_header', True), options.get('row_limit', 0))
+
+def open_csv(file_path, encoding):
+    # 嗅探只看了文件开头，后面若出现个别非法字节用替换字符代替，不中断转换
+    return open(file_path, 'r', encoding=encoding, errors='replace', newline='', buffering=READ_BUFFER_SIZE)
+
+def sniff_csv(file_path):
+    """
+    根据文件开头的一小段内容判断编码和CSV方言。
+
+    :return: (编码, csv方言)
+    """
+    with open(file_path, 'rb') as f:
+        prefix = f.read(SNIFF_SIZE)
+    encoding = sniff_encoding(prefix)
+    sample = codecs.getincrementaldecoder(encoding)(errors='replace').decode(prefix)
+    return encoding, sniff_dialect(sample, file_path)
+
+def sniff_encoding(prefix):
+    """按BOM、UTF-8、GB18030的顺序判断编码，都不符合时使用latin-1"""
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            # final=False：末尾被截断的多字节字符不算错误
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+def sniff_dialect(sample, file_path):
+    """
+    判断分隔符等CSV方言，无法判断时按扩展名使用逗号或制表符。
+
+    .tsv 文件的分隔符固定为制表符，只嗅探引号等其他设置，单元格中的逗号不会被当作分隔符。
+    """
+    tsv = os.path.splitext(file_path)[1].lower() == '.tsv'
+    # 只用完整的行进行判断
+    if len(sample) >= SNIFF_SIZE // 2 and '\n' in sample:
+        sample = sample[:sample.rindex('\n')]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters='\t' if tsv else ',\t;|')
+    except csv.Error:
+        return csv.excel_tab if tsv else csv.excel
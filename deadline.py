@@ -0,0 +1,162 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+
+# 截止时间与协作式取消：每个转换任务带一个 Deadline（放在转换选项的 'deadline' 中传给各转换器），
+# 网络请求的连接/读取超时由剩余时间推算，下载和解析的循环中定期检查，外部程序在等待期间轮询，
+# 取消或超时时终止。取消标志是一个 Event，可以是 threading.Event，也可以是在工作进程启动时
+# 通过 install_cancel_event 安装的 multiprocessing.Event，界面的取消按钮和命令行的 Ctrl+C 设置它。
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+# 等待外部程序和后台调用时检查取消标志的间隔（秒）
+POLL_INTERVAL = 0.2
+# 终止外部程序时等待其自行退出的时间（秒），之后强制结束
+TERMINATE_GRACE = 3
+
+# 工作进程中安装的取消标志，Deadline 未指定取消标志时使用
+installed_cancel_event = None
+
+class Cancelled(Exception):
+    """转换被取消时抛出的异常"""
+    pass
+
+class DeadlineExceeded(Cancelled):
+    """超出运行时间限制时抛出的异常"""
+    pass
+
+def install_cancel_event(event, ignore_sigint=False):
+    """
+    在工作进程中安装取消标志，可用作 ProcessPoolExecutor 的 initializer。
+
+    :param ignore_sigint: 忽略 Ctrl+C，由父进程统一通过取消标志停止工作进程中的任务
+    """
+    global installed_cancel_event
+    installed_cancel_event = event
+    if ignore_sigint:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def restore_deadline(timeout, expires):
+    deadline = Deadline()
+    deadline.timeout = timeout
+    deadline.expires = expires
+    return deadline
+
+def get_deadline(options):
+    """取出转换选项中的 Deadline，没有时返回不限时间的 Deadline"""
+    return options.get('deadline') or Deadline()
+
+class Deadline:
+    """
+    一个转换任务的截止时间和取消标志。
+
+    :param timeout: 允许的运行时间（秒），为空或0时不限
+    :param cancel_event: 取消标志，为None时使用本进程安装的取消标志
+    """
+    __slots__ = ('timeout', 'expires', 'cancel_event')
+
+    def __init__(self, timeout=None, cancel_event=None):
+        self.timeout = timeout or None
+        self.expires = time.monotonic() + timeout if timeout else None
+        self.cancel_event = cancel_event
+
+    @classmethod
+    def from_options(cls, options, cancel_event=None):
+        """运行时间限制取自选项 time_limit"""
+        return cls(options.get('time_limit') or None, cancel_event)
+
+    def __reduce__(self):
+        # 传给工作进程时不带取消标志（Event 不能随任务参数传递），到达后使用该进程安装的标志
+        return restore_deadline, (self.timeout, self.expires)
+
+    def is_cancelled(self):
+        event = self.cancel_event or installed_cancel_event
+        return event is not None and event.is_set()
+
+    def remaining(self):
+        """剩余秒数，不限时间时为None"""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def check(self):
+        """已取消或超时时抛出异常，在循环中定期调用"""
+        if self.is_cancelled():
+            raise Cancelled("转换已取消")
+        if self.expires is not None and time.monotonic() >= self.expires:
+            raise DeadlineExceeded(f"超出运行时间限制（{self.timeout:g} 秒）")
+
+    def get_timeout(self, connect=DEFAULT_CONNECT_TIMEOUT, read=DEFAULT_READ_TIMEOUT):
+        """requests 使用的 (连接超时, 读取超时)，不超过剩余时间"""
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return (connect, read)
+        return (min(connect, remaining), min(read, remaining))
+
+    def call(self, function, *args, **kwargs):
+        """
+        在后台线程中执行无法中途检查的阻塞调用（如等待接口返回），等待期间定期检查。
+
+        取消或超时时立即抛出异常，不再等待该调用；它在自身的超时后结束，结果被丢弃。
+        """
+        outcome = {}
+        done = threading.Event()
+
+        def target():
+            try:
+                outcome['result'] = function(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=target, daemon=True).start()
+        while not done.wait(POLL_INTERVAL):
+            self.check()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def run_process(self, cmd, **kwargs):
+        """
+        运行外部程序并收集输出，相当于 subprocess.run(cmd, capture_output=True, text=True)。
+
+        外部程序在单独的进程组中运行，取消或超时时连同它启动的进程一起终止。
+        """
+        self.check()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=True, **kwargs)
+        try:
+            while True:
+                try:
+                    stdout, stderr = process.communicate(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    self.check()
+        except BaseException:
+            # 外部程序不在终端的前台进程组中，收不到 Ctrl+C，由这里终止
+            terminate_process(process)
+            raise
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+def terminate_process(process):
+    """先请求外部程序及其进程组退出，超过 TERMINATE_GRACE 秒后强制结束"""
+    send_signal(process, signal.SIGTERM)
+    try:
+        process.communicate(timeout=TERMINATE_GRACE)
+    except subprocess.TimeoutExpired:
+        send_signal(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        process.communicate()
+
+def send_signal(process, sig):
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, sig)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.poll() is None:
+        process.send_signal(sig)
@@ -0,0 +1,178 @@
+from itertools import chain, islice
+from markdown_sink import Asset
+from markdown_table import get_header
+
+# 跨格式的中间文档表示：转换器解析一次源文件，逐个产出下面的节点，
+# 再由 document_renderers 中的渲染器输出为 Markdown、Wiki、Quarto、纯文本或JSON。
+# 节点都使用 __slots__，行内样式用位标记表示，大文档也不会产生大量字典开销。
+# 节点流中可以夹带 markdown_sink.Asset（图片等附属文件），渲染时原样交给写出端。
+
+# 行内样式位标记
+BOLD = 1
+ITALIC = 2
+CODE = 4
+STRIKE = 8
+
+class Span:
+    """
+    一段带样式的行内文字。
+
+    :param text: 文字
+    :param style: 样式位标记的组合，如 BOLD | ITALIC
+    :param href: 链接地址，没有时为None
+    """
+    __slots__ = ('text', 'style', 'href')
+
+    def __init__(self, text, style=0, href=None):
+        self.text = text
+        self.style = style
+        self.href = href
+
+class Heading:
+    """标题，level 从1开始"""
+    __slots__ = ('level', 'spans')
+
+    def __init__(self, level, spans):
+        self.level = level
+        self.spans = tuple(spans)
+
+class Paragraph:
+    """段落，由若干 Span 组成"""
+    __slots__ = ('spans',)
+
+    def __init__(self, spans):
+        self.spans = tuple(spans)
+
+class ListItem:
+    """
+    列表项。
+
+    :param level: 缩进层级，从0开始
+    :param ordered: 是否为有序列表
+    """
+    __slots__ = ('level', 'spans', 'ordered')
+
+    def __init__(self, spans, level=0, ordered=False):
+        self.spans = tuple(spans)
+        self.level = level
+        self.ordered = ordered
+
+class Table:
+    """
+    表格。
+
+    :param header: 表头单元格文字列表
+    :param rows: 数据行的可迭代对象，每行是字符串列表；可以是流式读取的迭代器，只能渲染一次
+    """
+    __slots__ = ('header', 'rows')
+
+    def __init__(self, header, rows):
+        self.header = list(header)
+        self.rows = rows
+
+class CodeBlock:
+    """
+    代码块。
+
+    :param text: 代码，不含结尾换行
+    :param language: 语言标记，没有时为空字符串
+    """
+    __slots__ = ('text', 'language')
+
+    def __init__(self, text, language=''):
+        self.text = text
+        self.language = language
+
+class Image:
+    """
+    图片。
+
+    :param src: 图片地址，本地图片为相对于输出文件的路径
+    :param alt: 替代文字
+    :param width: 显示宽度（像素），没有时为None
+    """
+    __slots__ = ('src', 'alt', 'width')
+
+    def __init__(self, src, alt='', width=None):
+        self.src = src
+        self.alt = alt
+        self.width = width
+
+class Boundary:
+    """
+    幻灯片、页、工作表或章节（Markdown中的分隔线）之间的分界。
+
+    :param kind: "slide"、"page"、"sheet" 或 "section"
+    :param number: 新的一页/一张的序号，从1开始
+    :param title: 标题，没有时为None
+    """
+    __slots__ = ('kind', 'number', 'title')
+
+    def __init__(self, kind, number, title=None):
+        self.kind = kind
+        self.number = number
+        self.title = title
+
+class RawMarkdown:
+    """
+    已经是Markdown的内容。
+
+    外部工具（html2text、TextIn、pptx2md、pandoc）直接输出Markdown的转换器用它包装输出，
+    Markdown/Quarto渲染器原样输出 text，其他渲染器渲染由 text 解析出的块节点 blocks。
+
+    :param text: 一段Markdown文本，由完整的行组成（最后一块除外）
+    :param blocks: 到这段文本为止已经完整的块节点，见 markdown_parser.MarkdownBlockParser
+    """
+    __slots__ = ('text', 'blocks')
+
+    def __init__(self, text, blocks=()):
+        self.text = text
+        self.blocks = tuple(blocks)
+
+def plain_text(spans):
+    """拼接 Span 的文字，不含样式"""
+    return "".join(span.text for span in spans)
+
+def iter_raw_markdown(chunks, break_kind='section'):
+    """
+    把转换器产出的Markdown块包装为节点流，Asset 原样保留。
+
+    文本按完整的行边解析边产出，每个 RawMarkdown 同时带有原文和解析出的标题、段落、列表、表格、图片等块节点。
+
+    :param break_kind: 分隔线（---）对应的 Boundary 类型，如幻灯片之间的分隔线为 "slide"
+    """
+    from markdown_parser import MarkdownBlockParser
+    parser = MarkdownBlockParser(break_kind)
+    pending = ''
+    for chunk in chunks:
+        if isinstance(chunk, Asset):
+            yield chunk
+            continue
+        if not chunk:
+            continue
+        pending += chunk
+        end = pending.rfind('\n') + 1
+        if end:
+            text, pending = pending[:end], pending[end:]
+            yield RawMarkdown(text, parser.feed(text))
+    blocks = parser.feed(pending) + parser.close()
+    if pending or blocks:
+        yield RawMarkdown(pending, blocks)
+
+def table_from_rows(data, has_header=True, row_limit=0):
+    """
+    由行的可迭代对象构建 Table 节点，行保持流式读取。
+
+    :param has_header: 是否将第一行视为表头，否则生成 Column 1, Column 2 ...
+    :param row_limit: 最多保留的数据行数，0为不限制
+    """
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
+        return Table([], ())
+    header = get_header(first_row, has_header)
+    if not has_header:
+        rows = chain([first_row], rows)
+    if row_limit:
+        rows = islice(rows, row_limit)
+    return Table(header, rows)
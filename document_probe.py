@@ -0,0 +1,169 @@
+import mmap
+import os
+import re
+import zipfile
+
+# 转换前的廉价探测：不做完整解析，只读取文件中现成的计数或部件大小，估计每个输入的工作量，
+# 供 batch_scheduler 按工作量从大到小排序。
+
+# 使用远程接口的任务（网页、TextIn PDF）放在 remote 通道，其他任务放在 local 通道
+REMOTE = 'remote'
+LOCAL = 'local'
+
+# 各类输入每个计量单位的粗略耗时（秒），只用于同一通道内比较大小
+COST_PER_UNIT = {
+    'pdf': 1.0,           # 每页
+    'url': 3.0,           # 每个网页
+    'xlsx': 2e-5,         # 每个单元格
+    'pptx': 0.2,          # 每张幻灯片
+    'pptx_media': 0.05,   # 每MB图片
+    'docx': 1e-5,         # word/document.xml 每字节
+    'tex': 2e-5,          # 每字节
+    'csv': 2e-7,          # 每字节
+}
+# 探测不到时按文件大小估计
+PDF_BYTES_PER_PAGE = 50 * 1024
+XLSX_BYTES_PER_CELL = 40
+DIMENSION_SCAN_SIZE = 64 * 1024
+
+PDF_COUNT = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b')
+PDF_PAGE = re.compile(rb'/Type\s*/Page\b(?!s)')
+DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z$0-9:]+)"')
+SLIDE_PART = re.compile(r'^ppt/slides/slide\d+\.xml$')
+OOXML_EXTENSIONS = ('.xlsx', '.docx', '.pptx')
+
+class Probe:
+    """
+    单个输入的探测结果。
+
+    :param kind: 输入类型，如 "pdf"、"xlsx"、"url"
+    :param lane: 调度通道，REMOTE 或 LOCAL
+    :param units: 探测到的数量（页数、单元格数、幻灯片数或字节数）
+    :param cost: 估计耗时（秒）
+    """
+    __slots__ = ('kind', 'lane', 'units', 'cost')
+
+    def __init__(self, kind, lane, units, cost):
+        self.kind = kind
+        self.lane = lane
+        self.units = units
+        self.cost = cost
+
+    def __repr__(self):
+        return f"Probe({self.kind}, {self.lane}, units={self.units}, cost={self.cost:.1f})"
+
+def probe(input_path, options=None):
+    """
+    估计一个输入的转换工作量，探测失败时按文件大小估计，不抛出异常。
+
+    :param input_path: 文件路径或URL
+    :param options: 转换选项，用于确定Excel选中的工作表和合并转换的链接数
+    """
+    options = options or {}
+    if '://' in input_path:
+        count = max(1, len(options.get('selected_links') or ()))
+        return Probe('url', REMOTE, count, count * COST_PER_UNIT['url'])
+
+    extension = os.path.splitext(input_path)[1].lower()
+    try:
+        size = os.path.getsize(input_path)
+    except OSError:
+        return Probe('missing', LOCAL, 0, 0.0)
+    try:
+        if extension == '.pdf':
+            pages = count_pdf_pages(input_path) or max(1, size // PDF_BYTES_PER_PAGE)
+            return Probe('pdf', REMOTE, pages, pages * COST_PER_UNIT['pdf'])
+        if extension == '.xlsx':
+            cells = count_xlsx_cells(input_path, options.get('selected_sheets'))
+            return Probe('xlsx', LOCAL, cells, cells * COST_PER_UNIT['xlsx'])
+        if extension == '.pptx':
+            slides, media_bytes = count_pptx_slides(input_path)
+            cost = slides * COST_PER_UNIT['pptx'] + media_bytes / (1024 * 1024) * COST_PER_UNIT['pptx_media']
+            return Probe('pptx', LOCAL, slides, cost)
+        if extension == '.docx':
+            part_size = get_part_size(input_path, 'word/document.xml')
+            return Probe('docx', LOCAL, part_size, part_size * COST_PER_UNIT['docx'])
+    except (OSError, zipfile.BadZipFile, ValueError):
+        pass
+    kind = extension.lstrip('.') or 'file'
+    lane = REMOTE if kind == 'pdf' else LOCAL
+    per_byte = COST_PER_UNIT['tex'] if kind == 'tex' else COST_PER_UNIT['csv']
+    return Probe(kind, lane, size, size * per_byte)
+
+def count_pdf_pages(path):
+    """
+    从页面树根节点的 /Count 读取页数，找不到时统计 /Type /Page 对象。
+
+    两者都在未压缩的对象中才能找到；页面树位于压缩对象流中时返回0，由调用方按大小估计。
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            counts = [int(a or b) for a, b in PDF_COUNT.findall(data)]
+            if counts:
+                return max(counts)
+            return sum(1 for _ in PDF_PAGE.finditer(data))
+
+def count_xlsx_cells(path, sheet_names=None):
+    """
+    读取各工作表开头的 <dimension ref="A1:F50000"/>，累加行数×列数。
+
+    没有该元素的工作表按其XML解压后的大小估计。
+    """
+    from excel2markdown import get_sheet_names, get_sheet_path, split_cell_reference
+    total = 0
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        for sheet_name in sheet_names or get_sheet_names(path):
+            sheet_path = get_sheet_path(archive, sheet_name)
+            if sheet_path not in names:
+                continue
+            with archive.open(sheet_path) as f:
+                match = DIMENSION.search(f.read(DIMENSION_SCAN_SIZE))
+            cells = 0
+            if match:
+                first, _, last = match.group(1).decode('ascii').partition(':')
+                first_col, first_row = split_cell_reference(first)
+                last_col, last_row = split_cell_reference(last or first)
+                if None not in (first_col, first_row, last_col, last_row):
+                    cells = (last_row - first_row + 1) * (last_col - first_col + 1)
+            total += cells or archive.getinfo(sheet_path).file_size // XLSX_BYTES_PER_CELL
+    return total
+
+def count_pptx_slides(path):
+    """幻灯片数量和图片等媒体文件的总大小，只读取压缩包目录"""
+    slides = 0
+    media_bytes = 0
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if SLIDE_PART.match(info.filename):
+                slides += 1
+            elif info.filename.startswith('ppt/media/'):
+                media_bytes += info.file_size
+    return slides, media_bytes
+
+def get_part_size(path, part_name):
+    """压缩包中某个部件解压后的大小"""
+    with zipfile.ZipFile(path) as archive:
+        return archive.getinfo(part_name).file_size
+
+def check_archive_sizes(path, max_part_size=0, max_total_size=0):
+    """
+    解析OOXML文件前检查压缩包中各部件解压后的大小（只读取压缩包目录），防止压缩炸弹耗尽内存或磁盘。
+
+    目录中登记的大小可以伪造，读取部件时的实际大小仍由 zipfile 按目录校验（超出即报错）。
+
+    :param max_part_size: 单个部件解压后的最大字节数，0为不限
+    :param max_total_size: 全部部件解压后的最大总字节数，0为不限
+    :raises ValueError: 超出限制时，错误信息中指明超出的限制
+    """
+    total = 0
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if max_part_size and info.file_size > max_part_size:
+                raise ValueError(f"部件 {info.filename} 解压后为 {info.file_size / (1024 * 1024):.0f} MB，"
+                                 f"超出单个部件大小限制（{max_part_size / (1024 * 1024):g} MB）")
+            total += info.file_size
+            if max_total_size and total > max_total_size:
+                raise ValueError(f"解压后的总大小超出限制（{max_total_size / (1024 * 1024):g} MB）")
@@ -0,0 +1,417 @@
+import json
+import os
+from itertools import tee
+from document_ir import (BOLD, ITALIC, CODE, STRIKE, Heading, Paragraph, ListItem, Table, CodeBlock, Image,
+                         Boundary, RawMarkdown, plain_text)
+from markdown_sink import Asset, MarkdownFileSink
+from markdown_table import EMPTY_TABLE, format_row
+
+# 中间文档表示（document_ir）的渲染器。每个渲染器把节点流渲染为文本块，
+# write_documents 只遍历一次节点流就能同时写出多种格式。
+
+class Renderer:
+    """
+    渲染器基类：按节点类型分派到对应方法，块与块之间自动插入空行。
+
+    子类实现 heading、paragraph、list_item、table、code_block、image、boundary、spans，
+    每个方法返回不带结尾空行的文本块的可迭代对象。
+    RawMarkdown 只有 keeps_markdown 为True的渲染器原样输出，其他渲染器渲染其中解析出的块节点。
+    """
+    name = None
+    extension = '.md'
+    keeps_markdown = False
+
+    def __init__(self):
+        self.last_chunk = None
+        self.last_node = None
+
+    def render(self, nodes):
+        """渲染整个节点流，Asset 原样产出"""
+        yield from self.begin()
+        for node in nodes:
+            if isinstance(node, Asset):
+                yield node
+            else:
+                yield from self.render_block(node)
+        yield from self.end()
+
+    def begin(self):
+        return ()
+
+    def end(self):
+        if self.last_chunk is not None and not self.last_chunk.endswith('\n'):
+            yield '\n'
+
+    def render_block(self, node):
+        """渲染单个节点，必要时在前面补足空行"""
+        if isinstance(node, RawMarkdown) and not self.keeps_markdown:
+            for block in node.blocks:
+                yield from self.render_block(block)
+            return
+        # 连续的 RawMarkdown 是同一段输出被切成的块，连续的列表项属于同一个列表，之间都不插入空行
+        separate = not (isinstance(node, (RawMarkdown, ListItem)) and type(node) is type(self.last_node))
+        self.last_node = node
+        for chunk in self.dispatch(node):
+            if not chunk:
+                continue
+            if separate and self.last_chunk is not None:
+                yield self.separator()
+            separate = False
+            self.last_chunk = chunk
+            yield chunk
+
+    def separator(self):
+        if self.last_chunk.endswith('\n\n'):
+            return ''
+        return '\n' if self.last_chunk.endswith('\n') else '\n\n'
+
+    def dispatch(self, node):
+        if isinstance(node, Paragraph):
+            return self.paragraph(node)
+        if isinstance(node, Heading):
+            return self.heading(node)
+        if isinstance(node, ListItem):
+            return self.list_item(node)
+        if isinstance(node, Table):
+            return self.table(node)
+        if isinstance(node, CodeBlock):
+            return self.code_block(node)
+        if isinstance(node, Image):
+            return self.image(node)
+        if isinstance(node, Boundary):
+            return self.boundary(node)
+        if isinstance(node, RawMarkdown):
+            return self.raw(node)
+        raise TypeError(f"未知的文档节点: {type(node).__name__}")
+
+    def raw(self, node):
+        return (node.text,)
+
+class MarkdownRenderer(Renderer):
+    """GitHub风格的Markdown"""
+    name = 'markdown'
+    extension = '.md'
+    keeps_markdown = True
+
+    def heading(self, node):
+        return ('#' * node.level + ' ' + self.spans(node.spans),)
+
+    def paragraph(self, node):
+        return (self.spans(node.spans),)
+
+    def list_item(self, node):
+        marker = '1.' if node.ordered else '-'
+        return ('  ' * node.level + marker + ' ' + self.spans(node.spans) + '\n',)
+
+    def table(self, node):
+        if not node.header:
+            yield EMPTY_TABLE
+            return
+        width = len(node.header)
+        yield format_row(node.header)
+        yield "|" + "|".join(["-" for _ in node.header]) + "|\n"
+        for row in node.rows:
+            yield format_row(row, width)
+
+    def code_block(self, node):
+        return (f'```{node.language}\n{node.text}\n```',)
+
+    def image(self, node):
+        if node.width:
+            return (f'<img src="{node.src}" alt="{node.alt}" style="max-width:{node.width}px;" />',)
+        return (f'![{node.alt}]({node.src})',)
+
+    def boundary(self, node):
+        parts = []
+        if node.kind in ('slide', 'section') and node.number > 1:
+            parts.append('---')
+        if node.title:
+            parts.append(f'## {node.title}')
+        return ('\n\n'.join(parts),)
+
+    def spans(self, spans):
+        parts = []
+        for span in spans:
+            text = span.text
+            if not text:
+                continue
+            if span.style & CODE:
+                text = f'`{text}`'
+            if span.style & STRIKE:
+                text = f'~~{text}~~'
+            if span.style & BOLD and span.style & ITALIC:
+                text = f'***{text}***'
+            elif span.style & BOLD:
+                text = f'**{text}**'
+            elif span.style & ITALIC:
+                text = f'*{text}*'
+            if span.href:
+                text = f'[{text}]({span.href})'
+            parts.append(text)
+        return ''.join(parts)
+
+class QuartoRenderer(MarkdownRenderer):
+    """Quarto（.qmd），在Markdown基础上加文档头，分页使用 pagebreak 短代码"""
+    name = 'qmd'
+    extension = '.qmd'
+
+    def begin(self):
+        yield '---\nformat: html\n---\n\n'
+
+    def boundary(self, node):
+        if node.kind == 'page' and node.number > 1:
+            return ('{{< pagebreak >}}',)
+        return super().boundary(node)
+
+class WikiRenderer(Renderer):
+    """TiddlyWiki 语法，与 pptx2md 的 --wiki 使用同一种Wiki方言"""
+    name = 'wiki'
+    extension = '.wiki'
+
+    def heading(self, node):
+        return ('!' * node.level + ' ' + self.spans(node.spans),)
+
+    def paragraph(self, node):
+        return (self.spans(node.spans),)
+
+    def list_item(self, node):
+        marker = '#' if node.ordered else '*'
+        return (marker * (node.level + 1) + ' ' + self.spans(node.spans) + '\n',)
+
+    def table(self, node):
+        if not node.header:
+            return
+        yield '|' + '|'.join(self.cell(value) for value in node.header) + '|h\n'
+        for row in node.rows:
+            yield '|' + '|'.join(self.cell(value) for value in row) + '|\n'
+
+    @staticmethod
+    def cell(value):
+        if not value:
+            return ''
+        return value.replace('|', '&#124;').replace('\r\n', '<br>').replace('\n', '<br>')
+
+    def code_block(self, node):
+        return (f'```{node.language}\n{node.text}\n```',)
+
+    def image(self, node):
+        if node.width:
+            return (f'<img src="{node.src}" width={node.width}px />',)
+        return (f'[img[{node.alt}|{node.src}]]' if node.alt else f'[img[{node.src}]]',)
+
+    def boundary(self, node):
+        parts = []
+        if node.kind in ('slide', 'section') and node.number > 1:
+            parts.append('---')
+        if node.title:
+            parts.append('!! ' + node.title)
+        return ('\n\n'.join(parts),)
+
+    def spans(self, spans):
+        parts = []
+        for span in spans:
+            text = span.text
+            if not text:
+                continue
+            if span.style & CODE:
+                text = f'`{text}`'
+            if span.style & STRIKE:
+                text = f'~~{text}~~'
+            if span.style & BOLD:
+                text = f"''{text}''"
+            if span.style & ITALIC:
+                text = f'//{text}//'
+            if span.href:
+                text = f'[[{text}|{span.href}]]'
+            parts.append(text)
+        return ''.join(parts)
+
+class PlainTextRenderer(Renderer):
+    """纯文本：去掉所有标记，表格用制表符分隔，分页使用换页符"""
+    name = 'text'
+    extension = '.txt'
+
+    def heading(self, node):
+        return (plain_text(node.spans),)
+
+    def paragraph(self, node):
+        return (plain_text(node.spans),)
+
+    def list_item(self, node):
+        return ('  ' * node.level + '- ' + plain_text(node.spans) + '\n',)
+
+    def table(self, node):
+        if not node.header:
+            return
+        yield self.row(node.header)
+        for row in node.rows:
+            yield self.row(row)
+
+    @staticmethod
+    def row(values):
+        return '\t'.join(value.replace('\t', ' ').replace('\r\n', ' ').replace('\n', ' ') for value in values) + '\n'
+
+    def code_block(self, node):
+        return (node.text,)
+
+    def image(self, node):
+        return (node.alt,)
+
+    def boundary(self, node):
+        parts = []
+        if node.number > 1 and node.kind in ('slide', 'page'):
+            parts.append('\f')
+        if node.title:
+            parts.append(node.title)
+        return ('\n'.join(parts),)
+
+class JsonRenderer(Renderer):
+    """
+    JSON：{"blocks": [...]}，每个块是一个带 type 字段的对象。
+
+    边渲染边输出，表格的行也逐行写出，不需要先在内存中构建整个文档。
+    """
+    name = 'json'
+    extension = '.json'
+
+    def begin(self):
+        yield '{"blocks": [\n'
+
+    def end(self):
+        yield '\n]}\n'
+
+    def render_block(self, node):
+        if isinstance(node, RawMarkdown):
+            for block in node.blocks:
+                yield from self.render_block(block)
+            return
+        first = self.last_chunk is None
+        for index, chunk in enumerate(self.dispatch(node)):
+            if index == 0 and not first:
+                chunk = ',\n' + chunk
+            self.last_chunk = chunk
+            yield chunk
+
+    def heading(self, node):
+        return (self.dumps({'type': 'heading', 'level': node.level, 'spans': self.spans(node.spans)}),)
+
+    def paragraph(self, node):
+        return (self.dumps({'type': 'paragraph', 'spans': self.spans(node.spans)}),)
+
+    def list_item(self, node):
+        return (self.dumps({'type': 'list_item', 'level': node.level, 'ordered': node.ordered,
+                            'spans': self.spans(node.spans)}),)
+
+    def table(self, node):
+        yield '{"type": "table", "header": ' + self.dumps(node.header) + ', "rows": ['
+        separator = ''
+        for row in node.rows:
+            yield separator + self.dumps(list(row))
+            separator = ', '
+        yield ']}'
+
+    def code_block(self, node):
+        return (self.dumps({'type': 'code', 'language': node.language, 'text': node.text}),)
+
+    def image(self, node):
+        return (self.dumps({'type': 'image', 'src': node.src, 'alt': node.alt, 'width': node.width}),)
+
+    def boundary(self, node):
+        return (self.dumps({'type': node.kind, 'number': node.number, 'title': node.title}),)
+
+    @staticmethod
+    def spans(spans):
+        result = []
+        for span in spans:
+            item = {'text': span.text}
+            styles = [name for flag, name in ((BOLD, 'bold'), (ITALIC, 'italic'), (CODE, 'code'), (STRIKE, 'strike'))
+                      if span.style & flag]
+            if styles:
+                item['style'] = styles
+            if span.href:
+                item['href'] = span.href
+            result.append(item)
+        return result
+
+    @staticmethod
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False)
+
+RENDERERS = {
+    'markdown': MarkdownRenderer,
+    'wiki': WikiRenderer,
+    'qmd': QuartoRenderer,
+    'text': PlainTextRenderer,
+    'json': JsonRenderer,
+}
+
+def get_renderer(name):
+    """按格式名创建渲染器"""
+    try:
+        return RENDERERS[name]()
+    except KeyError:
+        raise ValueError(f"不支持的输出格式: {name}")
+
+def render(nodes, renderer):
+    """用一个渲染器渲染节点流，结果可直接交给 markdown_sink.write_markdown"""
+    return renderer.render(nodes)
+
+def get_format_paths(output_path, formats):
+    """
+    各输出格式的文件路径：与 output_path 同名，扩展名取自渲染器。
+
+    :return: [(渲染器, 路径), ...]
+    """
+    base = os.path.splitext(output_path)[0]
+    targets = []
+    for name in formats:
+        renderer = get_renderer(name)
+        targets.append((renderer, base + renderer.extension))
+    return targets
+
+def write_documents(nodes, targets):
+    """
+    只遍历一次节点流，同时写出多种格式。
+
+    所有输出文件同名、共用同一个 <name>_img 资源目录，资源只写一次。
+    流式表格的行用 itertools.tee 分给各渲染器，并轮流推进，缓冲的行数保持很小。
+
+    :param targets: [(渲染器, 输出路径), ...]
+    :return: 输出路径列表
+    """
+    renderers = [renderer for renderer, _ in targets]
+    sinks = [MarkdownFileSink(path) for _, path in targets]
+    opened = []
+    try:
+        for sink in sinks:
+            sink.open()
+            opened.append(sink)
+        pump([renderer.begin() for renderer in renderers], sinks)
+        for node in nodes:
+            if isinstance(node, Asset):
+                sinks[0].write_asset(node)
+                continue
+            if isinstance(node, Table) and len(renderers) > 1:
+                copies = [Table(node.header, rows) for rows in tee(node.rows, len(renderers))]
+            else:
+                copies = [node] * len(renderers)
+            pump([renderer.render_block(copy) for renderer, copy in zip(renderers, copies)], sinks)
+        pump([renderer.end() for renderer in renderers], sinks)
+    except BaseException:
+        for sink in opened:
+            sink.abort()
+        raise
+    return [sink.commit() for sink in sinks]
+
+def pump(block_chunks, sinks):
+    """轮流从各渲染器取一块写入对应的文件，直到全部取完"""
+    iterators = [iter(chunks) for chunks in block_chunks]
+    active = list(zip(iterators, sinks))
+    while active:
+        remaining = []
+        for iterator, sink in active:
+            chunk = next(iterator, None)
+            if chunk is not None:
+                sink.write_chunk(chunk)
+                remaining.append((iterator, sink))
+        active = remaining
@@ -1,5 +1,9 @@
 from docx import Document
-import re
+from docx.table import Table as DocxTable
+from docx.text.hyperlink import Hyperlink
+from document_ir import BOLD, ITALIC, STRIKE, Span, Heading, Paragraph, ListItem, Table
+from document_renderers import MarkdownRenderer, render
+from markdown_sink import write_markdown
 
 def docx_to_markdown(input_path, output_path):
     """
@@ -8,47 +12,69 @@ def docx_to_markdown(input_path, output_path):
     :param input_path: Word文档的输入路径
     :param output_path: Markdown文件的输出路径
     """
-    doc = Document(input_path)
-    markdown_content = []
+    write_markdown(iter_docx_markdown(input_path), output_path)
+
+def iter_markdown(input_path, options):
+    """统一转换接口：逐块产出Word文档转换后的Markdown"""
+    return iter_docx_markdown(input_path)
 
-    for para in doc.paragraphs:
-        markdown_content.append(process_paragraph(para))
+def iter_docx_markdown(input_path):
+    """按文档顺序逐段落、逐表格产出Markdown块"""
+    return render(iter_docx_document(input_path), MarkdownRenderer())
 
-    # 处理表格
-    for table in doc.tables:
-        markdown_content.extend(process_table(table))
+def iter_document(input_path, options):
+    """中间文档接口：按文档顺序产出标题、段落、列表项和表格节点"""
+    return iter_docx_document(input_path)
 
-    # 写入Markdown文件
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(markdown_content))
+def iter_docx_document(input_path):
+    doc = Document(input_path)
+    for block in doc.iter_inner_content():
+        if isinstance(block, DocxTable):
+            yield process_table(block)
+        else:
+            node = process_paragraph(block)
+            if node is not None:
+                yield node
 
 def process_paragraph(para):
-    """处理段落,转换为Markdown格式"""
-    if para.style.name.startswith('Heading'):
-        level = int(para.style.name[-1])
-        return '#' * level + ' ' + para.text
-    else:
-        text = para.text
-        for run in para.runs:
-            if run.bold and run.italic:
-                text = re.sub(re.escape(run.text), f'***{run.text}***', text)
-            elif run.bold:
-                text = re.sub(re.escape(run.text), f'**{run.text}**', text)
-            elif run.italic:
-                text = re.sub(re.escape(run.text), f'*{run.text}*', text)
-        return text
+    """处理段落，转换为 Heading、ListItem 或 Paragraph 节点；空段落返回None"""
+    if not para.text.strip():
+        return None
+    style = para.style.name if para.style is not None else ''
+    if style.startswith('Heading') or style == 'Title':
+        level = int(style[-1]) if style[-1].isdigit() else 1
+        return Heading(level, [Span(para.text)])
+    spans = list(iter_spans(para))
+    if style.startswith('List'):
+        level = int(style[-1]) - 1 if style[-1].isdigit() else 0
+        return ListItem(spans, level, ordered='Number' in style)
+    return Paragraph(spans)
+
+def iter_spans(para):
+    """段落中的文字片段，保留加粗、斜体、删除线和超链接"""
+    for item in para.iter_inner_content():
+        if isinstance(item, Hyperlink):
+            for run in item.runs:
+                yield Span(run.text, get_run_style(run), item.url or None)
+        elif item.text:
+            yield Span(item.text, get_run_style(item))
+
+def get_run_style(run):
+    style = 0
+    if run.bold:
+        style |= BOLD
+    if run.italic:
+        style |= ITALIC
+    if run.font.strike:
+        style |= STRIKE
+    return style
 
 def process_table(table):
-    """处理表格,转换为Markdown格式"""
-    markdown_table = []
-    for i, row in enumerate(table.rows):
-        cells = [cell.text.replace('\n', ' ') for cell in row.cells]
-        markdown_row = '|' + '|'.join(cells) + '|'
-        markdown_table.append(markdown_row)
-        if i == 0:
-            markdown_table.append('|' + '|'.join(['---' for _ in row.cells]) + '|')
-    markdown_table.append('')  # 添加空行
-    return markdown_table
+    """处理表格，第一行作为表头"""
+    rows = [[cell.text for cell in row.cells] for row in table.rows]
+    if not rows:
+        return Table([], ())
+    return Table(rows[0], rows[1:])
 
 # 使用示例
 if __name__ == "__main__":
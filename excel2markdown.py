@@ -1,34 +1,27 @@
 import os
+import posixpath
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 import xml.dom.minidom
-import shutil
-from PyQt6.QtWidgets import QTreeWidgetItem
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
-
-def update_excel_sheets_tree(excel_sheets_tree, filenames):
-    excel_sheets_tree.clear()
-    for filename in filenames:
-        if filename.lower().endswith('.xlsx'):
-            file_item = QTreeWidgetItem(excel_sheets_tree)
-            file_item.setText(0, os.path.basename(filename))
-            file_item.setData(0, Qt.ItemDataRole.UserRole, filename)
-            try:
-                with zipfile.ZipFile(filename, 'r') as zip_ref:
-                    with zip_ref.open('xl/workbook.xml') as f:
-                        workbook = xml.dom.minidom.parse(f)
-                        sheets = workbook.getElementsByTagName('sheet')
-                        for sheet in sheets:
-                            sheet_name = sheet.getAttribute('name')
-                            sheet_item = QTreeWidgetItem(file_item)
-                            sheet_item.setText(0, sheet_name)
-                            sheet_item.setData(0, Qt.ItemDataRole.UserRole, sheet_name)
-                            sheet_item.setForeground(0, QColor(0, 0, 0))  # 黑色文本
-            except Exception as e:
-                print(f"无法读取Excel工作表: {str(e)}")
-    excel_sheets_tree.expandAll()
-
-def excel_to_markdown(file_path, output_path, sheet_name, has_header=True):
+from xml.etree import ElementTree
+from cell_formats import read_cell_styles
+from markdown_table import iter_markdown_table, write_markdown_tables
+from shared_strings import SharedStringTable, MappedSharedStringTable, read_shared_strings_xml
+
+# <dimension> 给出的列数超过该值（如整表范围 A1:XFD1048576）时不采用，改为扫描实际用到的列
+MAX_DIMENSION_COLUMNS = 1024
+
+def get_sheet_names(file_path):
+    """读取Excel文件中所有工作表的名称"""
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        with zip_ref.open('xl/workbook.xml') as f:
+            workbook = xml.dom.minidom.parse(f)
+            return [sheet.getAttribute('name') for sheet in workbook.getElementsByTagName('sheet')]
+
+def excel_to_markdown(file_path, output_path, sheet_name, has_header=True, selection=None,
+                      split_rows=0, row_limit=0):
     """
     将Excel文件转换为Markdown格式的表格。
 
@@ -36,100 +29,400 @@ def excel_to_markdown(file_path, output_path, sheet_name, has_header=True):
     :param output_path: 输出Markdown文件路径
     :param sheet_name: 要转换的工作表名称
     :param has_header: 是否将第一行视为表头
+    :param selection: 可选的 SheetSelection，限定转换的单元格范围和列
+    :param split_rows: 每个文件最多包含的数据行数，0为不拆分
+    :param row_limit: 最多转换的数据行数，0为不限制，读够后停止解析
+    :return: 写出的Markdown文件路径列表
     """
-    temp_dir = 'temp_excel_data'
-    
-    try:
-        # 解压Excel文件
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
+    rows = read_excel_rows(file_path, sheet_name, selection, max_rows=get_max_rows(row_limit, has_header))
+    outputs = write_markdown_tables(rows, has_header, output_path, split_rows, row_limit)
+    for output in outputs:
+        print(f"Markdown文件已生成: {output}")
+    return outputs
+
+def get_max_rows(row_limit, has_header):
+    """数据行数限制换算为需要读取的总行数（含表头）"""
+    if not row_limit:
+        return None
+    return row_limit + 1 if has_header else row_limit
+
+def iter_markdown(input_path, options):
+    """统一转换接口：逐行产出 options['sheet_name'] 工作表的Markdown表格"""
+    return iter_excel_markdown(input_path, options['sheet_name'], options.get('has_header', True),
+                               SheetSelection.from_options(options))
+
+def iter_document(input_path, options):
+    """中间文档接口：产出 options['sheet_name'] 工作表的 Table 节点，行保持流式读取"""
+    from document_ir import table_from_rows
+    has_header = options.get('has_header', True)
+    row_limit = options.get('row_limit', 0)
+    rows = read_excel_rows(input_path, options['sheet_name'], SheetSelection.from_options(options),
+                           max_rows=get_max_rows(row_limit, has_header))
+    yield table_from_rows(rows, has_header, row_limit)
 
+def iter_excel_markdown(file_path, sheet_name, has_header=True, selection=None, strings=None):
+    """
+    逐行产出工作表的Markdown表格。
+
+    :param strings: 可选，已读取的共享字符串表；为None时从文件读取
+    """
+    # 生成Markdown表格
+    yield from iter_markdown_table(read_excel_rows(file_path, sheet_name, selection, strings), has_header)
+
+def read_excel_rows(file_path, sheet_name, selection=None, strings=None, max_rows=None):
+    """
+    读取工作表中选中的行。
+
+    返回逐行产出的迭代器，压缩包和自行读取的共享字符串在行读完后关闭。
+
+    :param strings: 可选，已读取的共享字符串表；为None时从文件读取
+    :param max_rows: 最多读取的行数，为None时不限制
+    """
+    # 直接从压缩包中流式读取，不解压整个文件
+    archive = zipfile.ZipFile(file_path, 'r')
+    owns_strings = strings is None
+    try:
         # 读取共享字符串
-        strings = read_shared_strings(temp_dir)
+        if owns_strings:
+            strings = read_shared_strings(archive)
+
+        # 样式中的数字格式只编译一次，逐个单元格按样式序号查表
+        styles = read_cell_styles(archive)
 
         # 读取工作表数据
-        sheet_data = read_sheet_data(temp_dir, sheet_name, strings)
+        rows = read_sheet_data(archive, sheet_name, strings, selection, max_rows, styles)
+    except Exception:
+        if owns_strings and strings is not None:
+            strings.close()
+        archive.close()
+        raise
+    return close_after(rows, archive, strings if owns_strings else None)
 
-        # 生成Markdown表格
-        markdown_table = generate_markdown_table(sheet_data, has_header)
+def close_after(rows, archive, strings=None):
+    """产出全部行后关闭压缩包和共享字符串表"""
+    try:
+        yield from rows
+    finally:
+        if strings is not None:
+            strings.close()
+        archive.close()
+
+def convert_sheets_parallel(file_path, sheets, has_header=True, selection=None, max_workers=None,
+                            split_rows=0, row_limit=0):
+    """
+    在多个子进程中并行转换工作表。
 
-        # 写入Markdown文件
-        with open(output_path, 'w', encoding='utf-8') as md_file:
-            md_file.write(markdown_table)
+    共享字符串只在主进程解析一次，写成紧凑的索引文件后由各子进程以内存映射方式只读共享。
 
-        print(f"Markdown文件已生成: {output_path}")
+    :param file_path: Excel文件路径
+    :param sheets: [(工作表名称, 输出Markdown文件路径), ...]
+    :param has_header: 是否将第一行视为表头
+    :param selection: 可选的 SheetSelection
+    :param max_workers: 最大进程数，默认为CPU核数
+    :param split_rows: 每个文件最多包含的数据行数，0为不拆分
+    :param row_limit: 最多转换的数据行数，0为不限制
+    :return: 与 sheets 顺序一致的 [(工作表名称, 输出路径列表, 错误)]，成功时错误为None
+    """
+    temp_dir = tempfile.mkdtemp(prefix='temp_excel_data')
+    try:
+        with zipfile.ZipFile(file_path, 'r') as archive:
+            strings = read_shared_strings(archive, spill_dir=temp_dir)
+        if isinstance(strings, MappedSharedStringTable):
+            # 已经转存到磁盘，直接共享该文件，由下面的临时目录清理
+            strings_path = strings.path
+            strings.delete = False
+        else:
+            strings_path = strings.save(os.path.join(temp_dir, 'sharedStrings.bin'))
+        strings.close()
 
+        workers = min(len(sheets), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(convert_sheet_job, file_path, sheet_name, output_path,
+                                       has_header, selection, strings_path, split_rows, row_limit)
+                       for sheet_name, output_path in sheets]
+            results = []
+            for (sheet_name, output_path), future in zip(sheets, futures):
+                try:
+                    outputs = future.result()
+                    for output in outputs:
+                        print(f"Markdown文件已生成: {output}")
+                    results.append((sheet_name, outputs, None))
+                except Exception as e:
+                    results.append((sheet_name, [], e))
+        return results
     finally:
-        # 清理临时文件
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-
-def read_shared_strings(temp_dir):
-    """读取共享字符串"""
-    strings = []
-    shared_strings_path = os.path.join(temp_dir, "xl", "sharedStrings.xml")
-    if os.path.exists(shared_strings_path):
-        with open(shared_strings_path, 'r', encoding='utf-8') as data:
-            dom = xml.dom.minidom.parse(data)
-            for string in dom.getElementsByTagName('t'):
-                strings.append(string.childNodes[0].nodeValue)
-    return strings
-
-def read_sheet_data(temp_dir, sheet_name, strings):
-    """读取指定工作表的数据"""
-    sheet_id = get_sheet_id(temp_dir, sheet_name)
-    if sheet_id is None:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def convert_sheet_job(file_path, sheet_name, output_path, has_header, selection, strings_path,
+                      split_rows=0, row_limit=0):
+    """子进程中转换单个工作表，返回写出的文件路径列表"""
+    strings = MappedSharedStringTable(strings_path)
+    try:
+        rows = read_excel_rows(file_path, sheet_name, selection, strings, get_max_rows(row_limit, has_header))
+        return write_markdown_tables(rows, has_header, output_path, split_rows, row_limit)
+    finally:
+        strings.close()
+
+def column_index(letters):
+    """列字母转为从1开始的列号，如 "A" -> 1, "AB" -> 28"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index
+
+def column_letter(index):
+    """从1开始的列号转为列字母"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def split_cell_reference(reference):
+    """把 "AB12" 拆分为 (列号, 行号)，缺少的部分为None"""
+    reference = reference.strip().replace('$', '')
+    letters = reference.rstrip('0123456789')
+    digits = reference[len(letters):]
+    return (column_index(letters) if letters else None, int(digits) if digits else None)
+
+class SheetSelection:
+    """
+    工作表的单元格选择：范围、列投影以及是否跳过空行空列。
+
+    :param cell_range: 单元格范围，如 "A1:F50000"、"B:D"（整列）或 "1:1000"（整行）
+    :param columns: 只保留的列，如 "A,C:E" 或 ["A", "C"]
+    :param skip_empty_rows: 是否跳过所有选中单元格都为空的行
+    :param skip_empty_columns: 是否跳过所有行都为空的列
+    """
+
+    def __init__(self, cell_range=None, columns=None, skip_empty_rows=False, skip_empty_columns=False):
+        self.min_row = self.max_row = self.min_col = self.max_col = None
+        if cell_range:
+            start, _, end = cell_range.partition(':')
+            self.min_col, self.min_row = split_cell_reference(start)
+            self.max_col, self.max_row = split_cell_reference(end or start)
+        self.columns = self.parse_columns(columns) if columns else None
+        if self.columns is not None:
+            self.columns = sorted(c for c in self.columns if self.column_in_range(c))
+        self.skip_empty_rows = skip_empty_rows
+        self.skip_empty_columns = skip_empty_columns
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(options.get('cell_range'), options.get('columns'),
+                   options.get('skip_empty_rows', False), options.get('skip_empty_columns', False))
+
+    @staticmethod
+    def parse_columns(columns):
+        """解析列列表，支持 "A,C:E" 形式的字符串或列字母列表"""
+        if isinstance(columns, str):
+            columns = columns.split(',')
+        result = set()
+        for part in columns:
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition(':')
+            first, last = column_index(start.strip()), column_index((end or start).strip())
+            result.update(range(min(first, last), max(first, last) + 1))
+        return result
+
+    def column_in_range(self, col):
+        return (self.min_col is None or col >= self.min_col) and (self.max_col is None or col <= self.max_col)
+
+    def row_in_range(self, row):
+        return self.min_row is None or row >= self.min_row
+
+    def past_last_row(self, row):
+        return self.max_row is not None and row > self.max_row
+
+    def wants_column(self, col):
+        if self.columns is not None:
+            return col in self.columns
+        return self.column_in_range(col)
+
+    def output_columns(self, max_seen):
+        """输出表格包含的列号列表"""
+        if self.columns is not None:
+            return self.columns
+        first = self.min_col or 1
+        last = self.max_col if self.max_col is not None else max_seen
+        return list(range(first, last + 1))
+
+def read_shared_strings(archive, spill_dir=None):
+    """
+    读取共享字符串。
+
+    返回紧凑的字符串表；字符串很多时会转存到磁盘并以内存映射方式访问，用完后需调用 close()。
+    """
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return SharedStringTable()
+    with archive.open("xl/sharedStrings.xml") as data:
+        return read_shared_strings_xml(data, spill_dir=spill_dir)
+
+def read_sheet_data(archive, sheet_name, strings, selection=None, max_rows=None, styles=None):
+    """
+    读取指定工作表的数据，返回逐行产出的迭代器。
+
+    单元格按其引用（r属性）放到对应列，稀疏行不会错位；
+    未选中的单元格直接跳过，超过选择范围的最后一行或读满 max_rows 行后立即停止解析。
+    输出列数优先取自选择范围或工作表的 <dimension>；两者都没有，或需要跳过空列时，
+    先完整扫描一遍工作表确定输出的列，再第二遍逐行产出，行本身不会缓存在内存中。
+
+    :param styles: 可选，cell_formats.CellStyles，数值按单元格的数字格式显示；为None时保留原始值
+    """
+    sheet_path = get_sheet_path(archive, sheet_name)
+    if sheet_path is None:
         raise ValueError(f"找不到工作表: {sheet_name}")
 
-    sheet_path = os.path.join(temp_dir, f"xl/worksheets/sheet{sheet_id}.xml")
-    result = []
-    if os.path.exists(sheet_path):
-        with open(sheet_path, 'r', encoding='utf-8') as data:
-            dom = xml.dom.minidom.parse(data)
-            for row in dom.getElementsByTagName('row'):
-                row_data = []
-                for cell in row.getElementsByTagName('c'):
-                    value = get_cell_value(cell, strings)
-                    row_data.append(value)
-                result.append(row_data)
-    return result
-
-def get_sheet_id(temp_dir, sheet_name):
-    """获取工作表ID"""
-    workbook_path = os.path.join(temp_dir, "xl", "workbook.xml")
-    with open(workbook_path, 'r', encoding='utf-8') as f:
-        workbook = xml.dom.minidom.parse(f)
-        sheets = workbook.getElementsByTagName('sheet')
-        for sheet in sheets:
-            if sheet.getAttribute('name') == sheet_name:
-                return sheet.getAttribute('r:id').replace('rId', '')
-    return None
+    selection = selection or SheetSelection()
+    if sheet_path not in archive.namelist():
+        return iter(())
 
-def get_cell_value(cell, strings):
-    """获取单元格的值"""
-    if cell.getAttribute('t') == 's':
-        shared_string_index = int(cell.getElementsByTagName('v')[0].childNodes[0].nodeValue)
-        return strings[shared_string_index]
-    elif cell.getElementsByTagName('v'):
-        return cell.getElementsByTagName('v')[0].childNodes[0].nodeValue
-    return ''
-
-def generate_markdown_table(data, has_header):
-    """生成Markdown格式的表格"""
-    if not data:
-        return "| 空表格 |\n|-|\n"
-
-    markdown_table = ""
-    if has_header:
-        markdown_table += "|" + "|".join(data[0]) + "|\n"
-        markdown_table += "|" + "|".join(["-" for _ in data[0]]) + "|\n"
-        start_row = 1
+    if selection.columns is not None or selection.max_col is not None:
+        columns = selection.output_columns(0)
     else:
-        markdown_table += "|" + "|".join([f"Column {i+1}" for i in range(len(data[0]))]) + "|\n"
-        markdown_table += "|" + "|".join(["-" for _ in data[0]]) + "|\n"
-        start_row = 0
+        last_col = read_sheet_dimension(archive, sheet_path)
+        columns = selection.output_columns(last_col) if last_col else None
+    if columns is None or selection.skip_empty_columns:
+        # 第一遍：只统计列，不保留行
+        max_seen = 0
+        filled = set()
+        for cells in iter_selected_rows(archive, sheet_path, strings, selection, max_rows, styles):
+            if cells:
+                max_seen = max(max_seen, max(cells))
+            if selection.skip_empty_columns:
+                filled.update(col for col, value in cells.items() if value)
+        if columns is None:
+            columns = selection.output_columns(max_seen)
+        if selection.skip_empty_columns:
+            columns = [col for col in columns if col in filled]
+
+    return ([cells.get(col, '') for col in columns]
+            for cells in iter_selected_rows(archive, sheet_path, strings, selection, max_rows, styles))
+
+def iter_selected_rows(archive, sheet_path, strings, selection, max_rows=None, styles=None):
+    """逐行产出选中的 {列号: 值}，按需跳过空行，读满 max_rows 行后停止"""
+    count = 0
+    with archive.open(sheet_path) as data:
+        for row_number, cells in iter_sheet_rows(data, strings, selection, styles):
+            if selection.skip_empty_rows and not any(cells.values()):
+                continue
+            yield cells
+            count += 1
+            if max_rows is not None and count >= max_rows:
+                return
 
-    for row in data[start_row:]:
-        markdown_table += "|" + "|".join(row) + "|\n"
+def read_sheet_dimension(archive, sheet_path):
+    """
+    读取工作表 <dimension ref="A1:F100"> 中的最后一列。
+
+    只解析 <sheetData> 之前的部分；没有该元素、只有单个单元格或列数不合理时返回None，由调用方扫描确定。
+    """
+    with archive.open(sheet_path) as data:
+        for event, element in ElementTree.iterparse(data, events=('start',)):
+            tag = element.tag.rpartition('}')[2]
+            if tag == 'dimension':
+                _, separator, end = element.get('ref', '').partition(':')
+                if not separator:
+                    # 有的写入程序不维护该元素，一律写 "A1"
+                    return None
+                last_col = split_cell_reference(end)[0]
+                return last_col if last_col and 0 < last_col <= MAX_DIMENSION_COLUMNS else None
+            if tag == 'sheetData':
+                return None
+    return None
+
+def iter_sheet_rows(data, strings, selection, styles=None):
+    """流式解析工作表XML，逐行产出 (行号, {列号: 值})"""
+    row_number = 0
+    sheet_data = None
+    cells = None
+    col = 0
+    for event, element in ElementTree.iterparse(data, events=('start', 'end')):
+        tag = element.tag.rpartition('}')[2]
+        if event == 'start':
+            if tag == 'row':
+                reference = element.get('r')
+                row_number = int(reference) if reference else row_number + 1
+                if selection.past_last_row(row_number):
+                    return
+                cells = {} if selection.row_in_range(row_number) else None
+                col = 0
+            elif tag == 'sheetData':
+                sheet_data = element
+            continue
+        if tag == 'c' and cells is not None:
+            reference = element.get('r')
+            col = split_cell_reference(reference)[0] if reference else col + 1
+            if selection.wants_column(col):
+                cells[col] = get_cell_value(element, strings, styles)
+        elif tag == 'c':
+            col += 1
+        elif tag == 'row':
+            if cells is not None:
+                yield row_number, cells
+            # 释放已处理的行，保持内存占用稳定
+            if sheet_data is not None:
+                sheet_data.clear()
+
+def get_sheet_path(archive, sheet_name):
+    """通过workbook.xml及其关系文件找到工作表在压缩包中的路径"""
+    with archive.open("xl/workbook.xml") as f:
+        workbook = xml.dom.minidom.parse(f)
+    relation_id = None
+    for sheet in workbook.getElementsByTagName('sheet'):
+        if sheet.getAttribute('name') == sheet_name:
+            relation_id = sheet.getAttribute('r:id')
+            break
+    if relation_id is None:
+        return None
+
+    if "xl/_rels/workbook.xml.rels" in archive.namelist():
+        with archive.open("xl/_rels/workbook.xml.rels") as f:
+            relations = xml.dom.minidom.parse(f)
+        for relation in relations.getElementsByTagName('Relationship'):
+            if relation.getAttribute('Id') == relation_id:
+                target = relation.getAttribute('Target')
+                if target.startswith('/'):
+                    return target.lstrip('/')
+                return posixpath.normpath(posixpath.join('xl', target))
+    return f"xl/worksheets/sheet{relation_id.replace('rId', '')}.xml"
+
+def get_cell_value(cell, strings, styles=None):
+    """
+    获取单元格显示的值：共享字符串和内联字符串取其文字，布尔值为 TRUE/FALSE，错误值（如 #N/A）原样保留，
+    数值按样式的数字格式显示（日期、百分比、千位分隔符等）。
+
+    :param styles: 可选，cell_formats.CellStyles；为None时数值保留原始值
+    """
+    # 子元素与单元格同命名空间（兼容Strict OOXML）
+    namespace = cell.tag[:-1]
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return get_inline_string(cell, namespace)
+    value = cell.find(namespace + 'v')
+    if value is None or value.text is None:
+        return ''
+    if cell_type == 's':
+        return strings[int(value.text)]
+    if cell_type == 'b':
+        return 'TRUE' if value.text.strip() == '1' else 'FALSE'
+    if cell_type in ('e', 'str', 'd') or styles is None:
+        return value.text
+    return styles.format(cell.get('s'), value.text)
 
-    return markdown_table
\ No newline at end of file
+def get_inline_string(cell, namespace):
+    """内联字符串 <is> 的文字，富文本各段依次拼接，不含注音"""
+    inline = cell.find(namespace + 'is')
+    if inline is None:
+        return ''
+    parts = []
+    for child in inline:
+        if child.tag == namespace + 't':
+            parts.append(child.text or '')
+        elif child.tag == namespace + 'r':
+            text = child.find(namespace + 't')
+            if text is not None:
+                parts.append(text.text or '')
+    return ''.join(parts)
@@ -1,11 +1,12 @@
-from PyQt6.QtWidgets import QFileDialog
 import os
 
-def browse_files(parent, file_types="所有文件 (*);;PDF文件 (*.pdf);;Excel文件 (*.xlsx);;Word文件 (*.docx);;PowerPoint文件 (*.pptx);;LaTeX (*.tex);;Markdown文件 (*.md)"):
+def browse_files(parent, file_types="所有文件 (*);;PDF文件 (*.pdf);;Excel文件 (*.xlsx);;CSV/TSV文件 (*.csv *.tsv);;Word文件 (*.docx);;PowerPoint文件 (*.pptx);;LaTeX (*.tex);;Markdown文件 (*.md);;归档 (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz)"):
+    from PyQt6.QtWidgets import QFileDialog
     filenames, _ = QFileDialog.getOpenFileNames(parent, "选择文件", "", file_types)
     return filenames
 
 def browse_output_directory(parent):
+    from PyQt6.QtWidgets import QFileDialog
     directory = QFileDialog.getExistingDirectory(parent, "选择输出目录")
     return directory
 
@@ -0,0 +1,564 @@
+import os
+import re
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QPushButton, QLabel,
+                             QListView, QTreeView, QAbstractItemView)
+from PyQt6.QtCore import (Qt, QObject, pyqtSignal, QRunnable, QTimer, QAbstractListModel, QAbstractItemModel,
+                          QModelIndex)
+from PyQt6.QtGui import QColor
+
+# 可筛选的大列表：网页链接、Excel文件和工作表、待合并的Markdown文件。
+# 数据放在 model 中，视图只绘制可见的行，上万个链接也不会为每一项创建控件；
+# 行按批（FETCH_BATCH）暴露给视图，滚动到末尾时再加入下一批。
+# 选中状态以键（URL、文件路径、(文件, 工作表)）保存在 model 中，与筛选无关，
+# 被筛选隐藏的项保持选中，"选择全部筛选结果"作用于所有匹配项而不只是已显示的行。
+# 筛选在后台线程中进行，输入停顿 FILTER_DELAY 毫秒后开始，过时的筛选结果被丢弃。
+
+FETCH_BATCH = 1000
+FILTER_DELAY = 200
+# 每读取这么多个Excel文件的工作表名称，向工作表树加入一批
+SHEET_BATCH = 50
+SELECTED_BACKGROUND = QColor(0x3A, 0x77, 0x34)
+SELECTED_FOREGROUND = QColor(255, 255, 255)
+
+def compile_filter(text, use_regex=False):
+    """
+    把筛选文本编译为判断函数，不区分大小写。
+
+    :param use_regex: 按正则表达式匹配，否则按子串匹配
+    :raises re.error: 正则表达式无效时
+    """
+    if use_regex:
+        return re.compile(text, re.IGNORECASE).search
+    text = text.casefold()
+    return lambda value: text in value.casefold()
+
+class FilterSignals(QObject):
+    # (筛选序号, 筛选结果, 参与筛选的项数)
+    finished = pyqtSignal(int, object, int)
+
+class FilterWorker(QRunnable):
+    """
+    在后台线程中对 model 的快照执行筛选。
+
+    :param generation: 筛选序号，用于丢弃过时的结果
+    :param snapshot: model.get_snapshot() 的返回值
+    :param match: model.match，(快照, 判断函数) -> 筛选结果
+    :param predicate: compile_filter 的返回值
+    """
+
+    def __init__(self, generation, snapshot, match, predicate):
+        super().__init__()
+        self.generation = generation
+        self.snapshot = snapshot
+        self.match = match
+        self.predicate = predicate
+        self.signals = FilterSignals()
+
+    def run(self):
+        result = self.match(self.snapshot, self.predicate)
+        self.signals.finished.emit(self.generation, result, len(self.snapshot))
+
+class SelectableListModel(QAbstractListModel):
+    """
+    可勾选、可筛选的列表，每一项为 (显示文本, 键)，按键记录选中状态。
+
+    筛选同时匹配显示文本和键（如标题和URL）。
+    """
+    selection_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        # 通过筛选的项在 items 中的位置
+        self.visible = []
+        # 已暴露给视图的行数
+        self.loaded = 0
+        self.checked = set()
+        self.predicate = None
+
+    @staticmethod
+    def match(items, predicate, offset=0):
+        return [offset + i for i, (text, key) in enumerate(items) if predicate(text) or predicate(key)]
+
+    def get_snapshot(self):
+        return list(self.items)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.visible)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self.visible) - self.loaded)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+            self.loaded += count
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        text, key = self.items[self.visible[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role in (Qt.ItemDataRole.UserRole, Qt.ItemDataRole.ToolTipRole):
+            return key
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if key in self.checked else Qt.CheckState.Unchecked
+        if key in self.checked:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return SELECTED_BACKGROUND
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return SELECTED_FOREGROUND
+        return None
+
+    def toggle(self, index):
+        """切换一行的选中状态"""
+        if not index.isValid():
+            return
+        key = self.items[self.visible[index.row()]][1]
+        if key in self.checked:
+            self.checked.discard(key)
+        else:
+            self.checked.add(key)
+        self.dataChanged.emit(index, index)
+        self.selection_changed.emit(len(self.checked))
+
+    def set_items(self, items):
+        """替换全部项，清除选中状态和筛选结果"""
+        self.beginResetModel()
+        self.items = list(items)
+        self.checked = set()
+        self.predicate = None
+        self.visible = list(range(len(self.items)))
+        self.loaded = min(FETCH_BATCH, len(self.visible))
+        self.endResetModel()
+        self.selection_changed.emit(0)
+
+    def apply_filter(self, predicate, result, count):
+        """
+        显示筛选结果。
+
+        :param predicate: 判断函数，为None时显示全部项
+        :param result: 对前 count 项的筛选结果，筛选期间新加入的项在这里补充筛选
+        """
+        self.beginResetModel()
+        self.predicate = predicate
+        if predicate is None:
+            self.visible = list(range(len(self.items)))
+        else:
+            self.visible = result + self.match(self.items[count:], predicate, count)
+        self.loaded = min(FETCH_BATCH, len(self.visible))
+        self.endResetModel()
+
+    def set_visible_checked(self, checked):
+        """选中或取消所有通过筛选的项，包括尚未显示的行"""
+        keys = (self.items[i][1] for i in self.visible)
+        if checked:
+            self.checked.update(keys)
+        else:
+            self.checked.difference_update(keys)
+        if self.loaded:
+            self.dataChanged.emit(self.index(0), self.index(self.loaded - 1))
+        self.selection_changed.emit(len(self.checked))
+
+    def get_checked_keys(self):
+        """按列表顺序返回选中项的键，包括被筛选隐藏的项"""
+        return [key for text, key in self.items if key in self.checked]
+
+    def visible_count(self):
+        return len(self.visible)
+
+    def total_count(self):
+        return len(self.items)
+
+class WorkbookNode:
+    """工作表树中一个Excel文件的可见部分"""
+    __slots__ = ('file_index', 'row', 'sheets')
+
+    def __init__(self, file_index, row, sheets):
+        self.file_index = file_index
+        self.row = row
+        # 通过筛选的工作表在该文件工作表列表中的位置
+        self.sheets = sheets
+
+class SheetTreeModel(QAbstractItemModel):
+    """
+    两级的 Excel文件 -> 工作表 树，按 (文件路径, 工作表名称) 记录选中状态。
+
+    文件名匹配筛选条件时显示其全部工作表，否则只显示匹配的工作表；勾选文件行选中或取消其全部可见工作表。
+    """
+    selection_changed = pyqtSignal(int)
+
+    def __init__(self, header="", parent=None):
+        super().__init__(parent)
+        self.header = header
+        # [(文件路径, [工作表名称, ...]), ...]
+        self.files = []
+        self.nodes = []
+        self.loaded = 0
+        self.checked = set()
+        self.predicate = None
+
+    @staticmethod
+    def match(files, predicate, offset=0):
+        result = []
+        for i, (filename, sheet_names) in enumerate(files):
+            if predicate(os.path.basename(filename)):
+                result.append((offset + i, list(range(len(sheet_names)))))
+                continue
+            sheets = [j for j, name in enumerate(sheet_names) if predicate(name)]
+            if sheets:
+                result.append((offset + i, sheets))
+        return result
+
+    def get_snapshot(self):
+        return list(self.files)
+
+    def build_nodes(self, matches):
+        start = len(self.nodes)
+        return [WorkbookNode(file_index, start + row, sheets) for row, (file_index, sheets) in enumerate(matches)]
+
+    def all_matches(self, start=0):
+        return [(i, list(range(len(self.files[i][1])))) for i in range(start, len(self.files))]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            # 工作表行的 internalPointer 为所属文件的节点
+            return self.createIndex(row, column, self.nodes[parent.row()])
+        return self.createIndex(row, column, None)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self.loaded
+        if parent.internalPointer() is None:
+            return len(self.nodes[parent.row()].sheets)
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.nodes)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self.nodes) - self.loaded)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+            self.loaded += count
+            self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.header
+        return None
+
+    def get_keys(self, index):
+        """一行对应的 (文件路径, 工作表名称) 列表：工作表行为其本身，文件行为其全部可见工作表"""
+        node = index.internalPointer()
+        if node is None:
+            node = self.nodes[index.row()]
+            filename, sheet_names = self.files[node.file_index]
+            return [(filename, sheet_names[j]) for j in node.sheets]
+        filename, sheet_names = self.files[node.file_index]
+        return [(filename, sheet_names[node.sheets[index.row()]])]
+
+    def get_check_state(self, index):
+        keys = self.get_keys(index)
+        count = sum(1 for key in keys if key in self.checked)
+        if keys and count == len(keys):
+            return Qt.CheckState.Checked
+        return Qt.CheckState.PartiallyChecked if count else Qt.CheckState.Unchecked
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.UserRole, Qt.ItemDataRole.ToolTipRole):
+            if node is None:
+                filename = self.files[self.nodes[index.row()].file_index][0]
+                return os.path.basename(filename) if role == Qt.ItemDataRole.DisplayRole else filename
+            return self.get_keys(index)[0][1]
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return self.get_check_state(index)
+        if node is not None and self.get_keys(index)[0] in self.checked:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return SELECTED_BACKGROUND
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return SELECTED_FOREGROUND
+        return None
+
+    def toggle(self, index):
+        """切换一行的选中状态；文件行未全部选中时全部选中，否则全部取消"""
+        if not index.isValid():
+            return
+        keys = self.get_keys(index)
+        if self.get_check_state(index) == Qt.CheckState.Checked:
+            self.checked.difference_update(keys)
+        else:
+            self.checked.update(keys)
+        if index.internalPointer() is None:
+            file_index = index
+            children = self.rowCount(index)
+            if children:
+                self.dataChanged.emit(self.index(0, 0, index), self.index(children - 1, 0, index))
+        else:
+            file_index = self.parent(index)
+            self.dataChanged.emit(index, index)
+        self.dataChanged.emit(file_index, file_index)
+        self.selection_changed.emit(len(self.checked))
+
+    def clear(self):
+        self.beginResetModel()
+        self.files = []
+        self.nodes = []
+        self.loaded = 0
+        self.checked = set()
+        self.endResetModel()
+        self.selection_changed.emit(0)
+
+    def append_files(self, files):
+        """
+        加入一批文件及其工作表。
+
+        :param files: [(文件路径, [工作表名称, ...]), ...]
+        """
+        start = len(self.files)
+        self.files.extend(files)
+        if self.predicate is None:
+            matches = self.all_matches(start)
+        else:
+            matches = self.match(files, self.predicate, start)
+        self.nodes.extend(self.build_nodes(matches))
+        # 前 FETCH_BATCH 行直接显示，其余等视图滚动到末尾时再加入
+        count = min(FETCH_BATCH, len(self.nodes)) - self.loaded
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+            self.loaded += count
+            self.endInsertRows()
+
+    def apply_filter(self, predicate, result, count):
+        """显示筛选结果，参数同 SelectableListModel.apply_filter"""
+        self.beginResetModel()
+        self.predicate = predicate
+        self.nodes = []
+        if predicate is None:
+            self.nodes = self.build_nodes(self.all_matches())
+        else:
+            self.nodes = self.build_nodes(result + self.match(self.files[count:], predicate, count))
+        self.loaded = min(FETCH_BATCH, len(self.nodes))
+        self.endResetModel()
+
+    def set_visible_checked(self, checked):
+        """选中或取消所有通过筛选的工作表"""
+        keys = []
+        for node in self.nodes:
+            filename, sheet_names = self.files[node.file_index]
+            keys.extend((filename, sheet_names[j]) for j in node.sheets)
+        if checked:
+            self.checked.update(keys)
+        else:
+            self.checked.difference_update(keys)
+        for row in range(self.loaded):
+            file_index = self.index(row, 0)
+            children = len(self.nodes[row].sheets)
+            if children:
+                self.dataChanged.emit(self.index(0, 0, file_index), self.index(children - 1, 0, file_index))
+        if self.loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, 0))
+        self.selection_changed.emit(len(self.checked))
+
+    def get_checked_keys(self):
+        """按文件和工作表的顺序返回选中的 (文件路径, 工作表名称)，包括被筛选隐藏的项"""
+        return [(filename, name) for filename, sheet_names in self.files for name in sheet_names
+                if (filename, name) in self.checked]
+
+    def get_checked_sheets(self):
+        """选中的工作表名称，去重并保持顺序"""
+        return list(dict.fromkeys(name for filename, name in self.get_checked_keys()))
+
+    def visible_count(self):
+        return sum(len(node.sheets) for node in self.nodes)
+
+    def total_count(self):
+        return sum(len(sheet_names) for filename, sheet_names in self.files)
+
+class SheetNamesSignals(QObject):
+    # (加载序号, [(文件路径, [工作表名称, ...]), ...])
+    batch = pyqtSignal(int, list)
+
+class SheetNamesWorker(QRunnable):
+    """在后台线程中读取各Excel文件的工作表名称，每 SHEET_BATCH 个文件发出一批"""
+
+    def __init__(self, generation, filenames):
+        super().__init__()
+        self.generation = generation
+        self.filenames = filenames
+        self.signals = SheetNamesSignals()
+        self.cancelled = False
+
+    def run(self):
+        from excel2markdown import get_sheet_names
+        batch = []
+        for filename in self.filenames:
+            if self.cancelled:
+                return
+            try:
+                batch.append((filename, get_sheet_names(filename)))
+            except Exception as e:
+                print(f"无法读取Excel工作表: {str(e)}")
+                batch.append((filename, []))
+            if len(batch) >= SHEET_BATCH:
+                self.signals.batch.emit(self.generation, batch)
+                batch = []
+        if batch:
+            self.signals.batch.emit(self.generation, batch)
+
+class FilteredItemView(QWidget):
+    """
+    带筛选框的列表或树：筛选框、视图、"选择全部筛选结果"和"清除选择"按钮及计数。
+
+    点击一行切换其选中状态。
+
+    :param model: SelectableListModel 或 SheetTreeModel
+    :param threadpool: 运行筛选和加载任务的线程池
+    :param placeholder: 筛选框的提示文字
+    """
+
+    def __init__(self, model, threadpool, placeholder="筛选", parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.threadpool = threadpool
+        self.filter_generation = 0
+        self.load_generation = 0
+        self.sheet_worker = None
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        filter_layout = QHBoxLayout()
+        self.filter_entry = QLineEdit()
+        self.filter_entry.setPlaceholderText(placeholder)
+        self.filter_entry.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.filter_entry)
+        self.regex_checkbox = QCheckBox("正则")
+        filter_layout.addWidget(self.regex_checkbox)
+        layout.addLayout(filter_layout)
+
+        if isinstance(model, SheetTreeModel):
+            self.view = QTreeView()
+            self.view.setUniformRowHeights(True)
+            model.rowsInserted.connect(self.expand_rows)
+            model.modelReset.connect(self.view.expandAll)
+        else:
+            self.view = QListView()
+            self.view.setUniformItemSizes(True)
+        self.view.setModel(model)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.view.clicked.connect(model.toggle)
+        layout.addWidget(self.view)
+
+        buttons_layout = QHBoxLayout()
+        select_button = QPushButton("选择全部筛选结果")
+        select_button.clicked.connect(lambda: model.set_visible_checked(True))
+        buttons_layout.addWidget(select_button)
+        clear_button = QPushButton("清除选择")
+        clear_button.clicked.connect(lambda: model.set_visible_checked(False))
+        buttons_layout.addWidget(clear_button)
+        self.count_label = QLabel()
+        buttons_layout.addWidget(self.count_label, 1)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY)
+        self.filter_timer.timeout.connect(self.start_filter)
+        self.filter_entry.textChanged.connect(self.filter_timer.start)
+        self.regex_checkbox.toggled.connect(self.filter_timer.start)
+        model.selection_changed.connect(self.update_count_label)
+        model.modelReset.connect(self.update_count_label)
+        model.rowsInserted.connect(self.update_count_label)
+        self.update_count_label()
+
+    def start_filter(self):
+        """按筛选框的内容在后台筛选，筛选框为空时显示全部项"""
+        self.filter_generation += 1
+        text = self.filter_entry.text()
+        self.filter_entry.setToolTip("")
+        self.filter_entry.setStyleSheet("")
+        if not text:
+            self.model.apply_filter(None, None, 0)
+            return
+        try:
+            predicate = compile_filter(text, self.regex_checkbox.isChecked())
+        except re.error as e:
+            self.filter_entry.setToolTip(f"正则表达式无效: {str(e)}")
+            self.filter_entry.setStyleSheet("QLineEdit { border: 1px solid #C0392B; }")
+            return
+        generation = self.filter_generation
+        worker = FilterWorker(generation, self.model.get_snapshot(), self.model.match, predicate)
+        worker.signals.finished.connect(
+            lambda generation, result, count: self.finish_filter(generation, predicate, result, count))
+        self.threadpool.start(worker)
+
+    def finish_filter(self, generation, predicate, result, count):
+        # 筛选期间筛选条件又变了，或列表被替换，丢弃这次的结果
+        if generation == self.filter_generation:
+            self.model.apply_filter(predicate, result, count)
+
+    def set_items(self, items):
+        """替换列表的全部项，筛选框不为空时在后台重新筛选"""
+        self.filter_generation += 1
+        self.model.set_items(items)
+        if self.filter_entry.text():
+            self.start_filter()
+
+    def load_workbooks(self, filenames):
+        """在后台读取各 .xlsx 文件的工作表名称，分批加入工作表树"""
+        self.load_generation += 1
+        self.filter_generation += 1
+        if self.sheet_worker is not None:
+            self.sheet_worker.cancelled = True
+        self.model.clear()
+        # 之前的筛选结果已失效，重新设置筛选条件，之后加入的每批文件按它筛选
+        if self.filter_entry.text():
+            self.start_filter()
+        filenames = [filename for filename in filenames if filename.lower().endswith('.xlsx')]
+        if not filenames:
+            self.sheet_worker = None
+            return
+        self.sheet_worker = SheetNamesWorker(self.load_generation, filenames)
+        self.sheet_worker.signals.batch.connect(self.add_workbooks)
+        self.threadpool.start(self.sheet_worker)
+
+    def add_workbooks(self, generation, files):
+        if generation == self.load_generation:
+            self.model.append_files(files)
+
+    def expand_rows(self, parent, first, last):
+        if not parent.isValid():
+            for row in range(first, last + 1):
+                self.view.expand(self.model.index(row, 0))
+
+    def update_count_label(self, *args):
+        self.count_label.setText(f"已选 {len(self.model.checked)} 项，显示 {self.model.visible_count()} / "
+                                 f"{self.model.total_count()}")
+
+    def get_checked_keys(self):
+        return self.model.get_checked_keys()
@@ -0,0 +1,326 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import shutil
+import struct
+import time
+from file_handler import ensure_output_directory
+from markdown_sink import get_asset_dir, get_temp_path
+
+INDEX_FILENAME = ".mdeverything_index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_hash(path):
+    """计算文件内容的SHA-256，分块读取"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stat_key(path):
+    """返回 (size, mtime_ns)，文件不存在时返回None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+class ConversionIndex:
+    """
+    持久化的转换索引：源文件路径 -> {size, mtime, hash, outputs, failed}。
+
+    以JSON保存，写入时先写临时文件再原子替换。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"无法读取转换索引，将重新建立: {str(e)}")
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def set(self, path, entry):
+        self.entries[path] = entry
+        self.dirty = True
+
+    def remove(self, path):
+        if self.entries.pop(path, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = get_temp_path(self.path)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+class PollingWatcher:
+    """轮询方式：每隔 interval 秒要求一次全量扫描"""
+
+    def __init__(self, directories, interval=2.0):
+        self.interval = interval
+
+    def read_events(self, timeout):
+        """等待变化，返回变化的路径集合；返回None表示需要全量扫描"""
+        time.sleep(min(timeout, self.interval))
+        return None
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """基于Linux inotify的目录监视，通过ctypes调用libc，无需额外依赖"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directories):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.watches = {}
+        for directory in directories:
+            self.add_tree(directory)
+
+    def add_tree(self, root):
+        """监视 root 及其所有子目录，返回其中已存在的文件"""
+        found = set()
+        for dirpath, _, filenames in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"无法监视目录: {dirpath}")
+            self.watches[wd] = dirpath
+            found.update(os.path.join(dirpath, name) for name in filenames)
+        return found
+
+    def read_events(self, timeout):
+        """等待变化，返回变化的路径集合；返回None表示需要全量扫描"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                if mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        changed.update(self.add_tree(path))
+                    elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                        # 子目录整体删除或移走时，其中文件的删除由全量扫描处理
+                        return None
+                else:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def create_watcher(directories, interval=2.0, use_polling=False):
+    """优先使用inotify，不可用时退回轮询"""
+    if not use_polling and hasattr(os, 'O_CLOEXEC'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"inotify不可用，改为轮询: {str(e)}")
+    return PollingWatcher(directories, interval)
+
+class FolderWatcher:
+    """
+    监视目录，自动转换新增或修改的文件。
+
+    启动时用一次扫描比对索引，只转换新增或内容变化的文件，并清理已删除源文件的输出。
+    之后根据文件系统事件增量处理，同一文件在 debounce 秒内的连续写入只触发一次转换。
+
+    :param converter: Converter 实例
+    :param directories: 要监视的目录列表
+    :param output_dir: 输出目录，保持与源目录相同的子目录结构；为None时输出到源文件所在目录
+    :param options: 转换选项
+    :param options_for: 可选，options_for(options, input_path) 返回该文件的转换选项
+    :param index_path: 索引文件路径，默认放在输出目录（或第一个监视目录）下
+    """
+
+    def __init__(self, converter, directories, output_dir=None, options=None, options_for=None,
+                 index_path=None, debounce=1.0, interval=2.0, use_polling=False):
+        self.converter = converter
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.output_dir = os.path.abspath(output_dir) if output_dir else None
+        self.options = options or {}
+        self.options_for = options_for
+        self.debounce = debounce
+        self.interval = interval
+        self.use_polling = use_polling
+        index_dir = self.output_dir or self.directories[0]
+        ensure_output_directory(index_dir)
+        self.index = ConversionIndex(index_path or os.path.join(index_dir, INDEX_FILENAME))
+        self.extensions = set(converter.registry.extensions())
+        self.pending = {}
+        self.running = False
+
+    def is_supported(self, path):
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+    def scan(self, retry_failed=False):
+        """
+        扫描监视目录，返回与索引不一致（新增、变化或删除）的路径。
+
+        :param retry_failed: 是否包含上次转换失败且未变化的文件（仅启动时重试）
+        """
+        changed = set()
+        seen = set()
+        for root in self.directories:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if not self.is_supported(path):
+                        continue
+                    seen.add(path)
+                    entry = self.index.get(path)
+                    key = stat_key(path)
+                    if entry is None or key != (entry['size'], entry['mtime']) or (retry_failed and entry.get('failed')):
+                        changed.add(path)
+        changed.update(path for path in self.index.entries if path not in seen)
+        return changed
+
+    def reconcile(self):
+        """启动时一次性同步索引与目录树"""
+        for path in sorted(self.scan(retry_failed=True)):
+            self.sync_path(path)
+        self.index.save()
+
+    def get_output_dir(self, path):
+        if self.output_dir is None:
+            return os.path.dirname(path)
+        for root in self.directories:
+            if os.path.commonpath([root, path]) == root:
+                relative = os.path.relpath(os.path.dirname(path), root)
+                return os.path.normpath(os.path.join(self.output_dir, relative))
+        return self.output_dir
+
+    def sync_path(self, path):
+        """按索引处理单个路径：删除则清理输出，内容变化则重新转换"""
+        entry = self.index.get(path)
+        key = stat_key(path)
+        if key is None or not os.path.isfile(path):
+            if entry is not None:
+                self.remove_outputs(entry['outputs'])
+                self.index.remove(path)
+                print(f"源文件已删除，已清理输出: {path}")
+            return
+        if entry is not None and not entry.get('failed') and key == (entry['size'], entry['mtime']):
+            return
+        digest = file_hash(path)
+        if entry is not None and not entry.get('failed') and digest == entry['hash']:
+            # 仅时间戳变化，内容未变
+            self.index.set(path, dict(entry, size=key[0], mtime=key[1]))
+            return
+        self.convert(path, key, digest, entry)
+
+    def convert(self, path, key, digest, entry):
+        output_dir = self.get_output_dir(path)
+        ensure_output_directory(output_dir)
+        options = self.options_for(self.options, path) if self.options_for else dict(self.options)
+        result = self.converter.convert_file(path, output_dir, options)
+        if isinstance(result, list):
+            outputs = result
+        else:
+            outputs = [result] if result else []
+        if entry is not None:
+            self.remove_outputs([output for output in entry['outputs'] if output not in outputs])
+        self.index.set(path, {
+            'size': key[0],
+            'mtime': key[1],
+            'hash': digest,
+            'outputs': outputs,
+            'failed': not outputs,
+        })
+
+    @staticmethod
+    def remove_outputs(outputs):
+        for output in outputs:
+            if os.path.exists(output):
+                os.remove(output)
+            asset_dir = get_asset_dir(output)
+            if os.path.isdir(asset_dir):
+                shutil.rmtree(asset_dir)
+
+    def queue(self, paths, now):
+        """登记待处理路径；文件状态仍在变化时重新计时（防抖）"""
+        for path in paths:
+            if not self.is_supported(path) and path not in self.index.entries:
+                continue
+            key = stat_key(path)
+            previous = self.pending.get(path)
+            if previous is None or previous[1] != key:
+                self.pending[path] = (now, key)
+
+    def process_pending(self, now):
+        ready = [path for path, (since, _) in self.pending.items() if now - since >= self.debounce]
+        for path in sorted(ready):
+            del self.pending[path]
+            self.sync_path(path)
+        if ready:
+            self.index.save()
+
+    def run(self):
+        """同步一次后持续监视，直到调用 stop() 或收到 KeyboardInterrupt"""
+        # 先开始监视再同步，避免遗漏同步期间发生的变化
+        watcher = create_watcher(self.directories, self.interval, self.use_polling)
+        self.reconcile()
+        self.running = True
+        try:
+            while self.running:
+                timeout = self.debounce if self.pending else self.interval
+                changed = watcher.read_events(timeout)
+                if changed is None:
+                    changed = self.scan()
+                self.queue(changed, time.monotonic())
+                self.process_pending(time.monotonic())
+        finally:
+            watcher.close()
+            self.index.save()
+
+    def stop(self):
+        self.running = False
@@ -1,96 +1,23 @@
+import codecs
 import html2text
+from html.entities import html5
 import requests
-import re
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from PyQt6.QtWidgets import QMessageBox, QProgressDialog, QListWidgetItem
-from PyQt6.QtCore import Qt, QObject, pyqtSignal, QRunnable
-
-class WorkerSignals(QObject):
-    finished = pyqtSignal(list)
-    error = pyqtSignal(str)
-
-class LinkExtractorWorker(QRunnable):
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
-        self.signals = WorkerSignals()
-
-    def run(self):
-        try:
-            links = self.extract_links(self.url)
-            self.signals.finished.emit(links)
-        except Exception as e:
-            self.signals.error.emit(str(e))
-
-    def extract_links(self, url):
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            base_url = '{uri.scheme}://{uri.netloc}'.format(uri=urlparse(url))
-            links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                full_url = urljoin(base_url, href)
-                if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                    title = a.text.strip() or full_url
-                    links.append((title, full_url))
-            return links
-        except Exception as e:
-            print(f"提取链接时出错: {str(e)}")
-            return []
-
-class HTMLHandler:
-    def __init__(self, parent, threadpool):
-        self.parent = parent
-        self.threadpool = threadpool
-
-    def load_webpage_links(self, url, links_list):
-        """加载网页链接并更新链接列表"""
-        if not self.is_url(url):
-            QMessageBox.warning(self.parent, "警告", "请输入有效的URL")
-            return
-
-        progress = QProgressDialog("正在加载链接...", "取消", 0, 0, self.parent)
-        progress.setWindowModality(Qt.WindowModality.WindowModal)
-        progress.show()
-
-        worker = LinkExtractorWorker(url)
-        worker.signals.finished.connect(lambda links: self.update_links_list(links, links_list, progress))
-        worker.signals.error.connect(lambda error: self.show_error(error, progress))
-        self.threadpool.start(worker)
-
-    def update_links_list(self, links, links_list, progress):
-        """更新链接列表UI"""
-        progress.close()
-        links_list.clear()
-        for title, link in links:
-            item = QListWidgetItem(f"{title} ({link})")
-            item.setData(Qt.ItemDataRole.UserRole, link)
-            links_list.addItem(item)
-        
-        if not links:
-            QMessageBox.information(self.parent, "信息", "未找到任何链接")
-
-    def show_error(self, error, progress):
-        """显示错误消息"""
-        progress.close()
-        QMessageBox.critical(self.parent, "错误", f"加载链接失败: {error}")
-
-    @staticmethod
-    def is_url(text):
-        """检查文本是否为有效URL"""
-        url_pattern = re.compile(
-            r'^(?:http|ftp)s?://'
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'
-            r'localhost|'
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
-            r'(?::\d+)?'
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        return url_pattern.match(text) is not None
-
-def html_to_markdown(url, use_jina_ai=False, jina_api_key=None, ignore_links=False, ignore_images=False, body_width=None):
+from deadline import Deadline, get_deadline
+from html_scanner import open_html_stream, extract_title
+
+# 流式下载时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+# 默认最大网页大小（字节），防止超大页面耗尽内存或磁盘
+DEFAULT_MAX_PAGE_SIZE = 100 * 1024 * 1024
+# 读取网页标题只需要页面开头，等待时间短一些
+TITLE_READ_TIMEOUT = 10
+
+class PageTooLargeError(ValueError):
+    """网页超过最大大小限制时抛出的异常"""
+    pass
+
+def html_to_markdown(url, use_jina_ai=False, jina_api_key=None, ignore_links=False, ignore_images=False, body_width=None,
+                     max_page_size=DEFAULT_MAX_PAGE_SIZE, deadline=None):
     """
     将HTML转换为Markdown格式。
 
@@ -100,59 +27,198 @@ def html_to_markdown(url, use_jina_ai=False, jina_api_key=None, ignore_links=Fal
     :param ignore_links: 是否忽略链接
     :param ignore_images: 是否忽略图片
     :param body_width: 正文宽度
+    :param max_page_size: 最大网页大小（字节），0为不限制
+    :param deadline: 可选，Deadline，决定请求超时，取消或超时时停止下载
     :return: 转换后的Markdown内容
     """
+    return "".join(iter_html_markdown(url, use_jina_ai, jina_api_key, ignore_links, ignore_images, body_width,
+                                      max_page_size, deadline))
+
+def iter_markdown(url, options):
+    """统一转换接口：边下载边逐块产出网页转换后的Markdown"""
+    return iter_html_markdown(
+        url,
+        use_jina_ai=options.get('use_jina_ai', False),
+        jina_api_key=options.get('jina_api_key', ''),
+        ignore_links=options.get('ignore_links', False),
+        ignore_images=options.get('ignore_images', False),
+        body_width=options.get('body_width', None),
+        max_page_size=options.get('max_page_size', DEFAULT_MAX_PAGE_SIZE),
+        deadline=get_deadline(options)
+    )
+
+def iter_html_markdown(url, use_jina_ai=False, jina_api_key=None, ignore_links=False, ignore_images=False,
+                       body_width=None, max_page_size=DEFAULT_MAX_PAGE_SIZE, deadline=None):
+    """逐块产出转换后的Markdown，参数同 html_to_markdown"""
     if use_jina_ai:
-        return jina_html_to_markdown(url, jina_api_key)
+        return iter_jina_html_markdown(url, jina_api_key, max_page_size, deadline)
     else:
-        return standard_html_to_markdown(url, ignore_links, ignore_images, body_width)
+        return iter_standard_html_markdown(url, ignore_links, ignore_images, body_width, max_page_size, deadline)
 
-def standard_html_to_markdown(url, ignore_links, ignore_images, body_width):
+def standard_html_to_markdown(url, ignore_links, ignore_images, body_width, max_page_size=DEFAULT_MAX_PAGE_SIZE,
+                              deadline=None):
     """使用标准html2text库进行转换"""
+    return "".join(iter_standard_html_markdown(url, ignore_links, ignore_images, body_width, max_page_size,
+                                               deadline))
+
+def iter_standard_html_markdown(url, ignore_links, ignore_images, body_width, max_page_size=DEFAULT_MAX_PAGE_SIZE,
+                                deadline=None):
+    """使用html2text边下载边转换，见 iter_html2text_markdown"""
+    texts = iter_response_text(url, max_page_size, "获取网页内容失败", deadline=deadline)
+    return iter_html2text_markdown(texts, ignore_links, ignore_images, body_width)
+
+def iter_html2text_markdown(texts, ignore_links=False, ignore_images=False, body_width=None):
+    """
+    把逐块到达的HTML文本送入 HTML2Text.feed，边解析边产出Markdown，不保留完整的HTML。
+
+    输出与对完整页面调用一次 HTML2Text.handle 相同：body_width 为0时直接产出html2text已生成的文本；
+    否则只在换行结果不受切分影响的行边界处（见 find_wrap_boundary）产出已换行的部分，其余留到后面一起换行。
+
+    :param texts: 可迭代的HTML文本块
+    """
+    h = html2text.HTML2Text()
+    h.ignore_links = ignore_links
+    h.ignore_images = ignore_images
+    if body_width is not None:
+        h.body_width = body_width
+    h.start = True
+    if h.pad_tables:
+        # 表格补齐需要整个页面
+        yield h.handle("".join(texts))
+        return
+
+    pending = ''
+    tail = ''
+    scanned = 0
+    in_code = False
+    for text in texts:
+        # 只送入到最后一个 "<" 之前的内容，避免一段文字被拆成两次 handle_data
+        # （html2text 会在加粗等标记后的第二段文字前补空格）
+        text = tail + text
+        cut = text.rfind('<')
+        if cut <= 0:
+            tail = text
+            continue
+        h.feed(text[:cut])
+        tail = text[cut:]
+        pending += drain_output(h)
+        if not h.body_width:
+            if pending:
+                yield pending
+                pending = ''
+            continue
+        boundary, scanned, in_code = find_wrap_boundary(h, pending, scanned, in_code)
+        if boundary:
+            # 切分处不在代码块中
+            yield wrap_text(h, pending[:boundary - 1])
+            pending = pending[boundary:]
+            scanned -= boundary
+
+    h.feed(tail)
+    h.feed('')
+    # 与 HTML2Text.handle 相同的收尾，之前已取走的输出不会重复
+    pending += h.finish()
+    if pending:
+        yield wrap_text(h, pending)
+
+def find_wrap_boundary(h, text, position=0, in_code=False):
+    """
+    在 text 中找到最后一个可以分开换行的行首位置。
+
+    HTML2Text.optwrap 逐行处理，行的输出取决于之前的空行数和是否在 ``` 代码块中。
+    某一行非空、不在代码块中，且不是 optwrap 原样跳过、不计入空行状态的行时，
+    从这一行开始重新换行与整体换行的结果相同。该行之后必须还有换行符，保证这一行已经完整。
+
+    :param position: 从这一位置（行首）继续查找，之前的部分已找过
+    :param in_code: position 处是否在代码块中
+    :return: (可切分的行首位置，没有时为0, 已查找到的位置, 该位置是否在代码块中)
+    """
+    boundary = 0
+    while True:
+        end = text.find('\n', position)
+        if end == -1:
+            return boundary, position, in_code
+        line = text[position:end]
+        if h.backquote_code_style and line.lstrip().startswith('```'):
+            in_code = not in_code
+        elif position and line and not in_code and not html2text.config.RE_SPACE.match(line):
+            boundary = position
+        position = end + 1
+
+def wrap_text(h, text):
+    """按 body_width 换行；optwrap 在 wrap_links 为False时会关闭 inline_links，这里恢复以免影响后续解析"""
+    inline_links = h.inline_links
+    try:
+        return h.optwrap(text)
+    finally:
+        h.inline_links = inline_links
+
+def drain_output(h):
+    """
+    取出html2text目前已生成的输出。
+
+    最后一段留在 outtextlist 中：html2text 处理链接中的标题时会撤回刚输出的 "["。
+    """
+    if len(h.outtextlist) < 2:
+        return ''
+    output = "".join(h.outtextlist[:-1])
+    del h.outtextlist[:-1]
+    nbsp = html5["nbsp;"] if h.unicode_snob else " "
+    return output.replace("&nbsp_place_holder;", nbsp)
+
+def iter_response_text(url, max_page_size=DEFAULT_MAX_PAGE_SIZE, error_message="获取网页内容失败", headers=None,
+                       deadline=None):
+    """
+    流式下载网页并增量解码为文本块。
+
+    字符集依次取自响应头、网页开头的 <meta charset>，都没有声明时才进行检测，见 html_scanner.resolve_charset。
+
+    :param max_page_size: 最大网页大小（字节），超过时停止下载并抛出 PageTooLargeError，0为不限制
+    :param deadline: 可选，Deadline；连接和读取超时由剩余时间推算，每读取一块检查一次是否已取消或超时
+    """
+    deadline = deadline or Deadline()
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        html = response.text
-
-        h = html2text.HTML2Text()
-        h.ignore_links = ignore_links
-        h.ignore_images = ignore_images
-        if body_width is not None:
-            h.body_width = body_width
-        
-        return h.handle(html)
+        # 等待响应头期间也能及时响应取消
+        response = deadline.call(requests.get, url, headers=headers, stream=True, timeout=deadline.get_timeout())
+        with response:
+            response.raise_for_status()
+            encoding, chunks = open_html_stream(response, STREAM_CHUNK_SIZE)
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            received = 0
+            for chunk in chunks:
+                deadline.check()
+                received += len(chunk)
+                if max_page_size and received > max_page_size:
+                    raise PageTooLargeError(f"网页超过最大大小限制（{max_page_size / (1024 * 1024):g} MB）: {url}")
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
     except requests.RequestException as e:
-        raise ConnectionError(f"获取网页内容失败: {str(e)}")
+        raise ConnectionError(f"{error_message}: {str(e)}")
 
-def jina_html_to_markdown(url, api_key):
+def jina_html_to_markdown(url, api_key, max_page_size=DEFAULT_MAX_PAGE_SIZE, deadline=None):
     """使用Jina AI进行转换"""
+    return "".join(iter_jina_html_markdown(url, api_key, max_page_size, deadline))
+
+def iter_jina_html_markdown(url, api_key, max_page_size=DEFAULT_MAX_PAGE_SIZE, deadline=None):
+    """使用Jina AI进行转换，结果边下载边产出"""
     if not api_key:
         raise ValueError("Jina API密钥不能为空")
 
     headers = {
         'Authorization': f'Bearer {api_key}'
     }
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.text
-    except requests.RequestException as e:
-        raise ConnectionError(f"Jina AI请求失败: {str(e)}")
 
-def get_webpage_title(url):
-    """获取网页标题"""
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        html = response.text
-        start = html.find('<title>') + 7
-        end = html.find('</title>')
-        if start > 6 and end != -1:
-            return html[start:end].strip()
-        return urlparse(url).netloc
-    except requests.RequestException:
-        return urlparse(url).netloc
+    yield from iter_response_text(url, max_page_size, "Jina AI请求失败", headers, deadline)
+
+def get_webpage_title(url, parser='auto', deadline=None):
+    """获取网页标题，只下载到 <title> 为止"""
+    if deadline is None:
+        return extract_title(url, parser)
+    return deadline.call(extract_title, url, parser, timeout=deadline.get_timeout(read=TITLE_READ_TIMEOUT))
 
 # 使用示例
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+import re
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+from PyQt6.QtCore import Qt, QObject, pyqtSignal, QRunnable
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+class LinkExtractorWorker(QRunnable):
+    def __init__(self, url, parser='auto'):
+        super().__init__()
+        self.url = url
+        self.parser = parser
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            links = self.extract_links(self.url)
+            self.signals.finished.emit(links)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+    def extract_links(self, url):
+        # 解析器和requests较重，在后台线程中首次使用时才导入
+        from html_scanner import extract_links
+        try:
+            return extract_links(url, self.parser)
+        except Exception as e:
+            print(f"提取链接时出错: {str(e)}")
+            return []
+
+class HTMLHandler:
+    def __init__(self, parent, threadpool):
+        self.parent = parent
+        self.threadpool = threadpool
+
+    def load_webpage_links(self, url, links_list, parser='auto'):
+        """
+        加载网页链接并更新链接列表
+
+        :param parser: HTML解析后端，'auto'、'lxml' 或 'html.parser'
+        """
+        if not self.is_url(url):
+            QMessageBox.warning(self.parent, "警告", "请输入有效的URL")
+            return
+
+        progress = QProgressDialog("正在加载链接...", "取消", 0, 0, self.parent)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+
+        worker = LinkExtractorWorker(url, parser)
+        worker.signals.finished.connect(lambda links: self.update_links_list(links, links_list, progress))
+        worker.signals.error.connect(lambda error: self.show_error(error, progress))
+        self.threadpool.start(worker)
+
+    def update_links_list(self, links, links_list, progress):
+        """
+        更新链接列表UI
+
+        :param links_list: filtered_views.FilteredItemView，上万个链接也只绘制可见的行
+        """
+        progress.close()
+        links_list.set_items((f"{title} ({link})", link) for title, link in links)
+        
+        if not links:
+            QMessageBox.information(self.parent, "信息", "未找到任何链接")
+
+    def show_error(self, error, progress):
+        """显示错误消息"""
+        progress.close()
+        QMessageBox.critical(self.parent, "错误", f"加载链接失败: {error}")
+
+    @staticmethod
+    def is_url(text):
+        """检查文本是否为有效URL"""
+        url_pattern = re.compile(
+            r'^(?:http|ftp)s?://'
+            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'
+            r'localhost|'
+            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+            r'(?::\d+)?'
+            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+        return url_pattern.match(text) is not None
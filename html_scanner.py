@@ -0,0 +1,239 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from itertools import chain
+from urllib.parse import urlparse, urljoin
+
+# 只扫描需要的元素（<a>、<title>）的轻量HTML解析，以及网页字符集判断。
+# 不构建完整的文档树：lxml 后端使用C实现的增量解析器并在处理后立即释放元素，
+# html.parser 后端只在标准库解析器的回调里记录所需内容。
+
+HTML_PARSERS = ('auto', 'lxml', 'html.parser')
+# 'auto' 解析出的后端，首次使用时确定并输出一次
+auto_parser = None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# 在网页开头多少字节内查找 <meta charset>
+META_SNIFF_SIZE = 4096
+
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+# 网页中常见的字符集声明实际指的是其超集，按浏览器的做法解码
+CHARSET_ALIASES = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'iso-8859-1': 'cp1252',
+    'latin-1': 'cp1252',
+    'ascii': 'cp1252',
+    'us-ascii': 'cp1252',
+}
+
+def normalize_charset(name):
+    """返回可用的Python编码名，无法识别时返回None"""
+    if not name:
+        return None
+    name = name.strip().lower()
+    name = CHARSET_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+def get_header_charset(response):
+    """响应头 Content-Type 中声明的字符集"""
+    match = HEADER_CHARSET.search(response.headers.get('content-type', ''))
+    return normalize_charset(match.group(1)) if match else None
+
+def sniff_meta_charset(prefix):
+    """网页开头 <meta charset> 或 http-equiv 中声明的字符集"""
+    match = META_CHARSET.search(prefix[:META_SNIFF_SIZE])
+    return normalize_charset(match.group(1).decode('ascii')) if match else None
+
+def resolve_charset(response, prefix):
+    """
+    判断网页的字符集。
+
+    依次使用BOM、响应头、网页开头的 <meta charset>；都没有声明时，
+    开头是合法UTF-8就按UTF-8解码，否则才对开头这一小段做统计检测。
+
+    :param response: requests 响应
+    :param prefix: 网页开头的字节
+    :return: Python编码名
+    """
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    encoding = get_header_charset(response) or sniff_meta_charset(prefix)
+    if encoding:
+        return encoding
+    try:
+        # final=False：末尾被截断的多字节字符不算错误
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return 'utf-8'
+    best = from_bytes(prefix).best()
+    return normalize_charset(best.encoding if best else None) or 'utf-8'
+
+def open_html_stream(response, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    读取响应开头判断字符集。
+
+    :return: (编码, 包含开头在内的完整字节块迭代器)
+    """
+    chunks = response.iter_content(chunk_size=chunk_size)
+    prefix = b''
+    for chunk in chunks:
+        prefix += chunk
+        if len(prefix) >= META_SNIFF_SIZE:
+            break
+    return resolve_charset(response, prefix), chain([prefix] if prefix else [], chunks)
+
+def get_parser_name(parser='auto'):
+    """把 'auto' 解析为实际可用的后端：安装了lxml时使用lxml，否则使用标准库"""
+    if parser not in HTML_PARSERS:
+        raise ValueError(f"不支持的HTML解析器: {parser}")
+    if parser != 'auto':
+        return parser
+    global auto_parser
+    if auto_parser is None:
+        try:
+            import lxml.etree  # noqa: F401
+            auto_parser = 'lxml'
+            print("HTML解析器: lxml")
+        except ImportError:
+            auto_parser = 'html.parser'
+            print("未安装lxml，HTML解析器使用较慢的 html.parser")
+    return auto_parser
+
+class LxmlScanner:
+    """基于 lxml.etree.HTMLPullParser 的扫描器，只为 <a>、<title> 产生事件"""
+
+    def __init__(self, encoding):
+        from lxml import etree
+        self.parser = etree.HTMLPullParser(events=('end',), tag=('a', 'title'), encoding=encoding)
+        self.links = []
+        self.title = None
+
+    def feed(self, data):
+        self.parser.feed(data)
+        self.collect()
+
+    def close(self):
+        self.parser.close()
+        self.collect()
+
+    def collect(self):
+        for _, element in self.parser.read_events():
+            if element.tag == 'a':
+                href = element.get('href')
+                if href is not None:
+                    self.links.append((href, ''.join(element.itertext()).strip()))
+            elif self.title is None:
+                self.title = ''.join(element.itertext()).strip()
+            # 已处理的元素不再需要，释放其内容
+            element.clear(keep_tail=True)
+
+class HtmlParserScanner(HTMLParser):
+    """基于标准库 html.parser 的扫描器，只在回调中记录链接和标题"""
+
+    def __init__(self, encoding):
+        super().__init__()
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.links = []
+        self.title = None
+        self.href = None
+        self.link_text = []
+        self.title_text = None
+
+    def feed(self, data):
+        super().feed(self.decoder.decode(data))
+
+    def close(self):
+        super().feed(self.decoder.decode(b'', final=True))
+        super().close()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self.end_link()
+            self.href = dict(attrs).get('href')
+            self.link_text = []
+        elif tag == 'title' and self.title is None:
+            self.title_text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self.end_link()
+        elif tag == 'title' and self.title_text is not None:
+            self.title = ''.join(self.title_text).strip()
+            self.title_text = None
+
+    def handle_data(self, data):
+        if self.href is not None:
+            self.link_text.append(data)
+        if self.title_text is not None:
+            self.title_text.append(data)
+
+    def end_link(self):
+        if self.href is not None:
+            self.links.append((self.href, ''.join(self.link_text).strip()))
+        self.href = None
+
+SCANNERS = {
+    'lxml': LxmlScanner,
+    'html.parser': HtmlParserScanner,
+}
+
+def create_scanner(encoding, parser='auto'):
+    return SCANNERS[get_parser_name(parser)](encoding)
+
+def scan_url(url, parser='auto', timeout=10, stop_after_title=False):
+    """
+    边下载边扫描网页。
+
+    :param stop_after_title: 为True时读到 <title> 后即停止下载
+    :return: 扫描器，包含 links 和 title
+    """
+    import requests
+    with requests.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        encoding, chunks = open_html_stream(response)
+        scanner = create_scanner(encoding, parser)
+        for chunk in chunks:
+            scanner.feed(chunk)
+            if stop_after_title and scanner.title is not None:
+                return scanner
+        scanner.close()
+    return scanner
+
+def extract_links(url, parser='auto', timeout=10):
+    """
+    提取网页中与其同域名的链接。
+
+    :param parser: 解析后端，'auto'、'lxml' 或 'html.parser'
+    :return: [(标题, 完整URL), ...]
+    """
+    scanner = scan_url(url, parser, timeout)
+    base_url = '{uri.scheme}://{uri.netloc}'.format(uri=urlparse(url))
+    netloc = urlparse(base_url).netloc
+    links = []
+    for href, text in scanner.links:
+        full_url = urljoin(base_url, href)
+        if urlparse(full_url).netloc == netloc:
+            links.append((text or full_url, full_url))
+    return links
+
+def extract_title(url, parser='auto', timeout=10):
+    """获取网页标题，读到 <title> 即停止下载；没有标题或请求失败时返回域名"""
+    import requests
+    try:
+        title = scan_url(url, parser, timeout, stop_after_title=True).title
+    except requests.RequestException:
+        title = None
+    return title or urlparse(url).netloc
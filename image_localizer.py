@@ -0,0 +1,305 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import urljoin, urlparse, quote
+from deadline import POLL_INTERVAL, Deadline
+from markdown_sink import Asset, get_asset_dir
+
+# 图片本地化：把Markdown中的远程图片（或接口直接返回的图片数据）保存到 <name>_img 目录并改写为相对路径。
+# 下载在有界线程池中进行，与网页转换同时推进；文本块按原顺序输出，
+# 只有其中引用的图片都下载完（或等待窗口已满）时才输出。
+
+DEFAULT_MAX_WORKERS = 8
+# 单张图片的最大大小（字节），超过时保留远程链接
+DEFAULT_MAX_IMAGE_SIZE = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 最多暂存多少个等待图片下载的文本块，超过后等待最早的块
+DEFAULT_WINDOW = 64
+
+IMAGE_LINK = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?')
+
+class ImageLocalizer:
+    """
+    下载Markdown中引用的远程图片。
+
+    同一个实例可用于多个网页（如合并转换多个链接），
+    图片按URL和内容哈希去重，相同内容只保存一份。
+
+    :param max_workers: 同时下载的最大数量，同时也是连接池大小
+    :param max_image_size: 单张图片的最大大小（字节），0为不限制
+    :param timeout: 单个请求的超时时间（秒）
+    :param window: 最多暂存的待输出文本块数
+    :param deadline: 可选，所属转换任务的 Deadline，取消或超时时停止下载
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_image_size=DEFAULT_MAX_IMAGE_SIZE, timeout=30,
+                 window=DEFAULT_WINDOW, deadline=None):
+        import requests
+        self.max_image_size = max_image_size
+        self.timeout = timeout
+        self.deadline = deadline or Deadline()
+        self.window = window
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image')
+        self.temp_dir = tempfile.mkdtemp(prefix='mdeverything_img')
+        # URL -> Future[(文件名, 临时文件路径) 或 None]
+        self.downloads = {}
+        # 已交给写出端的文件名（内容哈希）
+        self.written = set()
+        # add_payload 登记的图片
+        self.payloads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_payload(self, src, read_data):
+        """
+        登记由数据而不是下载提供的图片（如接口返回的base64），在工作线程中解码写出。
+
+        :param src: Markdown中引用该图片的地址；没有被引用的图片由 iter_unreferenced 产出
+        :param read_data: 返回图片字节的可调用对象，在工作线程中调用
+        """
+        if src not in self.downloads:
+            self.downloads[src] = self.executor.submit(self.save_payload, src, read_data)
+            self.payloads.append(self.downloads[src])
+
+    def iter_unreferenced(self):
+        """产出已登记但Markdown中没有引用的图片（如整页图片）"""
+        for future in self.payloads:
+            result = self.wait(future)
+            if result is None:
+                continue
+            name, temp_path = result
+            if name not in self.written:
+                self.written.add(name)
+                yield Asset(name, source_path=temp_path)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def close(self):
+        for future in self.downloads.values():
+            future.cancel()
+        # 取消时不等待正在进行的下载，它们在读取超时或下一次检查时结束
+        self.executor.shutdown(wait=not self.deadline.is_cancelled())
+        self.session.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def localize(self, chunks, output_path, base_url=None):
+        """
+        改写Markdown块中的图片链接，并在引用它们的文本之前产出图片 Asset。
+
+        :param chunks: 转换器产出的块
+        :param output_path: 输出Markdown文件路径，用于确定 <name>_img 的相对路径
+        :param base_url: 网页地址，用于解析相对图片地址
+        """
+        asset_prefix = quote(os.path.basename(get_asset_dir(output_path))) + "/"
+        pending = deque()
+        tail = ''
+        for chunk in chunks:
+            if isinstance(chunk, Asset):
+                pending.append((chunk, None))
+            else:
+                # 只处理到最后一个换行，避免图片链接被拆在两个块之间
+                text = tail + chunk
+                cut = text.rfind('\n') + 1
+                tail = text[cut:]
+                if cut:
+                    pending.append(self.schedule(text[:cut], base_url))
+            while pending and (len(pending) > self.window or self.is_ready(pending[0])):
+                yield from self.finish(pending.popleft(), asset_prefix)
+        if tail:
+            pending.append(self.schedule(tail, base_url))
+        while pending:
+            yield from self.finish(pending.popleft(), asset_prefix)
+
+    def schedule(self, text, base_url):
+        """为文本中的图片提交下载，返回 (文本, {原地址: Future})"""
+        futures = {}
+        for match in IMAGE_LINK.finditer(text):
+            src = match.group(1)
+            url = urljoin(base_url, src) if base_url else src
+            if url in self.downloads:
+                futures[src] = self.downloads[url]
+                continue
+            if src.startswith('data:'):
+                self.add_payload(src, lambda src=src: decode_data_uri(src))
+                futures[src] = self.downloads[src]
+                continue
+            if urlparse(url).scheme not in ('http', 'https'):
+                continue
+            if url not in self.downloads:
+                self.downloads[url] = self.executor.submit(self.download, url)
+            futures[src] = self.downloads[url]
+        return text, futures
+
+    @staticmethod
+    def is_ready(item):
+        _, futures = item
+        return futures is None or all(future.done() for future in futures.values())
+
+    def finish(self, item, asset_prefix):
+        """等待文本块引用的图片，产出新图片的 Asset 和改写后的文本"""
+        text, futures = item
+        if futures is None:
+            yield text
+            return
+        replacements = {}
+        for src, future in futures.items():
+            result = self.wait(future)
+            if result is None:
+                continue
+            name, temp_path = result
+            if name not in self.written:
+                self.written.add(name)
+                yield Asset(name, source_path=temp_path)
+            elif os.path.exists(temp_path):
+                # 内容与已保存的图片相同
+                os.remove(temp_path)
+            replacements[src] = asset_prefix + name
+        if replacements:
+            text = IMAGE_LINK.sub(lambda match: self.rewrite(match, replacements), text)
+        yield text
+
+    def wait(self, future):
+        """等待下载结果，期间定期检查是否已取消或超时"""
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except FutureTimeoutError:
+                self.deadline.check()
+
+    @staticmethod
+    def rewrite(match, replacements):
+        src = match.group(1)
+        if src not in replacements:
+            return match.group(0)
+        start, end = match.span(1)
+        offset = match.start(0)
+        link = match.group(0)
+        return link[:start - offset] + replacements[src] + link[end - offset:]
+
+    def download(self, url):
+        """
+        在工作线程中下载图片到临时文件，边下载边计算哈希。
+
+        :return: (按内容哈希命名的文件名, 临时文件路径)；失败或超过大小限制时返回None
+        """
+        import requests
+        temp_path = os.path.join(self.temp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        try:
+            with self.session.get(url, stream=True, timeout=self.deadline.get_timeout(read=self.timeout)) as response:
+                response.raise_for_status()
+                length = response.headers.get('content-length')
+                if self.max_image_size and length and length.isdigit() and int(length) > self.max_image_size:
+                    raise ValueError("图片超过大小限制")
+                with open(temp_path, 'wb') as f:
+                    for data in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        self.deadline.check()
+                        size += len(data)
+                        if self.max_image_size and size > self.max_image_size:
+                            raise ValueError("图片超过大小限制")
+                        if not head:
+                            head = data[:16]
+                        digest.update(data)
+                        f.write(data)
+                extension = get_image_extension(url, response.headers.get('content-type', ''), head)
+        except (requests.RequestException, ValueError, OSError) as e:
+            print(f"图片下载失败，保留远程链接: {url} ({str(e)})")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        return digest.hexdigest()[:16] + extension, temp_path
+
+    def save_payload(self, src, read_data):
+        """在工作线程中取得图片数据并写入临时文件，返回值同 download"""
+        temp_path = os.path.join(self.temp_dir, uuid.uuid4().hex)
+        try:
+            data = read_data()
+            if self.max_image_size and len(data) > self.max_image_size:
+                raise ValueError("图片超过大小限制")
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+        except (ValueError, OSError) as e:
+            print(f"图片解码失败: {src[:80]} ({str(e)})")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        return hashlib.sha256(data).hexdigest()[:16] + sniff_image_extension(data), temp_path
+
+IMAGE_SIGNATURES = (
+    (b'\x89PNG', '.png'),
+    (b'\xff\xd8', '.jpg'),
+    (b'GIF8', '.gif'),
+    (b'BM', '.bmp'),
+    (b'II*\x00', '.tif'),
+    (b'MM\x00*', '.tif'),
+)
+
+# mimetypes 在部分平台上给出不常用的扩展名（如 .jpe），常见图片类型直接查表
+IMAGE_CONTENT_TYPES = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/pjpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/bmp': '.bmp',
+    'image/svg+xml': '.svg',
+    'image/tiff': '.tif',
+    'image/x-icon': '.ico',
+    'image/vnd.microsoft.icon': '.ico',
+    'image/avif': '.avif',
+}
+
+def sniff_image_extension(data):
+    """根据文件头判断图片扩展名"""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return '.img'
+
+def decode_data_uri(uri):
+    """解码 data:image/...;base64, 形式的图片"""
+    header, _, data = uri.partition(',')
+    if not header.endswith(';base64'):
+        raise ValueError("不支持的data URI")
+    return base64.b64decode(data)
+
+def get_image_extension(url, content_type, head=b''):
+    """
+    确定图片扩展名：优先使用响应的 Content-Type，其次按文件头判断，
+    两者都无法确定时才使用URL中的扩展名（如 /img?id=1、.php 这类地址的扩展名不可信）。
+
+    :param content_type: 响应的 Content-Type 头
+    :param head: 图片数据的开头部分
+    """
+    mime_type = content_type.split(';')[0].strip().lower()
+    if mime_type.startswith('image/'):
+        extension = IMAGE_CONTENT_TYPES.get(mime_type) or mimetypes.guess_extension(mime_type)
+        if extension:
+            return extension
+    extension = sniff_image_extension(head)
+    if extension != '.img':
+        return extension
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension and len(extension) <= 5:
+        return extension
+    return '.img'
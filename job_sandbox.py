@@ -0,0 +1,162 @@
+import errno
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from deadline import POLL_INTERVAL, install_cancel_event
+
+# 隔离模式：每个转换在单独的子进程中运行，并限制其内存（RLIMIT_AS）、CPU时间和运行时间。
+# 异常的输入（压缩炸弹、耗尽内存的文档、让pandoc陷入死循环的TeX文件）只会让自己的子进程被终止，
+# 不会拖垮界面或同一批中的其他任务。子进程自成一个进程组，pandoc、pptx2md等外部程序
+# 继承同样的限制，超时时连同它们一起终止。
+# 内存和CPU限制依赖 resource 模块，仅在Linux/macOS上有效；运行时间限制在所有平台上有效。
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 子进程被终止后留给它退出的时间（秒）
+KILL_GRACE = 5
+# 地址空间不足时动态库加载等失败的错误信息
+OUT_OF_MEMORY_MESSAGES = ('Cannot allocate memory', 'failed to map segment')
+
+class Budget:
+    """
+    单个转换任务的资源限制，各项为0时不限。
+
+    :param memory_mb: 地址空间上限（MB）
+    :param cpu_seconds: CPU时间上限（秒）
+    :param wall_seconds: 运行时间上限（秒）
+    """
+    __slots__ = ('memory_mb', 'cpu_seconds', 'wall_seconds')
+
+    def __init__(self, memory_mb=0, cpu_seconds=0, wall_seconds=0):
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+
+    @classmethod
+    def from_options(cls, options):
+        """由转换选项构建，未开启隔离模式时返回None"""
+        if not options.get('isolate_jobs'):
+            return None
+        return cls(options.get('memory_limit', 0), options.get('cpu_limit', 0), options.get('time_limit', 0))
+
+    def apply(self):
+        """在子进程中设置资源限制"""
+        if resource is None:
+            return
+        if self.memory_mb:
+            limit = self.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if self.cpu_seconds:
+            # 超出软限制时收到 SIGXCPU（默认处理为终止进程），再过1秒达到硬限制时被 SIGKILL
+            if hasattr(signal, 'SIGXCPU'):
+                signal.signal(signal.SIGXCPU, signal.SIG_DFL)
+            resource.setrlimit(resource.RLIMIT_CPU, (self.cpu_seconds, self.cpu_seconds + 1))
+
+    def describe_memory(self):
+        if self.memory_mb:
+            return f"超出内存限制（{self.memory_mb} MB）"
+        return "内存不足"
+
+    def describe_exit(self, exitcode, elapsed=None):
+        """
+        根据子进程的退出码说明其被终止的原因。
+
+        CPU时间限制以 SIGXCPU 终止子进程；SIGKILL 来自内存不足时的系统终止或其他进程，
+        不归因于CPU时间限制。
+
+        :param elapsed: 可选，子进程已运行的时间（秒），达到运行时间限制时说明为超时
+        """
+        if self.cpu_seconds and hasattr(signal, 'SIGXCPU') and exitcode == -signal.SIGXCPU:
+            return f"超出CPU时间限制（{self.cpu_seconds} 秒）"
+        if self.wall_seconds and elapsed is not None and elapsed >= self.wall_seconds:
+            return f"超出运行时间限制（{self.wall_seconds} 秒）"
+        if self.memory_mb:
+            return f"子进程异常退出（退出码 {exitcode}），可能超出内存限制（{self.memory_mb} MB）"
+        return f"子进程异常退出（退出码 {exitcode}）"
+
+def run_isolated(input_path, output_dir, options, budget, cancel_event=None):
+    """
+    在受限的子进程中转换一个输入，返回值与 batch_scheduler.run_job 相同。
+
+    超出限制或被取消的任务被终止并作为失败返回，错误信息中指明超出的限制。
+
+    :param budget: Budget
+    :param cancel_event: 可选，取消标志，设置后立即终止子进程
+    :return: (convert_file 的返回值或None, [(level, title, message), ...])
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    # 不使用守护进程：守护进程不能再启动子进程，工作表并行转换的进程池会失败；
+    # 子进程自成进程组，结束时由 kill_process_group 连同其子进程一起终止
+    process = multiprocessing.Process(target=isolated_main,
+                                      args=(sender, input_path, output_dir, options, budget, cancel_event))
+    process.start()
+    sender.close()
+    started = time.monotonic()
+    expires = started + budget.wall_seconds if budget.wall_seconds else None
+    try:
+        while True:
+            if receiver.poll(POLL_INTERVAL):
+                try:
+                    return receiver.recv()
+                except EOFError:
+                    process.join(KILL_GRACE)
+                    reason = budget.describe_exit(process.exitcode, time.monotonic() - started)
+                    break
+            if cancel_event is not None and cancel_event.is_set():
+                reason = "转换已取消"
+                break
+            if expires is not None and time.monotonic() >= expires:
+                reason = f"超出运行时间限制（{budget.wall_seconds} 秒）"
+                break
+    finally:
+        receiver.close()
+        kill_process_group(process)
+    return None, [("critical", "错误", f"转换 {input_path} 失败: {reason}")]
+
+def isolated_main(sender, input_path, output_dir, options, budget, cancel_event=None):
+    """子进程入口：设置限制后转换，把结果和提示信息发回父进程"""
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    install_cancel_event(cancel_event)
+    budget.apply()
+    from converter import Converter
+    messages = []
+
+    def notifier(level, title, message):
+        # 转换器捕获异常后才提示，此时可以取到当前异常
+        if is_out_of_memory(sys.exc_info()[1]):
+            message = f"{message}（{budget.describe_memory()}）"
+        messages.append((level, title, message))
+
+    try:
+        result = Converter(notifier=notifier).convert_file(input_path, output_dir, options)
+    except Exception as e:
+        reason = budget.describe_memory() if is_out_of_memory(e) else str(e)
+        messages.append(("critical", "错误", f"转换 {input_path} 失败: {reason}"))
+        result = None
+    sender.send((result, messages))
+    sender.close()
+
+def is_out_of_memory(exc):
+    """异常是否由内存（地址空间）不足引起"""
+    if isinstance(exc, MemoryError):
+        return True
+    if isinstance(exc, OSError) and exc.errno == errno.ENOMEM:
+        return True
+    return isinstance(exc, (OSError, ImportError)) and any(text in str(exc) for text in OUT_OF_MEMORY_MESSAGES)
+
+def kill_process_group(process):
+    """终止子进程及其启动的外部程序；子进程已退出时仍可能留有外部程序"""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.is_alive():
+        process.kill()
+    process.join(KILL_GRACE)
@@ -0,0 +1,23 @@
+import pypandoc
+from deadline import Deadline, get_deadline
+
+def latex_to_markdown(input_path, deadline=None):
+    """
+    使用pandoc将LaTeX文件转换为Markdown格式。
+
+    pandoc由本模块直接启动（可执行文件仍由pypandoc查找），以便取消或超时时终止它。
+
+    :param input_path: LaTeX文件路径
+    :param deadline: 可选，Deadline
+    :return: 转换后的Markdown内容
+    """
+    deadline = deadline or Deadline()
+    cmd = [pypandoc.get_pandoc_path(), "--from=latex", "--to=markdown", input_path]
+    result = deadline.run_process(cmd, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        raise RuntimeError(f"pandoc转换失败（退出码 {result.returncode}）: {result.stderr}")
+    return result.stdout
+
+def iter_markdown(input_path, options):
+    """统一转换接口：产出LaTeX转换后的Markdown"""
+    yield latex_to_markdown(input_path, get_deadline(options))
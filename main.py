@@ -1,17 +1,25 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QMessageBox, 
-                             QComboBox, QCheckBox, QGroupBox, QFormLayout, QTabWidget, QSpinBox, QListWidget, QTreeWidget, QTreeWidgetItem, QListWidgetItem, QProgressDialog)
-from PyQt6.QtCore import Qt, QThreadPool
+                             QComboBox, QCheckBox, QGroupBox, QFormLayout, QTabWidget, QSpinBox, QProgressDialog,
+                             QDateEdit)
+from PyQt6.QtCore import Qt, QThreadPool, QDate
 from PyQt6.QtGui import QPalette, QColor, QIcon
 import os
 from url_handler import is_url
-from excel2markdown import update_excel_sheets_tree
 from markdown_merger import merge_markdown_files
+from output_archive import is_archive, list_markdown_members, split_member_path
 from file_handler import browse_files, browse_output_directory, get_default_output_dir, ensure_output_directory
 from settings_handler import SettingsHandler
 from converter import Converter
-from html2markdown import HTMLHandler
+from html_handler import HTMLHandler
+from conversion_worker import ConversionWorker, SitemapConversionWorker
+from filtered_views import FilteredItemView, SelectableListModel, SheetTreeModel
+
+# 界面中"全部结果写入一个归档文件"时的归档文件名（不含扩展名），位于输出目录下
+ARCHIVE_NAME = "markdown_output"
+# 转换结束后最多显示的警告和错误条数
+MAX_SHOWN_PROBLEMS = 20
 
 class MarkdownConverterApp(QMainWindow):
     def __init__(self):
@@ -57,6 +65,8 @@ class MarkdownConverterApp(QMainWindow):
         self.setGeometry(100, 100, 600, 500)
 
         self.settings_handler = SettingsHandler("YourCompany", "MarkdownConverter")
+        # 链接列表和工作表树的筛选、加载也在这个线程池中进行
+        self.threadpool = QThreadPool()
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -69,7 +79,6 @@ class MarkdownConverterApp(QMainWindow):
 
         self.set_app_style()
 
-        self.threadpool = QThreadPool()
         self.converter = Converter(self, self.settings_handler)
         self.html_handler = HTMLHandler(self, self.threadpool)
 
@@ -98,11 +107,56 @@ class MarkdownConverterApp(QMainWindow):
 
     def create_output_directory_group(self):
         group = QGroupBox("输出目录")
-        layout = QHBoxLayout()
+        layout = QVBoxLayout()
+        directory_layout = QHBoxLayout()
         self.output_entry = QLineEdit()
         self.output_browse_button = QPushButton("浏览")
-        layout.addWidget(self.output_entry)
-        layout.addWidget(self.output_browse_button)
+        directory_layout.addWidget(self.output_entry)
+        directory_layout.addWidget(self.output_browse_button)
+        layout.addLayout(directory_layout)
+
+        # 同一次解析同时输出多种格式
+        formats_layout = QHBoxLayout()
+        formats_layout.addWidget(QLabel("输出格式:"))
+        self.output_format_checks = {}
+        for name, label in (("markdown", "Markdown"), ("wiki", "Wiki"), ("qmd", "Quarto"),
+                            ("text", "纯文本"), ("json", "JSON")):
+            check = QCheckBox(label)
+            check.setChecked(name == "markdown")
+            formats_layout.addWidget(check)
+            self.output_format_checks[name] = check
+        formats_layout.addStretch()
+        layout.addLayout(formats_layout)
+
+        # 供检索/向量化流程使用：按标题分块，每个Markdown文件写出一个JSONL清单
+        chunks_layout = QHBoxLayout()
+        chunks_layout.addWidget(QLabel("分块清单:"))
+        self.chunk_size = QSpinBox()
+        self.chunk_size.setMinimum(0)
+        self.chunk_size.setMaximum(10000000)
+        self.chunk_size.setValue(0)
+        self.chunk_size.setSpecialValueText("不生成")
+        chunks_layout.addWidget(self.chunk_size)
+        self.chunk_unit = QComboBox()
+        self.chunk_unit.addItem("字符", "chars")
+        self.chunk_unit.addItem("token（估计）", "tokens")
+        chunks_layout.addWidget(self.chunk_unit)
+        chunks_layout.addStretch()
+        layout.addLayout(chunks_layout)
+
+        # 批量转换的进度记录在输出目录的日志中，中断后可以只继续未完成的输入
+        self.resume_batch = QCheckBox("断点续转：跳过上次批量转换中已完成的输入")
+        layout.addWidget(self.resume_batch)
+
+        # 大批量转换时全部结果写入输出目录下的一个归档，避免在网络文件系统上创建大量小文件
+        archive_layout = QHBoxLayout()
+        self.write_archive = QCheckBox("全部结果写入一个归档文件:")
+        archive_layout.addWidget(self.write_archive)
+        self.archive_format = QComboBox()
+        self.archive_format.addItems([".zip", ".tar", ".tar.gz", ".tar.xz"])
+        archive_layout.addWidget(self.archive_format)
+        archive_layout.addStretch()
+        layout.addLayout(archive_layout)
         group.setLayout(layout)
         return group
 
@@ -114,6 +168,7 @@ class MarkdownConverterApp(QMainWindow):
         self.options_tab.addTab(self.create_pptx_options(), "PPT选项")
         self.options_tab.addTab(self.create_excel_options(), "Table选项")
         self.options_tab.addTab(self.create_markdown_merge_options(), "Markdown合并")
+        self.options_tab.addTab(self.create_limits_options(), "资源限制")
         return self.options_tab
 
     def create_convert_button(self):
@@ -189,15 +244,8 @@ class MarkdownConverterApp(QMainWindow):
         excel_group = QGroupBox("Table转换选项")
         excel_layout = QVBoxLayout()
 
-        self.excel_sheets_tree = QTreeWidget()
-        self.excel_sheets_tree.setHeaderLabel("Excel文件和工作表")
-        self.excel_sheets_tree.setSelectionMode(QTreeWidget.SelectionMode.MultiSelection)
-        self.excel_sheets_tree.setStyleSheet("""
-            QTreeWidget::item:selected {
-                background-color: #3A7734;
-                color: white;
-            }
-        """)
+        self.excel_sheets_tree = FilteredItemView(SheetTreeModel("Excel文件和工作表（CSV/TSV文件无需选择）"),
+                                                  self.threadpool, "筛选文件名或工作表名")
         excel_layout.addWidget(QLabel("选择工作表:"))
         excel_layout.addWidget(self.excel_sheets_tree)
 
@@ -205,6 +253,41 @@ class MarkdownConverterApp(QMainWindow):
         self.excel_header.setChecked(True)
         excel_layout.addWidget(self.excel_header)
 
+        selection_layout = QFormLayout()
+        self.excel_cell_range = QLineEdit()
+        self.excel_cell_range.setPlaceholderText("例如 A1:F50000，留空为整个工作表")
+        selection_layout.addRow("单元格范围:", self.excel_cell_range)
+
+        self.excel_columns = QLineEdit()
+        self.excel_columns.setPlaceholderText("例如 A,C:E，留空为全部列")
+        selection_layout.addRow("选择列:", self.excel_columns)
+        excel_layout.addLayout(selection_layout)
+
+        self.excel_skip_empty_rows = QCheckBox("跳过空行")
+        excel_layout.addWidget(self.excel_skip_empty_rows)
+
+        self.excel_skip_empty_columns = QCheckBox("跳过空列")
+        excel_layout.addWidget(self.excel_skip_empty_columns)
+
+        self.excel_parallel_sheets = QCheckBox("多进程并行转换多个工作表")
+        excel_layout.addWidget(self.excel_parallel_sheets)
+
+        limits_layout = QFormLayout()
+        self.table_row_limit = QSpinBox()
+        self.table_row_limit.setMinimum(0)
+        self.table_row_limit.setMaximum(2000000000)
+        self.table_row_limit.setValue(0)
+        self.table_row_limit.setSpecialValueText("不限")
+        limits_layout.addRow("最多转换行数:", self.table_row_limit)
+
+        self.table_split_rows = QSpinBox()
+        self.table_split_rows.setMinimum(0)
+        self.table_split_rows.setMaximum(2000000000)
+        self.table_split_rows.setValue(0)
+        self.table_split_rows.setSpecialValueText("不拆分")
+        limits_layout.addRow("每个文件最多行数:", self.table_split_rows)
+        excel_layout.addLayout(limits_layout)
+
         excel_group.setLayout(excel_layout)
         return excel_group
 
@@ -229,25 +312,87 @@ class MarkdownConverterApp(QMainWindow):
         self.html_ignore_images = QCheckBox("忽略图片")
         options_layout.addRow(self.html_ignore_images)
 
+        self.html_localize_images = QCheckBox("下载图片到本地")
+        options_layout.addRow(self.html_localize_images)
+
+        self.html_max_image_size = QSpinBox()
+        self.html_max_image_size.setMinimum(0)
+        self.html_max_image_size.setMaximum(10000)
+        self.html_max_image_size.setValue(20)
+        self.html_max_image_size.setSpecialValueText("不限")
+        options_layout.addRow("单张图片最大 (MB):", self.html_max_image_size)
+
         self.html_body_width = QSpinBox()
         self.html_body_width.setMinimum(0)
         self.html_body_width.setMaximum(1000)
         self.html_body_width.setValue(0)
         options_layout.addRow("正文宽度:", self.html_body_width)
 
+        self.html_max_page_size = QSpinBox()
+        self.html_max_page_size.setMinimum(0)
+        self.html_max_page_size.setMaximum(100000)
+        self.html_max_page_size.setValue(100)
+        self.html_max_page_size.setSpecialValueText("不限")
+        options_layout.addRow("最大网页大小 (MB):", self.html_max_page_size)
+
+        self.html_parser_combo = QComboBox()
+        self.html_parser_combo.addItems(["auto", "lxml", "html.parser"])
+        options_layout.addRow("HTML解析器:", self.html_parser_combo)
+
         html_layout.addLayout(options_layout)
 
         self.load_links_button = QPushButton("加载网页链接")
         self.load_links_button.clicked.connect(self.load_webpage_links)
         html_layout.addWidget(self.load_links_button)
 
-        self.links_list = QListWidget()
-        self.links_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+        self.links_list = FilteredItemView(SelectableListModel(), self.threadpool, "筛选标题或URL")
         html_layout.addWidget(self.links_list)
 
+        html_layout.addWidget(self.create_sitemap_options())
+
         html_group.setLayout(html_layout)
         return html_group
 
+    def create_sitemap_options(self):
+        """站点地图批量转换：网页地址边读取边转换，不加载到链接列表中"""
+        sitemap_group = QGroupBox("站点地图批量转换")
+        sitemap_layout = QFormLayout()
+
+        source_layout = QHBoxLayout()
+        self.sitemap_entry = QLineEdit()
+        self.sitemap_entry.setPlaceholderText("sitemap.xml、站点地图索引、.xml.gz 或每行一个URL的列表文件（路径或URL）")
+        source_layout.addWidget(self.sitemap_entry)
+        self.sitemap_browse_button = QPushButton("浏览")
+        self.sitemap_browse_button.clicked.connect(self.browse_sitemap)
+        source_layout.addWidget(self.sitemap_browse_button)
+        sitemap_layout.addRow("站点地图:", source_layout)
+
+        self.sitemap_url_pattern = QLineEdit()
+        self.sitemap_url_pattern.setPlaceholderText("如 /docs/*，多个模式用逗号分隔，留空为全部")
+        sitemap_layout.addRow("URL路径:", self.sitemap_url_pattern)
+
+        since_layout = QHBoxLayout()
+        self.sitemap_use_since = QCheckBox("只转换此日期之后修改的网页:")
+        since_layout.addWidget(self.sitemap_use_since)
+        self.sitemap_since = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.sitemap_since.setCalendarPopup(True)
+        self.sitemap_since.setDisplayFormat("yyyy-MM-dd")
+        since_layout.addWidget(self.sitemap_since)
+        since_layout.addStretch()
+        sitemap_layout.addRow(since_layout)
+
+        self.convert_sitemap_button = QPushButton("转换站点地图中的网页")
+        self.convert_sitemap_button.clicked.connect(self.convert_sitemap)
+        sitemap_layout.addRow(self.convert_sitemap_button)
+
+        sitemap_group.setLayout(sitemap_layout)
+        return sitemap_group
+
+    def browse_sitemap(self):
+        filenames = browse_files(self, "站点地图或URL列表 (*.xml *.gz *.txt *.urls);;所有文件 (*)")
+        if filenames:
+            self.sitemap_entry.setText(filenames[0])
+
     def toggle_html_options(self, state):
         enabled = not bool(state)
         self.html_ignore_links.setEnabled(enabled)
@@ -258,7 +403,7 @@ class MarkdownConverterApp(QMainWindow):
 
     def load_webpage_links(self):
         url = self.file_entry.text().strip()
-        self.html_handler.load_webpage_links(url, self.links_list)
+        self.html_handler.load_webpage_links(url, self.links_list, self.html_parser_combo.currentText())
 
     def create_pptx_options(self):
         pptx_group = QGroupBox("PPT转换选项")
@@ -273,6 +418,10 @@ class MarkdownConverterApp(QMainWindow):
         self.pptx_disable_image = QCheckBox("禁用图片提取")
         pptx_layout.addRow(self.pptx_disable_image)
 
+        self.pptx_optimize_images = QCheckBox("压缩并去重图片")
+        self.pptx_optimize_images.setChecked(True)
+        pptx_layout.addRow(self.pptx_optimize_images)
+
         self.pptx_disable_escaping = QCheckBox("不转义特殊字符")
         pptx_layout.addRow(self.pptx_disable_escaping)
 
@@ -309,12 +458,50 @@ class MarkdownConverterApp(QMainWindow):
         docx_latex_group.setLayout(docx_latex_layout)
         return docx_latex_group
 
+    def create_limits_options(self):
+        limits_group = QGroupBox("资源限制")
+        limits_layout = QFormLayout()
+
+        # 隔离模式下每个转换在单独的子进程中运行，异常的输入只会终止自己的任务
+        self.isolate_jobs = QCheckBox("每个文件在单独的进程中转换")
+        limits_layout.addRow(self.isolate_jobs)
+
+        self.memory_limit = QSpinBox()
+        self.memory_limit.setMinimum(0)
+        self.memory_limit.setMaximum(1024 * 1024)
+        self.memory_limit.setValue(0)
+        self.memory_limit.setSpecialValueText("不限")
+        limits_layout.addRow("内存上限 (MB):", self.memory_limit)
+
+        self.cpu_limit = QSpinBox()
+        self.cpu_limit.setMinimum(0)
+        self.cpu_limit.setMaximum(24 * 3600)
+        self.cpu_limit.setValue(0)
+        self.cpu_limit.setSpecialValueText("不限")
+        limits_layout.addRow("CPU时间上限 (秒):", self.cpu_limit)
+
+        self.time_limit = QSpinBox()
+        self.time_limit.setMinimum(0)
+        self.time_limit.setMaximum(24 * 3600)
+        self.time_limit.setValue(0)
+        self.time_limit.setSpecialValueText("不限")
+        limits_layout.addRow("运行时间上限 (秒):", self.time_limit)
+
+        self.max_part_size = QSpinBox()
+        self.max_part_size.setMinimum(0)
+        self.max_part_size.setMaximum(1024 * 1024)
+        self.max_part_size.setValue(1024)
+        self.max_part_size.setSpecialValueText("不限")
+        limits_layout.addRow("Office部件解压后最大 (MB):", self.max_part_size)
+
+        limits_group.setLayout(limits_layout)
+        return limits_group
+
     def create_markdown_merge_options(self):
         markdown_merge_group = QGroupBox("Markdown合并选项")
         markdown_merge_layout = QVBoxLayout()
 
-        self.markdown_files_list = QListWidget()
-        self.markdown_files_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+        self.markdown_files_list = FilteredItemView(SelectableListModel(), self.threadpool, "筛选文件名")
         markdown_merge_layout.addWidget(QLabel("选择要合并的Markdown文件:"))
         markdown_merge_layout.addWidget(self.markdown_files_list)
 
@@ -326,16 +513,22 @@ class MarkdownConverterApp(QMainWindow):
         return markdown_merge_group
 
     def update_markdown_files_list(self, filenames):
-        self.markdown_files_list.clear()
+        items = []
         for filename in filenames:
             if filename.lower().endswith('.md'):
-                item = QListWidgetItem(os.path.basename(filename))
-                item.setData(Qt.ItemDataRole.UserRole, filename)
-                self.markdown_files_list.addItem(item)
+                items.append((os.path.basename(filename), filename))
+            elif is_archive(filename):
+                # 归档中的Markdown文件直接从归档读取合并，不需要解压
+                try:
+                    items.extend((f"{os.path.basename(filename)}: {split_member_path(path)[1]}", path)
+                                 for path in list_markdown_members(filename))
+                except Exception as e:
+                    QMessageBox.warning(self, "警告", f"无法读取归档 {filename}: {str(e)}")
+        self.markdown_files_list.set_items(items)
 
     def merge_markdown_files(self):
-        selected_items = self.markdown_files_list.selectedItems()
-        if not selected_items:
+        selected_files = self.markdown_files_list.get_checked_keys()
+        if not selected_files:
             QMessageBox.warning(self, "警告", "请选择要合并的Markdown文件")
             return
 
@@ -344,8 +537,6 @@ class MarkdownConverterApp(QMainWindow):
             QMessageBox.warning(self, "警告", "请选择输出目录")
             return
 
-        selected_files = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
-        
         try:
             output_file = merge_markdown_files(selected_files, output_dir)
             QMessageBox.information(self, "成功", f"合并的Markdown文件已保存为: {output_file}")
@@ -364,7 +555,7 @@ class MarkdownConverterApp(QMainWindow):
             if len(filenames) == 1:
                 self.update_options_tab(filenames[0])
             
-            update_excel_sheets_tree(self.excel_sheets_tree, filenames)
+            self.excel_sheets_tree.load_workbooks(filenames)
         
         self.file_entry.setMinimumHeight(30)
         self.output_entry.setMinimumHeight(30)
@@ -385,7 +576,7 @@ class MarkdownConverterApp(QMainWindow):
             file_extension = os.path.splitext(filename)[1].lower()
             if file_extension == ".pdf":
                 self.options_tab.setCurrentIndex(0)
-            elif file_extension == ".xlsx":
+            elif file_extension in [".xlsx", ".csv", ".tsv"]:
                 self.options_tab.setCurrentIndex(4)
             elif file_extension in [".html", ".htm"]:
                 self.options_tab.setCurrentIndex(1)
@@ -413,17 +604,86 @@ class MarkdownConverterApp(QMainWindow):
             QMessageBox.critical(self, "错误", f"创建输出目录失败: {str(e)}")
             return
 
-        converted_files = []
-        for input_path in input_paths:
-            input_path = input_path.strip()
-            options = self.get_conversion_options()
-            result = self.converter.convert_file(input_path, output_dir, options)
-            if result:
-                if isinstance(result, list):
-                    converted_files.extend(result)
-                else:
-                    converted_files.append(result)
+        input_paths = [input_path.strip() for input_path in input_paths if input_path.strip()]
+        options = self.get_conversion_options()
+        if any(input_path.lower().endswith('.pdf') for input_path in input_paths):
+            self.settings_handler.save_pdf_settings(options['app_id'], options['secret_code'])
+
+        # 在后台线程中转换，界面保持响应；取消后正在运行的任务尽快停止，外部程序和隔离的子进程被终止
+        valid, archive_path = self.get_archive_path(output_dir)
+        if not valid:
+            return
+        worker = ConversionWorker(input_paths, output_dir, options, self.resume_batch.isChecked(), archive_path)
+        progress = QProgressDialog("正在转换...", "取消", 0, len(input_paths), self)
+        worker.signals.progress.connect(progress.setValue)
+        self.start_conversion(worker, progress)
+
+    def convert_sitemap(self):
+        """边读取站点地图边转换其中的网页，网页数量事先未知，进度显示已转换的网页数"""
+        sitemap = self.sitemap_entry.text().strip()
+        output_dir = self.output_entry.text()
+        if not sitemap:
+            QMessageBox.warning(self, "警告", "请输入站点地图或URL列表的路径或URL")
+            return
+        if not output_dir:
+            QMessageBox.warning(self, "警告", "请选择输出目录")
+            return
+        try:
+            ensure_output_directory(output_dir)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"创建输出目录失败: {str(e)}")
+            return
+        valid, archive_path = self.get_archive_path(output_dir)
+        if not valid:
+            return
 
+        options = self.get_conversion_options()
+        options.pop('selected_links', None)
+        since = self.sitemap_since.date().toPyDate() if self.sitemap_use_since.isChecked() else None
+        worker = SitemapConversionWorker(sitemap, output_dir, options, self.resume_batch.isChecked(), archive_path,
+                                         self.sitemap_url_pattern.text().strip(), since)
+        progress = QProgressDialog("正在读取站点地图...", "取消", 0, 0, self)
+        worker.signals.progress.connect(lambda done: progress.setLabelText(f"已转换 {done} 个网页..."))
+        self.start_conversion(worker, progress)
+
+    def get_archive_path(self, output_dir):
+        """勾选写入归档时的归档路径，返回 (设置是否有效, 归档路径或None)"""
+        if not self.write_archive.isChecked():
+            return True, None
+        if self.resume_batch.isChecked() and self.archive_format.currentText() in (".tar.gz", ".tar.xz"):
+            QMessageBox.warning(self, "警告", "压缩的tar归档不能追加，断点续转请使用 .zip 或 .tar")
+            return False, None
+        return True, os.path.join(output_dir, f"{ARCHIVE_NAME}{self.archive_format.currentText()}")
+
+    def start_conversion(self, worker, progress):
+        """显示可取消的进度对话框并在线程池中运行转换"""
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(worker.cancel)
+        progress.show()
+        worker.signals.finished.connect(
+            lambda converted_files, problems, cancelled: self.show_conversion_result(
+                converted_files, problems, cancelled, progress))
+        self.convert_button.setEnabled(False)
+        self.convert_sitemap_button.setEnabled(False)
+        self.threadpool.start(worker)
+
+    def show_conversion_result(self, converted_files, problems, cancelled, progress):
+        """转换结束后显示结果，转换中的警告和错误统一显示"""
+        progress.close()
+        self.convert_button.setEnabled(True)
+        self.convert_sitemap_button.setEnabled(True)
+        if cancelled:
+            QMessageBox.information(self, "已取消", f"转换已取消，已完成 {len(converted_files)} 个文件。"
+                                                  f"勾选“断点续转”后重新转换可继续未完成的输入。")
+            return
+        if problems:
+            # 站点地图等大批量转换可能有成千上万条警告，只显示前面的一部分
+            shown = problems[:MAX_SHOWN_PROBLEMS]
+            if len(problems) > len(shown):
+                shown.append(f"……另有 {len(problems) - len(shown)} 条警告和错误，详见输出目录中的批量转换日志")
+            QMessageBox.warning(self, "警告", "\n\n".join(shown))
         if converted_files:
             if len(converted_files) > 1:
                 QMessageBox.information(self, "完成", f"所有文件转换完成，共转换 {len(converted_files)} 个文件。")
@@ -434,11 +694,18 @@ class MarkdownConverterApp(QMainWindow):
 
     def get_conversion_options(self):
         options = {
+            'output_formats': [name for name, check in self.output_format_checks.items() if check.isChecked()],
+            'chunk_size': self.chunk_size.value(),
+            'chunk_unit': self.chunk_unit.currentData(),
             'use_jina_ai': self.use_jina_ai.isChecked(),
             'jina_api_key': self.jina_api_key.text(),
             'ignore_links': self.html_ignore_links.isChecked(),
             'ignore_images': self.html_ignore_images.isChecked(),
             'body_width': self.html_body_width.value(),
+            'max_page_size': self.html_max_page_size.value() * 1024 * 1024,
+            'html_parser': self.html_parser_combo.currentText(),
+            'localize_images': self.html_localize_images.isChecked(),
+            'max_image_size': self.html_max_image_size.value() * 1024 * 1024,
             'app_id': self.app_id_entry.text(),
             'secret_code': self.secret_code_entry.text(),
             'dpi': int(self.dpi_combo.currentText()),
@@ -450,25 +717,38 @@ class MarkdownConverterApp(QMainWindow):
             'parse_mode': self.parse_mode_combo.currentText(),
             'selected_sheets': self.get_selected_excel_sheets(),
             'has_header': self.excel_header.isChecked(),
+            'cell_range': self.excel_cell_range.text().strip(),
+            'columns': self.excel_columns.text().strip(),
+            'skip_empty_rows': self.excel_skip_empty_rows.isChecked(),
+            'skip_empty_columns': self.excel_skip_empty_columns.isChecked(),
+            'parallel_sheets': self.excel_parallel_sheets.isChecked(),
+            'row_limit': self.table_row_limit.value(),
+            'split_rows': self.table_split_rows.value(),
             'image_width': self.pptx_image_width.value(),
             'disable_image': self.pptx_disable_image.isChecked(),
+            'optimize_images': self.pptx_optimize_images.isChecked(),
             'disable_escaping': self.pptx_disable_escaping.isChecked(),
             'disable_notes': self.pptx_disable_notes.isChecked(),
             'disable_color': self.pptx_disable_color.isChecked(),
             'enable_slides': self.pptx_enable_slides.isChecked(),
             'min_block_size': self.pptx_min_block_size.value(),
             'output_format': self.pptx_output_format.currentText(),
+            'max_part_size': self.max_part_size.value() * 1024 * 1024,
+            'max_archive_size': 4 * self.max_part_size.value() * 1024 * 1024,
+            'isolate_jobs': self.isolate_jobs.isChecked(),
+            'memory_limit': self.memory_limit.value(),
+            'cpu_limit': self.cpu_limit.value(),
+            'time_limit': self.time_limit.value(),
         }
         
-        selected_links = [item.data(Qt.ItemDataRole.UserRole) for item in self.links_list.selectedItems()]
+        selected_links = self.links_list.get_checked_keys()
         if selected_links:
             options['selected_links'] = selected_links
         
         return options
 
     def get_selected_excel_sheets(self):
-        selected_items = self.excel_sheets_tree.selectedItems()
-        return [item.data(0, Qt.ItemDataRole.UserRole) for item in selected_items if item.parent()]
+        return self.excel_sheets_tree.model.get_checked_sheets()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import re
+from markdown_sink import get_temp_path
+
+# 按标题分块的清单：把输出的Markdown文件在标题处切分，每块不超过设定的字符数或估计的token数，
+# 表格不在行中间切开，每块的来源、标题路径、页/幻灯片/工作表、字节偏移和内容哈希写入同名的JSONL清单。
+# 下游的检索/向量化流程按清单中的字节范围直接读取各块并行处理，只需重新索引哈希变化的块。
+# 清单在Markdown文件写完后流式读取一遍生成，只保留当前块和当前段落，内存占用与文件大小无关。
+
+MANIFEST_SUFFIX = ".chunks.jsonl"
+DEFAULT_CHUNK_SIZE = 2000
+CHARS = 'chars'
+TOKENS = 'tokens'
+
+HEADING = re.compile(rb'^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*\r?\n?$')
+THEMATIC_BREAK = re.compile(rb'^ {0,3}(?:-[ \t]*){3,}\r?\n?$')
+TABLE_SEPARATOR = re.compile(rb'^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*\r?\n?$')
+FENCE = re.compile(rb'^ {0,3}(`{3,}|~{3,})')
+# 中日韩文字按每字约一个token估计，其他文字按每4个字符约一个token估计
+CJK = re.compile('[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]')
+
+TEXT = 'text'
+TABLE = 'table'
+CODE = 'code'
+
+def estimate_tokens(text):
+    """不依赖分词器的token数估计"""
+    cjk = len(CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def get_manifest_path(markdown_path):
+    """Markdown文件对应的清单路径：<name>.chunks.jsonl"""
+    return os.path.splitext(markdown_path)[0] + MANIFEST_SUFFIX
+
+class Chunk:
+    """正在累积的一块：连续的字节范围及其统计"""
+    __slots__ = ('offset', 'length', 'chars', 'tokens', 'hasher', 'has_content', 'heading_path', 'origin',
+                 'table_header')
+
+    def __init__(self, offset, table_header=None):
+        self.offset = offset
+        self.length = 0
+        self.chars = 0
+        self.tokens = 0
+        self.hasher = hashlib.sha256()
+        self.has_content = False
+        self.heading_path = None
+        self.origin = None
+        # 表格被拆开时，后续各块记录表头所在的字节范围，下游可以把表头拼到块前面
+        self.table_header = table_header
+
+class MarkdownChunker:
+    """
+    逐行读取Markdown，按标题和大小切分为块。
+
+    标题总是开始新的一块；同一标题下的段落、列表、表格和代码块整体放入一块，放不下时开始新的一块；
+    单个段落或表格本身超过上限时才在行之间切开，表格在数据行之间切开。
+
+    :param source: 来源（输入文件路径或URL），写入每条记录
+    :param max_size: 每块的上限，0为只按标题切分
+    :param unit: 上限的单位，CHARS（字符数）或 TOKENS（估计的token数）
+    :param origin: 每条记录都带有的来源位置，如 {'sheet': 'Sheet1'}
+    :param section_key: 设置后，前面有空行的分隔线（---）开始新的一节，记录中的 origin[section_key]
+                        为节的序号（从1开始）或 sections 中对应的值
+    :param sections: 各节的来源位置，如合并转换的各个网页地址
+    """
+
+    def __init__(self, source, max_size=DEFAULT_CHUNK_SIZE, unit=CHARS, origin=None, section_key=None,
+                 sections=None):
+        if unit not in (CHARS, TOKENS):
+            raise ValueError(f"不支持的分块单位: {unit}")
+        self.source = source
+        self.max_size = max_size
+        self.unit = unit
+        self.origin = dict(origin or {})
+        self.section_key = section_key
+        self.sections = sections
+        self.section = 0
+        self.heading_path = []
+        self.offset = 0
+        self.count = 0
+        self.records = []
+        self.chunk = Chunk(0)
+        # 当前段落（空行之间的连续行）中尚未放入块的行：[(字节, 字符数, token数), ...]
+        self.block = []
+        self.block_kind = None
+        self.block_size = 0
+        # 当前段落已超过上限，之后的行直接放入块，块满时在行之间切开
+        self.block_split = False
+        self.table_header = None
+        self.fence = None
+        self.after_blank = True
+
+    def iter_file(self, markdown_path):
+        """流式读取Markdown文件，逐条产出块记录"""
+        with open(markdown_path, 'rb') as f:
+            for line in f:
+                self.feed(line)
+                yield from self.drain()
+        self.finish()
+        yield from self.drain()
+
+    def drain(self):
+        records, self.records = self.records, []
+        return records
+
+    def measure(self, line):
+        text = line.decode('utf-8', errors='replace')
+        return len(text), estimate_tokens(text) if text.strip() else 0
+
+    def size_of(self, chars, tokens):
+        return tokens if self.unit == TOKENS else chars
+
+    def feed(self, line):
+        """处理一行（bytes，带换行符）"""
+        chars, tokens = self.measure(line)
+        entry = (line, chars, tokens)
+        start = self.offset
+        self.offset += len(line)
+
+        if self.fence is not None:
+            self.add_to_block(entry, CODE)
+            if line.lstrip().startswith(self.fence):
+                self.fence = None
+                self.end_block()
+            return
+
+        stripped = line.lstrip()
+        if not stripped:
+            self.end_block()
+            self.add_to_chunk(entry, content=False)
+            self.after_blank = True
+            return
+        after_blank, self.after_blank = self.after_blank, False
+        # 按行首字符决定要尝试的语法，普通文字行不做正则匹配
+        first = stripped[:1]
+
+        match = HEADING.match(line) if first == b'#' else None
+        if match:
+            self.end_block()
+            self.close_chunk()
+            level = len(match.group(1))
+            while self.heading_path and self.heading_path[-1][0] >= level:
+                self.heading_path.pop()
+            self.heading_path.append((level, match.group(2).decode('utf-8', errors='replace').strip()))
+            self.add_to_chunk(entry)
+            return
+
+        if first == b'-' and self.section_key and after_blank and THEMATIC_BREAK.match(line):
+            self.end_block()
+            self.close_chunk()
+            self.section += 1
+            self.add_to_chunk(entry, content=False)
+            return
+
+        match = FENCE.match(line) if first in (b'`', b'~') else None
+        if match:
+            self.end_block()
+            self.fence = match.group(1)[:3]
+            self.add_to_block(entry, CODE)
+            return
+
+        if first == b'|':
+            if self.block_kind != TABLE:
+                self.end_block()
+                self.table_header = [start, len(line), False]
+            elif self.table_header is not None and not self.table_header[2]:
+                # 表头之后的分隔行也属于表头
+                if TABLE_SEPARATOR.match(line):
+                    self.table_header[1] += len(line)
+                self.table_header[2] = True
+            self.add_to_block(entry, TABLE)
+            return
+
+        if self.block_kind not in (None, TEXT):
+            self.end_block()
+        self.add_to_block(entry, TEXT)
+
+    def add_to_block(self, entry, kind):
+        self.block_kind = kind
+        if self.block_split:
+            self.add_split_line(entry)
+            return
+        self.block.append(entry)
+        self.block_size += self.size_of(entry[1], entry[2])
+        if self.max_size and self.block_size > self.max_size:
+            # 段落本身超过上限，只能在行之间切开：接在当前块后面，块满时开始新的一块
+            self.block_split = True
+            lines, self.block, self.block_size = self.block, [], 0
+            for line_entry in lines:
+                self.add_split_line(line_entry)
+
+    def add_split_line(self, entry):
+        if self.chunk.has_content and self.chunk_size() + self.size_of(entry[1], entry[2]) > self.max_size:
+            self.close_chunk()
+            if self.block_kind == TABLE and self.table_header is not None:
+                self.chunk.table_header = {'offset': self.table_header[0], 'length': self.table_header[1]}
+        self.add_to_chunk(entry)
+
+    def end_block(self):
+        """段落结束：整体放入当前块，放不下时先结束当前块"""
+        if self.block:
+            if self.max_size and self.chunk.has_content and self.chunk_size() + self.block_size > self.max_size:
+                self.close_chunk()
+            for entry in self.block:
+                self.add_to_chunk(entry)
+        self.block = []
+        self.block_size = 0
+        self.block_kind = None
+        self.block_split = False
+        self.table_header = None
+
+    def chunk_size(self):
+        return self.size_of(self.chunk.chars, self.chunk.tokens)
+
+    def add_to_chunk(self, entry, content=True):
+        line, chars, tokens = entry
+        chunk = self.chunk
+        if content and not chunk.has_content:
+            chunk.has_content = True
+            chunk.heading_path = [text for level, text in self.heading_path]
+            chunk.origin = self.get_origin()
+        chunk.length += len(line)
+        chunk.chars += chars
+        chunk.tokens += tokens
+        chunk.hasher.update(line)
+
+    def get_origin(self):
+        origin = dict(self.origin)
+        if self.section_key:
+            if self.sections is None:
+                origin[self.section_key] = self.section + 1
+            elif self.section < len(self.sections):
+                origin[self.section_key] = self.sections[self.section]
+        return origin
+
+    def close_chunk(self):
+        """结束当前块并生成记录；只有空行的块并入下一块"""
+        chunk = self.chunk
+        if not chunk.has_content:
+            return
+        record = {
+            'chunk': self.count,
+            'source': self.source,
+            'heading_path': chunk.heading_path,
+            'origin': chunk.origin,
+            'offset': chunk.offset,
+            'length': chunk.length,
+            'chars': chunk.chars,
+            'tokens': chunk.tokens,
+            'hash': chunk.hasher.hexdigest(),
+        }
+        if chunk.table_header is not None:
+            record['table_header'] = chunk.table_header
+        self.records.append(record)
+        self.count += 1
+        self.chunk = Chunk(chunk.offset + chunk.length)
+
+    def finish(self):
+        self.end_block()
+        self.close_chunk()
+
+def write_chunk_manifest(markdown_path, source, options, origin=None, section_key=None, sections=None):
+    """
+    为一个Markdown文件生成分块清单，先写临时文件再原子替换。
+
+    :param options: 转换选项，取 chunk_size 和 chunk_unit
+    :return: 清单路径
+    """
+    chunker = MarkdownChunker(source, options.get('chunk_size') or DEFAULT_CHUNK_SIZE,
+                              options.get('chunk_unit') or CHARS, origin, section_key, sections)
+    manifest_path = get_manifest_path(markdown_path)
+    file_name = os.path.basename(markdown_path)
+    temp_path = get_temp_path(manifest_path)
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in chunker.iter_file(markdown_path):
+                f.write(json.dumps(dict(file=file_name, **record), ensure_ascii=False) + '\n')
+        os.replace(temp_path, manifest_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return manifest_path
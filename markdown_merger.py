@@ -1,14 +1,29 @@
 import os
+from markdown_sink import write_markdown
+from output_archive import ArchiveReaders
+
+CHUNK_SIZE = 64 * 1024
 
 def merge_markdown_files(selected_files, output_dir):
-    merged_content = []
-    for filename in selected_files:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        merged_content.append(f"# [{os.path.basename(filename)}]\n## Content\n{content}\n---\n")
+    """
+    合并Markdown文件。
 
+    :param selected_files: 文件路径，或 "<归档>!/<成员>" 形式的归档成员路径（见 output_archive）
+    """
     output_file = os.path.join(output_dir, "merged_markdown.md")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("\n".join(merged_content))
+    return write_markdown(iter_merged_markdown(selected_files), output_file)
 
-    return output_file
\ No newline at end of file
+def iter_merged_markdown(selected_files):
+    """逐块产出合并后的内容，不把所有文件同时读入内存；同一归档中的文件直接从归档读取，归档只打开一次"""
+    with ArchiveReaders() as archives:
+        for index, filename in enumerate(selected_files):
+            if index:
+                yield "\n"
+            yield f"# [{os.path.basename(filename)}]\n## Content\n"
+            with archives.open_text(filename) as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield "\n---\n"
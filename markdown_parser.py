@@ -0,0 +1,216 @@
+import re
+from urllib.parse import unquote
+from document_ir import (BOLD, ITALIC, CODE, STRIKE, Span, Heading, Paragraph, ListItem, Table, CodeBlock, Image,
+                         Boundary)
+
+# 把外部工具（html2text、TextIn、pptx2md、pandoc）输出的Markdown逐行解析为中间文档的块节点，
+# 供Wiki、纯文本和JSON渲染器使用。只识别这些工具实际会输出的语法：
+# ATX标题、段落、列表、管道表格、代码块、引用、分隔线、独占一行的图片（含 <img> 标签）和常见的行内样式。
+# 解析按行进行，只有未结束的段落、表格或代码块留在内存中。
+
+HEADING = re.compile(r'^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$')
+THEMATIC_BREAK = re.compile(r'^ {0,3}(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$')
+TABLE_SEPARATOR = re.compile(r'^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$')
+FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)')
+LIST_ITEM = re.compile(r'^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$')
+BLOCKQUOTE = re.compile(r'^ {0,3}>[ \t]?')
+# 独占一行的图片：![替代文字](地址) 后面可带 Quarto 的 {width:...}，或 <img src="...">
+MARKDOWN_IMAGE_LINE = re.compile(r'^[ \t]*!\[([^\]]*)\]\(\s*<?([^)<>\s]*(?: [^)<>\s]+)*)>?(?:\s+"[^"]*")?\s*\)'
+                                 r'(?:\{[^}]*\})?[ \t]*$')
+HTML_IMAGE_LINE = re.compile(r'^[ \t]*<img\b([^>]*)/?>[ \t]*$', re.IGNORECASE)
+HTML_ATTRIBUTE = re.compile(r'''([a-zA-Z-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+PIXELS = re.compile(r'(\d+)(?:px)?')
+# 行内语法，按出现位置依次匹配
+INLINE = re.compile(
+    r'\\(?P<escaped>[\\`*_{}\[\]()#+\-.!|~<>])'
+    r'|(?P<code_ticks>`+)(?P<code>.+?)(?P=code_ticks)'
+    r'|!\[(?P<image_alt>[^\]]*)\]\([^)]*\)'
+    r'|\[(?P<link_text>[^\]]*)\]\(\s*<?(?P<href>[^)\s>]*)>?(?:\s+"[^"]*")?\s*\)'
+    r'|\*\*\*(?P<bold_italic>.+?)\*\*\*'
+    r'|\*\*(?P<bold>.+?)\*\*|__(?P<bold_underscore>.+?)__'
+    r'|~~(?P<strike>.+?)~~'
+    r'|\*(?P<italic>[^*\s](?:.*?[^*\s])?)\*|(?<!\w)_(?P<italic_underscore>[^_\s](?:.*?[^_\s])?)_(?!\w)'
+    r'|<br\s*/?>'
+    r'|</?[a-zA-Z][^>]*>',
+)
+
+def parse_spans(text, style=0, href=None):
+    """把一段行内Markdown解析为 Span 列表；未能识别的标记按文字保留，HTML标签被去掉"""
+    spans = []
+    plain = []
+    position = 0
+
+    def flush():
+        if plain:
+            spans.append(Span(''.join(plain), style, href))
+            plain.clear()
+
+    for match in INLINE.finditer(text):
+        plain.append(text[position:match.start()])
+        position = match.end()
+        groups = match.groupdict()
+        if groups['escaped'] is not None:
+            plain.append(groups['escaped'])
+        elif groups['code'] is not None:
+            flush()
+            spans.append(Span(groups['code'].strip(), style | CODE, href))
+        elif groups['image_alt'] is not None:
+            plain.append(groups['image_alt'])
+        elif groups['link_text'] is not None:
+            flush()
+            spans.extend(parse_spans(groups['link_text'], style, groups['href'] or href))
+        elif match.group(0).lower().startswith('<br'):
+            plain.append('\n')
+        elif match.group(0).startswith('<'):
+            continue
+        else:
+            flush()
+            for name, flag in (('bold_italic', BOLD | ITALIC), ('bold', BOLD), ('bold_underscore', BOLD),
+                               ('strike', STRIKE), ('italic', ITALIC), ('italic_underscore', ITALIC)):
+                if groups[name] is not None:
+                    spans.extend(parse_spans(groups[name], style | flag, href))
+                    break
+    plain.append(text[position:])
+    flush()
+    return [span for span in spans if span.text]
+
+def split_table_row(line):
+    """拆分管道表格的一行，保留转义的竖线"""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    cells = re.split(r'(?<!\\)\|', line)
+    return [plain_cell(cell) for cell in cells]
+
+def plain_cell(cell):
+    return ''.join(span.text for span in parse_spans(cell.strip().replace('\\|', '|')))
+
+def parse_image_line(line):
+    """独占一行的图片，返回 Image，不是图片时返回None"""
+    match = MARKDOWN_IMAGE_LINE.match(line)
+    if match:
+        src = match.group(2)
+        return Image(src if '://' in src else unquote(src), match.group(1))
+    match = HTML_IMAGE_LINE.match(line)
+    if not match:
+        return None
+    attributes = {}
+    for name, double, single, bare in HTML_ATTRIBUTE.findall(match.group(1)):
+        attributes[name.lower()] = double or single or bare
+    if not attributes.get('src'):
+        return None
+    width = attributes.get('width')
+    if width is None:
+        # pptx2md 输出 style="max-width:800px;"
+        style = dict(part.split(':', 1) for part in attributes.get('style', '').split(';') if ':' in part)
+        width = style.get('max-width', style.get('width'))
+    width = PIXELS.match(width.strip()) if width else None
+    return Image(attributes['src'], attributes.get('alt', ''), int(width.group(1)) if width else None)
+
+class MarkdownBlockParser:
+    """
+    逐行解析Markdown，feed 返回已经完整的块节点。
+
+    :param break_kind: 分隔线对应的 Boundary 类型；第一条分隔线之后为第2部分
+    """
+
+    def __init__(self, break_kind='section'):
+        self.break_kind = break_kind
+        self.breaks = 0
+        self.paragraph = []
+        self.table = None
+        self.fence = None
+        self.code = []
+        self.language = ''
+        # 当前列表第一项的缩进，html2text 的顶层列表项也缩进两格
+        self.list_indent = None
+
+    def feed(self, text):
+        """解析若干完整的行，返回其中已经结束的块节点列表"""
+        blocks = []
+        for line in text.splitlines():
+            self.feed_line(line, blocks)
+        return blocks
+
+    def close(self):
+        """输入结束，返回尚未结束的块"""
+        blocks = []
+        if self.fence is not None:
+            blocks.append(CodeBlock('\n'.join(self.code), self.language))
+            self.fence = None
+        self.flush(blocks)
+        return blocks
+
+    def flush(self, blocks):
+        if self.paragraph:
+            spans = parse_spans(' '.join(line.strip() for line in self.paragraph))
+            if spans:
+                blocks.append(Paragraph(spans))
+            self.paragraph = []
+        if self.table is not None:
+            blocks.append(self.table)
+            self.table = None
+
+    def feed_line(self, line, blocks):
+        if self.fence is not None:
+            if line.strip().startswith(self.fence):
+                blocks.append(CodeBlock('\n'.join(self.code), self.language))
+                self.fence = None
+                self.code = []
+            else:
+                self.code.append(line)
+            return
+        if not line.strip():
+            self.flush(blocks)
+            return
+        if self.table is not None:
+            if line.lstrip().startswith('|'):
+                self.table.rows.append(split_table_row(line))
+                return
+            self.flush(blocks)
+        match = FENCE.match(line)
+        if match:
+            self.flush(blocks)
+            self.fence = match.group(1)
+            self.language = match.group(2)
+            return
+        if TABLE_SEPARATOR.match(line) and '|' in line and len(self.paragraph) >= 1 \
+                and self.paragraph[-1].lstrip().startswith('|'):
+            header = split_table_row(self.paragraph.pop())
+            self.flush(blocks)
+            self.table = Table(header, [])
+            return
+        match = HEADING.match(line)
+        if match:
+            self.flush(blocks)
+            blocks.append(Heading(len(match.group(1)), parse_spans(match.group(2))))
+            return
+        if THEMATIC_BREAK.match(line):
+            self.flush(blocks)
+            self.breaks += 1
+            blocks.append(Boundary(self.break_kind, self.breaks + 1))
+            return
+        image = parse_image_line(line)
+        if image is not None:
+            self.flush(blocks)
+            blocks.append(image)
+            return
+        match = LIST_ITEM.match(line)
+        if match:
+            self.flush(blocks)
+            indent = len(match.group(1).expandtabs(4))
+            if self.list_indent is None or indent < self.list_indent:
+                self.list_indent = indent
+            level = (indent - self.list_indent) // 2
+            blocks.append(ListItem(parse_spans(match.group(3)), level, match.group(2)[0].isdigit()))
+            return
+        self.list_indent = None
+        match = BLOCKQUOTE.match(line)
+        if match:
+            line = line[match.end():]
+            if not line.strip():
+                self.flush(blocks)
+                return
+        self.paragraph.append(line)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from urllib.parse import urlparse
+
+# 统一的转换器接口：每个转换模块提供 iter_markdown(input_path, options)，
+# 逐块产出Markdown字符串和 Asset 附属文件记录；写盘统一由本模块完成。
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# 按网页地址生成的文件名的最大长度（不含摘要和扩展名）
+MAX_URL_FILE_NAME = 120
+
+class Asset:
+    """
+    转换过程中产生的附属文件（如图片）。
+
+    :param name: 相对于资源目录的文件名
+    :param data: 文件内容（bytes），与 source_path 二选一
+    :param source_path: 已存在于磁盘上的源文件，写出时移动过去
+    """
+    __slots__ = ('name', 'data', 'source_path')
+
+    def __init__(self, name, data=None, source_path=None):
+        self.name = name
+        self.data = data
+        self.source_path = source_path
+
+def get_safe_filename(filename):
+    """去掉文件名中的非法字符"""
+    return "".join([c for c in filename if c.isalnum() or c in (' ', '-', '_')]).rstrip()
+
+def get_url_file_name(url):
+    """
+    由网页地址生成文件名：域名和路径各段用下划线连接，如 example.com_docs_intro。
+
+    地址带查询参数或过长时截断并附加地址摘要，不同地址的文件名不会相同。
+    """
+    parsed = urlparse(url)
+    path = re.sub(r'\.(?:s?html?|php|aspx?|jsp)$', '', parsed.path, flags=re.IGNORECASE)
+    parts = [parsed.netloc] + path.split('/')
+    name = re.sub(r'[^\w.-]+', '_', "_".join(part for part in parts if part)).strip('._') or "webpage"
+    if parsed.query or len(name) > MAX_URL_FILE_NAME:
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        name = f"{name[:MAX_URL_FILE_NAME]}_{digest}"
+    return name
+
+def get_output_path(output_dir, base_name, suffix="", extension=".md"):
+    """按统一规则生成输出文件路径，默认为Markdown文件"""
+    return os.path.join(output_dir, f"{base_name}{suffix}{extension}")
+
+def get_asset_dir(output_path):
+    """输出文件对应的资源目录：<name>_img"""
+    return f"{os.path.splitext(output_path)[0]}_img"
+
+def get_temp_path(output_path):
+    """同目录下的唯一临时文件路径，写完后用 os.replace 原子替换"""
+    directory, name = os.path.split(os.path.abspath(output_path))
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+
+def iter_text(chunks):
+    """丢弃资源记录，只保留Markdown文本块，用于合并等只关心文本的下游"""
+    for chunk in chunks:
+        if not isinstance(chunk, Asset):
+            yield chunk
+
+class MarkdownFileSink:
+    """
+    将Markdown块写入文件。
+
+    内容先带缓冲写入同目录下的临时文件，全部成功后再原子替换为目标文件，
+    中途失败不会留下残缺的输出。资源文件写入 <name>_img 目录。
+    """
+
+    def __init__(self, output_path, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.output_path = output_path
+        self.asset_dir = get_asset_dir(output_path)
+        self.buffer_size = buffer_size
+        self.temp_path = None
+        self.file = None
+
+    def write(self, chunks):
+        """
+        写入全部块。
+
+        :param chunks: 产出字符串或 Asset 的可迭代对象
+        :return: 输出文件路径
+        """
+        self.open()
+        try:
+            for chunk in chunks:
+                self.write_chunk(chunk)
+        except BaseException:
+            self.abort()
+            raise
+        return self.commit()
+
+    def open(self):
+        """开始写入临时文件；之后逐块调用 write_chunk，最后 commit 或 abort"""
+        self.temp_path = get_temp_path(self.output_path)
+        self.file = open(self.temp_path, 'w', encoding='utf-8', buffering=self.buffer_size)
+
+    def write_chunk(self, chunk):
+        if isinstance(chunk, Asset):
+            self.write_asset(chunk)
+        else:
+            self.file.write(chunk)
+
+    def commit(self):
+        """完成写入，原子替换为目标文件"""
+        try:
+            self.file.close()
+            os.replace(self.temp_path, self.output_path)
+        except BaseException:
+            self.abort()
+            raise
+        return self.output_path
+
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        if self.file is not None:
+            self.file.close()
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def write_asset(self, asset):
+        """写出单个资源文件，返回其路径"""
+        os.makedirs(self.asset_dir, exist_ok=True)
+        target = os.path.join(self.asset_dir, asset.name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if asset.source_path is not None:
+            shutil.move(asset.source_path, target)
+        else:
+            with open(target, 'wb') as f:
+                f.write(asset.data)
+        return target
+
+def write_markdown(chunks, output_path):
+    """把转换器产出的块写入 output_path，返回输出路径"""
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    return MarkdownFileSink(output_path).write(chunks)
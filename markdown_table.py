@@ -0,0 +1,120 @@
+import os
+from itertools import islice
+from markdown_sink import get_output_path, write_markdown
+
+EMPTY_TABLE = "| 空表格 |\n|-|\n"
+
+def escape_cell(value):
+    """转义单元格内容，避免竖线和换行破坏Markdown表格"""
+    if not value:
+        return ''
+    if '|' in value:
+        value = value.replace('|', '\\|')
+    if '\n' in value or '\r' in value:
+        value = value.replace('\r\n', '<br>').replace('\n', '<br>').replace('\r', '<br>')
+    return value
+
+def format_row(row, width=0):
+    """把一行转为Markdown表格行，不足 width 列时补空单元格"""
+    line = "|".join(row)
+    # 绝大多数行不含特殊字符，整行检查一次即可跳过逐个单元格转义
+    if line.count('|') != len(row) - 1 or '\n' in line or '\r' in line:
+        line = "|".join([escape_cell(value) for value in row])
+    if len(row) < width:
+        line += "|" * (width - len(row))
+    return "|" + line + "|\n"
+
+def get_header(first_row, has_header):
+    """返回表头行；没有表头时生成 Column 1, Column 2 ..."""
+    if has_header:
+        return list(first_row)
+    return [f"Column {i+1}" for i in range(len(first_row))]
+
+def generate_markdown_table(data, has_header):
+    """生成Markdown格式的表格"""
+    return "".join(iter_markdown_table(data, has_header))
+
+def iter_markdown_table(data, has_header):
+    """
+    逐行产出Markdown格式的表格。
+
+    :param data: 行的可迭代对象，每行是字符串列表；可以是流式读取的迭代器
+    :param has_header: 是否将第一行视为表头
+    """
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
+        yield EMPTY_TABLE
+        return
+
+    header = get_header(first_row, has_header)
+    yield from iter_table_part(header, None if has_header else first_row, rows)
+
+def iter_table_part(header, first_row, rows, limit=None):
+    """产出表头、分隔行以及最多 limit 行数据"""
+    width = len(header)
+    yield format_row(header)
+    yield "|" + "|".join(["-" for _ in header]) + "|\n"
+    if first_row is not None:
+        yield format_row(first_row, width)
+        if limit is not None:
+            limit -= 1
+    for row in (rows if limit is None else islice(rows, limit)):
+        yield format_row(row, width)
+
+def get_part_path(output_path, part):
+    """拆分输出时第 part 个文件的路径，第一个文件使用原路径"""
+    if part == 1:
+        return output_path
+    base, _ = os.path.splitext(output_path)
+    return get_output_path(os.path.dirname(output_path), os.path.basename(base), f"-part{part}")
+
+def write_markdown_tables(data, has_header, output_path, split_rows=0, row_limit=0):
+    """
+    流式写出Markdown表格，可限制行数或拆分为多个文件。
+
+    :param data: 行的可迭代对象
+    :param has_header: 是否将第一行视为表头
+    :param output_path: 输出文件路径，拆分时后续文件为 <name>-part2.md、<name>-part3.md ...
+    :param split_rows: 每个文件最多包含的数据行数，0为不拆分；每个文件都会重复表头
+    :param row_limit: 最多转换的数据行数，0为不限制
+    :return: 写出的文件路径列表
+    """
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
+        outputs = [write_markdown(EMPTY_TABLE, output_path)]
+        remove_stale_parts(output_path, 2)
+        return outputs
+
+    header = get_header(first_row, has_header)
+    pending = None if has_header else first_row
+    if row_limit:
+        rows = islice(rows, row_limit if has_header else row_limit - 1)
+
+    outputs = []
+    part = 1
+    while True:
+        part_path = get_part_path(output_path, part)
+        outputs.append(write_markdown(iter_table_part(header, pending, rows, split_rows or None), part_path))
+        if not split_rows:
+            break
+        pending = next(rows, None)
+        if pending is None:
+            break
+        part += 1
+    remove_stale_parts(output_path, part + 1)
+    return outputs
+
+def remove_stale_parts(output_path, first_part):
+    """
+    删除上次拆分留下、这次没有写到的 <name>-partN.md，
+    避免行数变少或同名输入（如 x.csv 和 x.tsv）先后写入同一路径后残留其他表格的部分。
+    """
+    part = first_part
+    while True:
+        part_path = get_part_path(output_path, part)
+        if not os.path.isfile(part_path):
+            break
+        os.remove(part_path)
+        part += 1
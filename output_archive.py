@@ -0,0 +1,271 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+import warnings
+import zipfile
+from contextlib import contextmanager
+
+# 归档输出：批量转换的全部结果写入一个 zip 或 tar 归档，而不是在输出目录中生成大量小文件。
+# 每个任务先输出到本地临时目录，任务结束后立即把其中的文件（Markdown、图片目录、分块清单）
+# 逐个流式写入归档并删除临时目录，归档不在内存中缓冲。
+# 关闭时写入索引成员 INDEX_NAME（JSONL，每个成员一行：输入、成员名、大小、SHA-256），
+# tar 没有中央目录，索引同时给出未压缩 tar 中各成员数据的偏移，便于直接定位读取。
+# 归档中的文件用 "<归档路径>!/<成员名>" 表示，批量转换日志和合并功能都使用这种路径。
+
+INDEX_NAME = ".mdeverything_index.jsonl"
+MEMBER_SEPARATOR = "!/"
+COPY_BUFFER_SIZE = 1024 * 1024
+# 扩展名 -> (类型, tarfile写入模式)
+ARCHIVE_TYPES = (
+    ('.tar.gz', ('tar', 'w:gz')),
+    ('.tgz', ('tar', 'w:gz')),
+    ('.tar.bz2', ('tar', 'w:bz2')),
+    ('.tar.xz', ('tar', 'w:xz')),
+    ('.tar', ('tar', 'w')),
+    ('.zip', ('zip', None)),
+)
+
+def get_archive_type(path):
+    """按扩展名返回 (类型, tar写入模式)，不是归档时返回 (None, None)"""
+    lower = path.lower()
+    for extension, archive_type in ARCHIVE_TYPES:
+        if lower.endswith(extension):
+            return archive_type
+    return None, None
+
+def is_archive(path):
+    return get_archive_type(path)[0] is not None
+
+def member_path(archive_path, name):
+    """归档中一个成员的路径表示"""
+    return f"{archive_path}{MEMBER_SEPARATOR}{name}"
+
+def split_member_path(path):
+    """拆分为 (归档路径, 成员名)，普通文件路径返回 (None, path)"""
+    archive_path, separator, name = path.partition(MEMBER_SEPARATOR)
+    if separator and is_archive(archive_path):
+        return archive_path, name
+    return None, path
+
+def output_exists(path):
+    """输出文件是否还在；归档成员只检查归档文件本身"""
+    archive_path, _ = split_member_path(path)
+    return os.path.exists(archive_path or path)
+
+@contextmanager
+def ignore_duplicate_names():
+    """断点续转时同名成员会再写一次，读取时以最后一次为准，不需要 zipfile 的重名警告"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', 'Duplicate name', UserWarning)
+        yield
+
+class HashingReader:
+    """读取时计算 SHA-256 和字节数的文件包装，供 tarfile.addfile 使用"""
+
+    def __init__(self, file):
+        self.file = file
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hasher.update(data)
+        self.size += len(data)
+        return data
+
+class OutputArchive:
+    """
+    按任务结束的顺序把输出写入一个归档。
+
+    :param path: 归档路径，类型由扩展名决定：.zip、.tar、.tar.gz/.tgz、.tar.bz2、.tar.xz
+    :param compress: zip 是否压缩（deflate），tar 的压缩方式由扩展名决定
+    :param append: 追加到已有的归档（断点续转），压缩的 tar 不支持追加
+    """
+
+    def __init__(self, path, compress=True, append=False):
+        self.path = os.path.abspath(path)
+        self.kind, self.tar_mode = get_archive_type(path)
+        if self.kind is None:
+            raise ValueError(f"不支持的归档格式: {path}（支持 .zip、.tar、.tar.gz、.tar.bz2、.tar.xz）")
+        self.compress = compress
+        self.entries = []
+        append = append and os.path.exists(self.path)
+        if append:
+            if self.kind == 'tar' and self.tar_mode != 'w':
+                raise ValueError(f"压缩的tar归档不能追加，断点续转请使用 .zip 或 .tar: {path}")
+            with ArchiveReader(self.path) as reader:
+                self.entries = reader.read_index() or []
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.kind == 'zip':
+            self.archive = zipfile.ZipFile(self.path, 'a' if append else 'w', allowZip64=True)
+        else:
+            self.archive = tarfile.open(self.path, 'a' if append else self.tar_mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_outputs(self, input_path, staging_dir, result):
+        """
+        把一个任务在临时目录中生成的全部文件写入归档。
+
+        :param staging_dir: 任务的临时输出目录
+        :param result: convert_file 的返回值，其中的路径都在 staging_dir 中
+        :return: result 中各路径对应的归档成员路径列表
+        """
+        for root, dirs, files in os.walk(staging_dir):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, staging_dir).replace(os.sep, '/')
+                self.add_file(input_path, path, name)
+        if not result:
+            return []
+        results = result if isinstance(result, list) else [result]
+        return [member_path(self.path, os.path.relpath(path, staging_dir).replace(os.sep, '/'))
+                for path in results]
+
+    def add_file(self, input_path, path, name):
+        """流式写入一个文件并记入索引"""
+        entry = {'input': input_path, 'name': name}
+        with open(path, 'rb') as f:
+            if self.kind == 'zip':
+                info = zipfile.ZipInfo.from_file(path, name)
+                info.compress_type = zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED
+                hasher = hashlib.sha256()
+                with ignore_duplicate_names(), self.archive.open(info, 'w') as target:
+                    while True:
+                        data = f.read(COPY_BUFFER_SIZE)
+                        if not data:
+                            break
+                        hasher.update(data)
+                        target.write(data)
+                entry['size'] = info.file_size
+                entry['sha256'] = hasher.hexdigest()
+            else:
+                info = self.archive.gettarinfo(path, name)
+                reader = HashingReader(f)
+                self.archive.addfile(info, reader)
+                entry['size'] = reader.size
+                entry['sha256'] = reader.hasher.hexdigest()
+                if self.tar_mode == 'w':
+                    # 成员数据之后按512字节块对齐，由写入后的位置倒推数据的起始偏移
+                    blocks, remainder = divmod(reader.size, tarfile.BLOCKSIZE)
+                    entry['offset'] = self.archive.offset - (blocks + bool(remainder)) * tarfile.BLOCKSIZE
+        entry['time'] = time.time()
+        self.entries.append(entry)
+
+    def close(self):
+        """写入索引并关闭归档"""
+        if self.archive is None:
+            return
+        try:
+            data = "".join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in self.entries).encode('utf-8')
+            if self.kind == 'zip':
+                info = zipfile.ZipInfo(INDEX_NAME, time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED
+                with ignore_duplicate_names():
+                    self.archive.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(INDEX_NAME)
+                info.size = len(data)
+                info.mtime = time.time()
+                self.archive.addfile(info, io.BytesIO(data))
+        finally:
+            self.archive.close()
+            self.archive = None
+
+class ArchiveReader:
+    """
+    读取 OutputArchive 写出的归档（也可读取一般的 zip/tar）。
+
+    同名成员以最后一次写入的为准。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.kind, _ = get_archive_type(path)
+        if self.kind == 'zip':
+            self.archive = zipfile.ZipFile(path)
+        elif self.kind == 'tar':
+            self.archive = tarfile.open(path, 'r:*')
+        else:
+            raise ValueError(f"不支持的归档格式: {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+
+    def names(self):
+        """全部文件成员名，去重并保持首次出现的顺序"""
+        if self.kind == 'zip':
+            names = (info.filename for info in self.archive.infolist() if not info.is_dir())
+        else:
+            names = (member.name for member in self.archive.getmembers() if member.isfile())
+        return list(dict.fromkeys(names))
+
+    def read_index(self):
+        """读取索引，没有索引时返回None"""
+        try:
+            with self.open(INDEX_NAME) as f:
+                return [json.loads(line) for line in io.TextIOWrapper(f, encoding='utf-8') if line.strip()]
+        except KeyError:
+            return None
+
+    def markdown_names(self):
+        """归档中的Markdown文件，有索引时按写入顺序"""
+        index = self.read_index()
+        names = [entry['name'] for entry in index] if index is not None else self.names()
+        return [name for name in dict.fromkeys(names) if name.lower().endswith('.md')]
+
+    def open(self, name):
+        """以二进制方式打开一个成员，不存在时抛出 KeyError"""
+        if self.kind == 'zip':
+            return self.archive.open(name)
+        f = self.archive.extractfile(name)
+        if f is None:
+            raise KeyError(name)
+        return f
+
+    def open_text(self, name):
+        return io.TextIOWrapper(self.open(name), encoding='utf-8')
+
+class ArchiveReaders:
+    """按需打开并缓存多个归档，读取一组可能位于不同归档中的文件时每个归档只打开一次"""
+
+    def __init__(self):
+        self.readers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for reader in self.readers.values():
+            reader.close()
+        self.readers = {}
+
+    def open_text(self, path):
+        """打开普通文件或 "<归档>!/<成员>" 形式的归档成员"""
+        archive_path, name = split_member_path(path)
+        if archive_path is None:
+            return open(path, 'r', encoding='utf-8')
+        if archive_path not in self.readers:
+            self.readers[archive_path] = ArchiveReader(archive_path)
+        return self.readers[archive_path].open_text(name)
+
+def list_markdown_members(archive_path):
+    """归档中全部Markdown文件的成员路径"""
+    with ArchiveReader(archive_path) as reader:
+        return [member_path(archive_path, name) for name in reader.markdown_names()]
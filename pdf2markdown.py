@@ -1,4 +1,23 @@
+import base64
+import json
+import mmap
+import os
+import re
+import tempfile
 import requests
+from deadline import Cancelled, Deadline
+from markdown_sink import get_output_path
+
+API_URL = "https://api.textin.com/ai/service/v1/pdf_to_markdown"
+# 接口在上传完成后才开始识别，大文件要等较长时间才返回第一个字节
+API_READ_TIMEOUT = 300
+
+# 响应先流式写入临时文件，再以内存映射方式解析，图片的base64数据不整体读入内存
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+MARKDOWN_CHUNK_SIZE = 64 * 1024
+PAYLOAD_KEY = re.compile(rb'"(base64str|base64|image_base64)"\s*:\s*"')
+# 解析时用来替代base64字段的占位字符串（\u0000 不会出现在正常的接口数据中）
+PAYLOAD_MARKER = '\x00payload:'
 
 def pdf_to_markdown(pdf_file_path, app_id=None, secret_code=None, **kwargs):
     """
@@ -10,13 +29,53 @@ def pdf_to_markdown(pdf_file_path, app_id=None, secret_code=None, **kwargs):
     :param kwargs: 其他可选参数
     :return: 转换后的Markdown内容
     """
-    url = "https://api.textin.com/ai/service/v1/pdf_to_markdown"
-    
+    with fetch_textin_result(pdf_file_path, app_id, secret_code, **kwargs) as result:
+        return result.markdown
+
+def iter_markdown(input_path, options):
+    """
+    统一转换接口：逐块产出PDF转换后的Markdown。
+
+    get_image 不为 none 时，接口返回的图片（base64数据或图片地址）在线程池中逐张解码、
+    按内容去重后写入 <name>_img 目录，Markdown中的图片链接改写为相对路径。
+    """
+    if options.get('get_image', 'none') == 'none':
+        yield pdf_to_markdown(input_path, **options)
+        return
+
+    from image_localizer import ImageLocalizer, DEFAULT_MAX_WORKERS, DEFAULT_MAX_IMAGE_SIZE
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    with fetch_textin_result(input_path, **options) as result:
+        with ImageLocalizer(max_workers=options.get('image_workers') or DEFAULT_MAX_WORKERS,
+                            max_image_size=options.get('max_image_size', DEFAULT_MAX_IMAGE_SIZE),
+                            deadline=options.get('deadline')) as localizer:
+            for src, payload in result.iter_images():
+                localizer.add_payload(src, payload.read)
+            yield from localizer.localize(iter_chunks(result.markdown), get_output_path('', base_name))
+            yield from localizer.iter_unreferenced()
+
+def iter_chunks(text, size=MARKDOWN_CHUNK_SIZE):
+    """把Markdown按大约 size 个字符在换行处切块"""
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start + size)
+        end = len(text) if end == -1 else end + 1
+        yield text[start:end]
+        start = end
+
+def fetch_textin_result(pdf_file_path, app_id=None, secret_code=None, **kwargs):
+    """
+    调用TextIn接口，响应流式写入临时文件后解析。
+
+    kwargs 中的 deadline（Deadline）决定请求超时；等待接口返回期间定期检查，取消或超时时立即抛出异常。
+
+    :return: TextInResult，需要关闭（可用于with语句）
+    """
     headers = {
         "x-ti-app-id": app_id or "your_app_id_here",
         "x-ti-secret-code": secret_code or "your_secret_code_here"
     }
-    
+
     params = {
         "apply_document_tree": kwargs.get('apply_document_tree', 1),
         "markdown_details": kwargs.get('markdown_details', 1),
@@ -24,25 +83,143 @@ def pdf_to_markdown(pdf_file_path, app_id=None, secret_code=None, **kwargs):
         "get_image": kwargs.get('get_image', "none"),
         "dpi": kwargs.get('dpi', 144)
     }
-    
+
+    deadline = kwargs.get('deadline') or Deadline()
+    return deadline.call(request_textin_result, pdf_file_path, headers, params, deadline)
+
+def request_textin_result(pdf_file_path, headers, params, deadline):
+    """上传PDF并把响应写入临时文件，在 Deadline.call 的后台线程中运行"""
+    response_file = None
     try:
         with open(pdf_file_path, "rb") as file:
-            pdf_content = file.read()
-        
-        response = requests.post(url, headers=headers, params=params, data=pdf_content)
-        response.raise_for_status()
-        
-        result = response.json()
-        if result["code"] == 200:
-            return result["result"]["markdown"]
-        else:
-            raise APIError(f"API错误: {result['message']}")
+            with requests.post(API_URL, headers=headers, params=params, data=file, stream=True,
+                               timeout=deadline.get_timeout(read=API_READ_TIMEOUT)) as response:
+                response.raise_for_status()
+                response_file = tempfile.TemporaryFile(prefix='textin')
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    deadline.check()
+                    response_file.write(chunk)
+        result = TextInResult(response_file)
+        if result.code != 200:
+            message = result.message
+            result.close()
+            raise APIError(f"API错误: {message}")
+        return result
+    except (APIError, Cancelled):
+        raise
     except requests.RequestException as e:
         raise ConnectionError(f"HTTP请求错误: {str(e)}")
     except IOError as e:
         raise FileNotFoundError(f"无法读取PDF文件: {str(e)}")
     except Exception as e:
         raise ConversionError(f"PDF转换失败: {str(e)}")
+    finally:
+        if response_file is not None:
+            response_file.close()
+
+class Payload:
+    """响应中一段base64图片数据的位置，需要时才解码"""
+    __slots__ = ('mapping', 'start', 'end')
+
+    def __init__(self, mapping, start, end):
+        self.mapping = mapping
+        self.start = start
+        self.end = end
+
+    def read(self):
+        data = self.mapping[self.start:self.end]
+        if data.startswith(b'data:'):
+            data = data[data.index(b',') + 1:]
+        # JSON中的斜杠可能被转义为 \/
+        return base64.b64decode(data.replace(b'\\/', b'/'))
+
+class TextInResult:
+    """
+    以内存映射方式打开的TextIn响应。
+
+    只有去掉base64字段后的JSON被解析到内存中，图片数据以 Payload 的形式留在映射里，
+    逐张解码，300页的扫描件也不会同时占用整份响应和全部图片的内存。
+    """
+
+    def __init__(self, response_file):
+        # 缓冲区中尚未写入文件的尾部也要映射进来
+        response_file.flush()
+        size = os.fstat(response_file.fileno()).st_size
+        if size == 0:
+            raise ConversionError("接口返回了空响应")
+        self.mapping = mmap.mmap(response_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.payloads = []
+        try:
+            self.data = json.loads(self.strip_payloads(), object_hook=self.resolve_payloads)
+        except Exception:
+            # 响应不完整或不是JSON时，释放映射和临时文件后再抛出
+            self.close()
+            response_file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.mapping.closed:
+            self.mapping.close()
+
+    @property
+    def code(self):
+        return self.data.get("code")
+
+    @property
+    def message(self):
+        return self.data.get("message", "")
+
+    @property
+    def markdown(self):
+        return self.data["result"]["markdown"]
+
+    def strip_payloads(self):
+        """把base64字段替换为占位符，返回其余部分的JSON"""
+        parts = []
+        position = 0
+        for match in PAYLOAD_KEY.finditer(self.mapping):
+            start = match.end()
+            end = self.mapping.find(b'"', start)
+            if end == -1:
+                break
+            parts.append(self.mapping[position:start])
+            parts.append(f"\\u0000payload:{len(self.payloads)}".encode('ascii'))
+            self.payloads.append(Payload(self.mapping, start, end))
+            position = end
+        parts.append(self.mapping[position:])
+        return b''.join(parts)
+
+    def resolve_payloads(self, obj):
+        for key, value in obj.items():
+            if isinstance(value, str) and value.startswith(PAYLOAD_MARKER):
+                obj[key] = self.payloads[int(value[len(PAYLOAD_MARKER):])]
+        return obj
+
+    def iter_images(self):
+        """
+        产出 (引用地址, Payload)。
+
+        同一对象中带有 image_url 时，Markdown中引用该地址的图片直接使用返回的数据而不再下载；
+        否则（如整页图片）使用内部地址，这些图片不被引用，单独保存。
+        """
+        stack = [self.data.get("result", {})]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, list):
+                stack.extend(reversed(obj))
+            elif isinstance(obj, dict):
+                for key, value in obj.items():
+                    if isinstance(value, Payload):
+                        src = obj.get("image_url") or f"textin-payload:{value.start}"
+                        yield src, value
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
 
 class APIError(Exception):
     """API返回错误时抛出的异常"""
@@ -57,11 +234,11 @@ if __name__ == "__main__":
     pdf_file_path = "path/to/your/pdf/file.pdf"
     app_id = "your_app_id"
     secret_code = "your_secret_code"
-    
+
     try:
         markdown_content = pdf_to_markdown(pdf_file_path, app_id, secret_code)
         print("转换成功!")
         print("Markdown内容:")
         print(markdown_content)
     except (APIError, ConnectionError, FileNotFoundError, ConversionError) as e:
-        print(f"转换失败: {str(e)}")
\ No newline at end of file
+        print(f"转换失败: {str(e)}")
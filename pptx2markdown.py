@@ -1,6 +1,21 @@
+import hashlib
 import os
-import subprocess
+import re
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote
+from deadline import get_deadline
+from markdown_sink import Asset, get_asset_dir, get_output_path, write_markdown
+
+CHUNK_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+JPEG_QUALITY = 85
+# 这些格式不缩放、不重新编码（动图会丢帧，矢量图Pillow无法处理），只去重
+KEEP_FORMATS = ('.gif', '.svg', '.wmf', '.emf')
+# pptx2md 输出的图片链接：<img src="路径" ...> 和 ![](路径)，后者在 qmd 格式中带 {width:...}
+HTML_IMAGE = re.compile(r'(<img\b[^>]*?\bsrc\s*=\s*")([^"\n]*)(")', re.IGNORECASE)
+MARKDOWN_IMAGE = re.compile(r'(!\[[^\]\n]*\]\(\s*<?)([^<>\n]*?)(>?\s*\))')
 
 def pptx_to_markdown(input_path, output_dir, **options):
     """
@@ -12,28 +27,206 @@ def pptx_to_markdown(input_path, output_dir, **options):
     :return: 生成的Markdown文件路径
     """
     base_name = os.path.splitext(os.path.basename(input_path))[0]
-    output_file = os.path.join(output_dir, f"{base_name}.md")
-    img_folder = os.path.join(output_dir, f"{base_name}_img")
-    
-    # 构建pptx2md命令
-    cmd = [sys.executable, "-m", "pptx2md", input_path,
-           "--image-dir", img_folder,
-           "-o", output_file]
-    
-    # 添加可选参数
-    cmd.extend(build_optional_args(options))
-    
-    # 执行pptx2md命令
+    output_file = get_output_path(output_dir, base_name)
+    return write_markdown(iter_pptx_markdown(input_path, **options), output_file)
+
+def iter_markdown(input_path, options):
+    """统一转换接口：逐块产出PowerPoint转换后的Markdown和图片"""
+    return iter_pptx_markdown(input_path, **options)
+
+def iter_pptx_markdown(input_path, **options):
+    """
+    在临时目录中运行pptx2md，再逐块产出Markdown文本和图片资源记录。
+
+    图片链接相对于Markdown文件指向 <name>_img 目录，与输出层的资源目录一致。
+    """
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    with tempfile.TemporaryDirectory(prefix='temp_pptx_data') as temp_dir:
+        output_file = get_output_path(temp_dir, base_name)
+        img_folder = get_asset_dir(output_file)
+
+        # 构建pptx2md命令
+        cmd = [sys.executable, "-m", "pptx2md", input_path,
+               "--image-dir", img_folder,
+               "-o", output_file]
+
+        # 添加可选参数
+        cmd.extend(build_optional_args(options))
+
+        # 执行pptx2md命令，取消或超时时终止
+        result = get_deadline(options).run_process(cmd)
+        if result.returncode != 0:
+            raise RuntimeError(f"PPTX转换失败: {result.stderr}")
+
+        # 检查输出文件是否存在
+        if not os.path.exists(output_file):
+            raise FileNotFoundError(f"转换后的文件 {output_file} 不存在")
+
+        if os.path.isdir(img_folder):
+            if options.get('optimize_images', True):
+                renames = optimize_images(img_folder, options.get('image_width'), options.get('image_workers'))
+                if renames:
+                    # 先改写链接，再只删除链接已改写的原图
+                    rewritten_file = os.path.join(temp_dir, 'rewritten.md')
+                    rewritten = set()
+                    with open(output_file, 'r', encoding='utf-8') as f, \
+                            open(rewritten_file, 'w', encoding='utf-8') as out:
+                        for chunk in rewrite_image_links(f, os.path.basename(img_folder), renames, rewritten):
+                            out.write(chunk)
+                    remove_replaced_images(img_folder, renames, rewritten)
+                    output_file = rewritten_file
+            for name in sorted(os.listdir(img_folder)):
+                yield Asset(name, source_path=os.path.join(img_folder, name))
+
+        with open(output_file, 'r', encoding='utf-8') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+def optimize_images(img_folder, max_width=None, max_workers=None):
+    """
+    在线程池中处理pptx2md导出的图片：相同内容只保留一份，
+    宽度超过 max_width 的图片用Pillow缩小并重新编码，文件以内容哈希命名。
+
+    原文件暂不删除，链接改写后由 remove_replaced_images 清理。
+
+    :param img_folder: 图片目录
+    :param max_width: 最大宽度（像素），为空或0时不缩放
+    :param max_workers: 线程数，默认为CPU核数
+    :return: {原文件名: 新文件名}
+    """
+    names = sorted(os.listdir(img_folder))
+    paths = [os.path.join(img_folder, name) for name in names]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        digests = list(executor.map(file_digest, paths))
+        # 同一张图片在多页重复使用时只处理一次
+        unique = {}
+        for path, digest in zip(paths, digests):
+            unique.setdefault(digest, path)
+        processed = dict(zip(unique.values(), executor.map(lambda path: process_image(path, max_width),
+                                                            unique.values())))
+
+    return {name: processed[unique[digest]] for name, digest in zip(names, digests)}
+
+def remove_replaced_images(img_folder, renames, rewritten):
+    """
+    删除链接已改写为新文件名的原图，以及没有被任何链接使用的新文件；
+    链接未能改写（或未被引用）的原图保留，原有链接仍然有效。
+
+    :param renames: optimize_images 返回的 {原文件名: 新文件名}
+    :param rewritten: 链接已改写的原文件名集合
+    """
+    originals = set(renames)
+    used = {renames[name] for name in rewritten}
+    for name in rewritten:
+        if name not in used:
+            os.remove(os.path.join(img_folder, name))
+    for name in set(renames.values()) - used - originals:
+        os.remove(os.path.join(img_folder, name))
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(HASH_CHUNK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+def process_image(path, max_width=None):
+    """
+    缩放并重新编码单张图片，写入同目录下以内容哈希命名的文件。
+
+    无需缩放或Pillow无法处理的图片保持原样，只按内容哈希重命名。
+
+    :return: 新文件名
+    """
+    folder = os.path.dirname(path)
+    extension = os.path.splitext(path)[1].lower()
+    data = None
+    if max_width and extension not in KEEP_FORMATS:
+        data = resize_image(path, max_width)
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    name = hashlib.sha256(data).hexdigest()[:16] + extension
+    target = os.path.join(folder, name)
+    if not os.path.exists(target):
+        with open(target, 'wb') as f:
+            f.write(data)
+    return name
+
+def resize_image(path, max_width):
+    """宽度超过 max_width 时返回按比例缩小后重新编码的数据，否则返回None"""
+    from io import BytesIO
+    from PIL import Image
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"PPTX转换失败: {e.stderr}")
-    
-    # 检查输出文件是否存在
-    if os.path.exists(output_file):
-        return output_file
-    else:
-        raise FileNotFoundError(f"转换后的文件 {output_file} 不存在")
+        with Image.open(path) as image:
+            if image.width <= max_width:
+                return None
+            image_format = image.format
+            height = max(1, round(image.height * max_width / image.width))
+            resized = image.resize((max_width, height), Image.LANCZOS)
+            output = BytesIO()
+            if image_format == 'JPEG':
+                if resized.mode not in ('RGB', 'L', 'CMYK'):
+                    resized = resized.convert('RGB')
+                resized.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            else:
+                resized.save(output, image_format or 'PNG')
+            return output.getvalue()
+    except (OSError, ValueError) as e:
+        print(f"图片处理失败，保留原图: {os.path.basename(path)} ({str(e)})")
+        return None
+
+def rewrite_image_links(f, folder_name, renames, rewritten=None):
+    """
+    逐块读取Markdown，把图片链接 <img src="..."> 和 ![](...) 中 <folder_name>/<原文件名> 改写为新文件名。
+
+    链接目标整体匹配后先做URL解码再查找（pptx2md 对 ![]() 中的路径做了URL编码，
+    文件名可能含空格），改写后的链接保持原来的编码方式。
+
+    :param rewritten: 可选，集合，收集链接已改写的原文件名
+    """
+    def replace(match):
+        prefix, target, suffix = match.groups()
+        new_target = rename_link_target(target, folder_name, renames, rewritten)
+        return match.group(0) if new_target is None else prefix + new_target + suffix
+
+    lines = []
+    size = 0
+    for line in f:
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield replace_image_links(''.join(lines), replace)
+            lines = []
+            size = 0
+    if lines:
+        yield replace_image_links(''.join(lines), replace)
+
+def replace_image_links(text, replace):
+    return MARKDOWN_IMAGE.sub(replace, HTML_IMAGE.sub(replace, text))
+
+def rename_link_target(target, folder_name, renames, rewritten=None):
+    """返回改写后的链接目标，不指向 folder_name 中已改名的图片时返回None"""
+    path = unquote(target)
+    for separator in ('/', '\\'):
+        prefix = folder_name + separator
+        if not path.startswith(prefix):
+            continue
+        original = path[len(prefix):]
+        name = renames.get(original)
+        if name is None:
+            return None
+        if rewritten is not None:
+            rewritten.add(original)
+        new_path = prefix + name
+        return quote(new_path) if path != target else new_path
+    return None
 
 def build_optional_args(options):
     """构建pptx2md的可选参数列表"""
@@ -0,0 +1,199 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from xml.etree import ElementTree
+from markdown_sink import get_temp_path
+
+# 共享字符串表的紧凑存储：全部字符串拼接成一个UTF-8缓冲区，另存一组偏移量。
+# 文件格式：UTF-8数据 + N+1个偏移量(uint64) + 字符串数量N(uint64)，全部小端序。
+# 偏移量和数量放在数据之后，便于边解析边写盘。
+
+COUNT = struct.Struct('<Q')
+OFFSET = struct.Struct('<Q')
+OFFSET_PAIR = struct.Struct('<QQ')
+
+# 字符串数据超过该大小后转存到磁盘并以内存映射方式访问
+DEFAULT_SPILL_THRESHOLD = 64 * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def write_offsets(f, offsets):
+    """以小端序写出偏移量数组"""
+    if sys.byteorder != 'little':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    offsets.tofile(f)
+
+class SharedStringTable:
+    """内存中的共享字符串表，按索引O(1)查找"""
+
+    def __init__(self, buffer=b'', offsets=None):
+        self.buffer = buffer
+        self.offsets = offsets if offsets is not None else array('Q', [0])
+
+    @classmethod
+    def from_strings(cls, strings):
+        builder = SharedStringStoreBuilder(spill_threshold=None)
+        for string in strings:
+            builder.append(string)
+        return builder.finish()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("共享字符串索引超出范围")
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def save(self, path):
+        """写入文件，供其他进程通过 MappedSharedStringTable 只读共享"""
+        temp_path = get_temp_path(path)
+        with open(temp_path, 'wb') as f:
+            f.write(self.buffer)
+            write_offsets(f, self.offsets)
+            f.write(COUNT.pack(len(self)))
+        os.replace(temp_path, path)
+        return path
+
+    def close(self):
+        pass
+
+class MappedSharedStringTable:
+    """
+    以内存映射方式打开共享字符串文件，只读、多进程共享页面，常驻内存由操作系统按需换入换出。
+
+    :param path: SharedStringTable.save 或 SharedStringStoreBuilder 写出的文件
+    :param delete: 关闭时是否删除该文件（用于临时转存文件）
+    """
+
+    def __init__(self, path, delete=False):
+        self.path = path
+        self.delete = delete
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = COUNT.unpack_from(self.mapping, size - COUNT.size)[0]
+        self.offsets_start = size - COUNT.size - (self.count + 1) * OFFSET.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("共享字符串索引超出范围")
+        start, end = OFFSET_PAIR.unpack_from(self.mapping, self.offsets_start + index * OFFSET.size)
+        return self.mapping[start:end].decode('utf-8')
+
+    def close(self):
+        if not self.mapping.closed:
+            self.mapping.close()
+        if self.delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+class SharedStringStoreBuilder:
+    """
+    逐条追加共享字符串。
+
+    数据较少时保存在内存中的拼接缓冲区和偏移量数组里；
+    超过 spill_threshold 字节后把已有内容和后续内容写入磁盘，完成后以内存映射方式打开。
+
+    :param spill_threshold: 转存阈值（字节），为None时始终保存在内存中
+    :param spill_dir: 转存文件所在目录，默认为系统临时目录
+    """
+
+    def __init__(self, spill_threshold=DEFAULT_SPILL_THRESHOLD, spill_dir=None):
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.buffer = bytearray()
+        self.offsets = array('Q', [0])
+        self.position = 0
+        self.count = 0
+        self.data_path = None
+        self.data_file = None
+        self.offsets_file = None
+
+    def append(self, string):
+        encoded = string.encode('utf-8')
+        self.position += len(encoded)
+        self.count += 1
+        if self.data_file is not None:
+            self.data_file.write(encoded)
+            self.offsets_file.write(OFFSET.pack(self.position))
+            return
+        self.buffer += encoded
+        self.offsets.append(self.position)
+        if self.spill_threshold is not None and len(self.buffer) > self.spill_threshold:
+            self.spill()
+
+    def spill(self):
+        """把内存中的内容转存到磁盘，之后的追加直接写文件"""
+        fd, self.data_path = tempfile.mkstemp(prefix='shared_strings', suffix='.bin', dir=self.spill_dir)
+        self.data_file = open(fd, 'wb', buffering=WRITE_BUFFER_SIZE)
+        self.offsets_file = tempfile.TemporaryFile(dir=self.spill_dir, buffering=WRITE_BUFFER_SIZE)
+        self.data_file.write(self.buffer)
+        write_offsets(self.offsets_file, self.offsets)
+        self.buffer = bytearray()
+        self.offsets = array('Q')
+
+    def finish(self):
+        """
+        完成构建。
+
+        :return: SharedStringTable（内存）或 MappedSharedStringTable（磁盘）
+        """
+        if self.data_file is None:
+            return SharedStringTable(bytes(self.buffer), self.offsets)
+        try:
+            self.offsets_file.seek(0)
+            shutil.copyfileobj(self.offsets_file, self.data_file)
+            self.data_file.write(COUNT.pack(self.count))
+        finally:
+            self.offsets_file.close()
+            self.data_file.close()
+        return MappedSharedStringTable(self.data_path, delete=True)
+
+def read_shared_strings_xml(data, spill_threshold=DEFAULT_SPILL_THRESHOLD, spill_dir=None):
+    """
+    流式解析 sharedStrings.xml。
+
+    每个 <si> 对应一条字符串：富文本的多个 <r> 运行会拼接为一条，
+    注音 <rPh> 中的文字被忽略，因此索引与单元格中的 <v> 一一对应。
+
+    :param data: sharedStrings.xml 的二进制文件对象
+    :return: SharedStringTable 或 MappedSharedStringTable
+    """
+    builder = SharedStringStoreBuilder(spill_threshold, spill_dir)
+    root = None
+    try:
+        for event, element in ElementTree.iterparse(data, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+            if not element.tag.endswith('}si') and element.tag != 'si':
+                continue
+            prefix = element.tag[:-2]
+            parts = []
+            for child in element:
+                if child.tag == prefix + 't':
+                    parts.append(child.text or '')
+                elif child.tag == prefix + 'r':
+                    text = child.find(prefix + 't')
+                    if text is not None:
+                        parts.append(text.text or '')
+            builder.append(''.join(parts))
+            # 释放已处理的条目，保持内存占用稳定
+            root.clear()
+    except BaseException:
+        if builder.data_file is not None:
+            builder.finish().close()
+        raise
+    return builder.finish()
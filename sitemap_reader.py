@@ -0,0 +1,237 @@
+import codecs
+import datetime
+import fnmatch
+import re
+import zlib
+from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree
+from deadline import Deadline
+
+# 站点地图批量导入：读取 sitemap.xml（含站点地图索引和 .xml.gz）或每行一个URL的列表文件，
+# 边下载边解析，逐个产出符合路径模式和最后修改日期条件的网页地址，直接交给批量转换的远程通道。
+# 解析时每处理完一个 <url> 就清空已解析的元素，网页地址不汇总成列表，
+# 几十万个地址的站点地图也能在读到第一个地址后立即开始转换，内存占用与地址数量无关。
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# 站点地图索引的最大嵌套层数（协议规定索引不能嵌套，这里稍作放宽）
+MAX_SITEMAP_DEPTH = 3
+GZIP_MAGIC = b'\x1f\x8b'
+LASTMOD = re.compile(r'^\s*(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?')
+
+def parse_lastmod(text):
+    """
+    解析 W3C 日期时间（YYYY、YYYY-MM、YYYY-MM-DD 或带时间的完整格式），只取日期部分。
+
+    :return: datetime.date，无法解析时返回None
+    """
+    match = LASTMOD.match(text or '')
+    if not match:
+        return None
+    year, month, day = match.groups()
+    try:
+        return datetime.date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        return None
+
+class SitemapFilter:
+    """
+    筛选网页地址。
+
+    :param path_pattern: 可选，URL路径的通配符模式，如 /docs/*，多个模式用逗号分隔
+    :param since: 可选，datetime.date，只保留最后修改日期不早于这一天的网页；没有 lastmod 的网页保留
+    """
+
+    def __init__(self, path_pattern=None, since=None):
+        self.patterns = [pattern.strip() for pattern in (path_pattern or '').split(',') if pattern.strip()]
+        self.since = since
+
+    def match_url(self, url):
+        if not self.patterns:
+            return True
+        path = urlparse(url).path or '/'
+        return any(fnmatch.fnmatchcase(path, pattern) for pattern in self.patterns)
+
+    def match_lastmod(self, lastmod):
+        if self.since is None or lastmod is None:
+            return True
+        return lastmod >= self.since
+
+    def match(self, url, lastmod=None):
+        return self.match_lastmod(lastmod) and self.match_url(url)
+
+def is_remote(source):
+    return '://' in source
+
+def iter_source_bytes(source, deadline=None):
+    """
+    按块读取本地文件或下载URL，gzip 压缩的内容（按文件头识别）边读边解压。
+
+    :param deadline: 可选，Deadline；下载超时由剩余时间推算，每读取一块检查一次是否已取消
+    """
+    deadline = deadline or Deadline()
+    decompressor = None
+    first = True
+    for chunk in iter_raw_bytes(source, deadline):
+        if first:
+            first = False
+            if chunk.startswith(GZIP_MAGIC):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        if chunk:
+            yield chunk
+    if decompressor is not None:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+def iter_raw_bytes(source, deadline):
+    if not is_remote(source):
+        with open(source, 'rb') as f:
+            while True:
+                deadline.check()
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    import requests
+    try:
+        response = deadline.call(requests.get, source, stream=True, timeout=deadline.get_timeout())
+        with response:
+            response.raise_for_status()
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                deadline.check()
+                yield chunk
+    except requests.RequestException as e:
+        raise ConnectionError(f"获取站点地图失败: {str(e)}")
+
+def local_name(tag):
+    """去掉命名空间的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+def child_text(element, name):
+    for child in element:
+        if local_name(child.tag) == name:
+            return (child.text or '').strip()
+    return None
+
+class SitemapReader:
+    """
+    流式读取站点地图或URL列表，逐个产出 (URL, 最后修改日期)。
+
+    内容以 "<" 开头时按XML解析：<urlset> 中的每个 <url> 产出一个地址，<sitemapindex> 中的每个
+    <sitemap> 立即递归读取（最后修改日期早于 since 的子站点地图整个跳过）；否则按每行一个URL读取，
+    跳过空行和以 # 开头的注释。同一个子站点地图只读取一次。
+
+    :param url_filter: 可选，SitemapFilter
+    :param deadline: 可选，Deadline，取消或超时时停止读取
+    :param on_error: 可选，读取某个子站点地图失败时以 (地址, 异常) 调用并继续读取其余的；为None时抛出异常
+    """
+
+    def __init__(self, url_filter=None, deadline=None, on_error=None):
+        self.url_filter = url_filter or SitemapFilter()
+        self.deadline = deadline or Deadline()
+        self.on_error = on_error
+        self.visited = set()
+        # 读取过的地址总数（筛选前），用于显示进度
+        self.seen = 0
+
+    def iter_urls(self, source):
+        """产出符合条件的网页地址"""
+        for url, lastmod in self.iter_entries(source):
+            yield url
+
+    def iter_entries(self, source, depth=0):
+        self.visited.add(source)
+        chunks = iter_source_bytes(source, self.deadline)
+        first = b''
+        for chunk in chunks:
+            first = chunk
+            if chunk.strip():
+                break
+        if not first.strip():
+            return
+        rest = prepend(first, chunks)
+        if first.lstrip().startswith((b'<', codecs.BOM_UTF8 + b'<')):
+            yield from self.iter_xml_entries(source, rest, depth)
+        else:
+            yield from self.iter_list_entries(rest)
+
+    def iter_xml_entries(self, source, chunks, depth):
+        parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        root = None
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    continue
+                name = local_name(element.tag)
+                if name == 'url':
+                    loc = child_text(element, 'loc')
+                    root.clear()
+                    if loc:
+                        self.seen += 1
+                        url = urljoin(source, loc) if is_remote(source) else loc
+                        lastmod = parse_lastmod(child_text(element, 'lastmod'))
+                        if self.url_filter.match(url, lastmod):
+                            yield url, lastmod
+                elif name == 'sitemap':
+                    loc = child_text(element, 'loc')
+                    lastmod = parse_lastmod(child_text(element, 'lastmod'))
+                    root.clear()
+                    if loc:
+                        yield from self.iter_child_entries(urljoin(source, loc) if is_remote(source) else loc,
+                                                           lastmod, depth)
+        parser.close()
+
+    def iter_child_entries(self, location, lastmod, depth):
+        """读取站点地图索引中的一个子站点地图"""
+        if location in self.visited or not self.url_filter.match_lastmod(lastmod):
+            return
+        if depth >= MAX_SITEMAP_DEPTH:
+            raise ValueError(f"站点地图索引嵌套超过 {MAX_SITEMAP_DEPTH} 层: {location}")
+        try:
+            yield from self.iter_entries(location, depth + 1)
+        except (ConnectionError, OSError, ElementTree.ParseError, zlib.error) as e:
+            if self.on_error is None:
+                raise
+            self.on_error(location, e)
+
+    def iter_list_entries(self, chunks):
+        decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+        pending = ''
+        for chunk in chunks:
+            pending += decoder.decode(chunk)
+            lines = pending.split('\n')
+            pending = lines.pop()
+            yield from self.filter_lines(lines)
+        pending += decoder.decode(b'', final=True)
+        yield from self.filter_lines([pending])
+
+    def filter_lines(self, lines):
+        for line in lines:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            self.seen += 1
+            if self.url_filter.match_url(url):
+                yield url, None
+
+def prepend(first, chunks):
+    yield first
+    yield from chunks
+
+def iter_sitemap_urls(source, path_pattern=None, since=None, deadline=None, on_error=None):
+    """
+    逐个产出站点地图或URL列表中符合条件的网页地址。
+
+    :param source: 站点地图或URL列表的本地路径或URL，可为 gzip 压缩
+    :param path_pattern: 可选，URL路径的通配符模式，见 SitemapFilter
+    :param since: 可选，datetime.date 或 YYYY-MM-DD 字符串，见 SitemapFilter
+    """
+    if isinstance(since, str):
+        since = parse_lastmod(since)
+    reader = SitemapReader(SitemapFilter(path_pattern, since), deadline, on_error)
+    return reader.iter_urls(source)
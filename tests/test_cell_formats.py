@@ -0,0 +1,124 @@
+import io
+import zipfile
+import pytest
+from cell_formats import BUILTIN_FORMATS, CellFormat, compile_format, format_general, read_cell_styles
+
+def render(code, text, date1904=False):
+    formatter = compile_format(code, date1904)
+    return format_general(text) if formatter is None else formatter(text)
+
+@pytest.mark.parametrize("format_id, text, expected", [
+    (0, '0.15300000000000002', '0.153'),
+    (0, '12345678901234567890', '12345678901234567890'),
+    (1, '2.5', '3'),
+    (2, '1.005', '1.01'),
+    (3, '1234567.5', '1,234,568'),
+    (4, '-1234.567', '-1,234.57'),
+    (5, '-1234', '¥-1,234'),
+    (7, '1234.5', '¥1,234.50'),
+    (9, '0.125', '13%'),
+    (10, '0.12345', '12.35%'),
+    (11, '12345', '1.23E+04'),
+    (12, '1.75', '1 3/4'),
+    (13, '0.3333', '1/3'),
+    (14, '45123', '2023/7/16'),
+    (20, '0.75', '18:00'),
+    (21, '0.5000115741', '12:00:01'),
+    (22, '45123.5', '2023/7/16 12:00'),
+    (31, '45123', '2023年7月16日'),
+    (32, '0.5625', '13时30分'),
+    (35, '0.5625', '下午1时30分00秒'),
+    (46, '1.5', '36:00:00'),
+    (47, '0.00001', '00:00.9'),
+    (49, '123.5', '123.5'),
+])
+def test_builtin_formats(format_id, text, expected):
+    assert render(BUILTIN_FORMATS[format_id], text) == expected
+
+@pytest.mark.parametrize("code, text, expected", [
+    # 四舍五入：0.5 远离零进位
+    ('0', '0.5', '1'),
+    ('0', '2.5', '3'),
+    ('#,##0', '-12.5', '-13'),
+    ('0.0', '0.25', '0.3'),
+    ('0%', '0.125', '13%'),
+    ('0.00', '1.005', '1.01'),
+    ('0.00E+00', '1.125', '1.13E+00'),
+    ('0.00E+00', '9.995', '1.00E+01'),
+    ('0.00', '-0.001', '0.00'),
+    # 占位符
+    ('000', '7', '007'),
+    ('#.##', '3.1', '3.1'),
+    ('0.0#', '2', '2.0'),
+    ('#', '0', ''),
+    # 缩放和百分比
+    ('#,##0,', '12500', '13'),
+    ('0.0,,"M"', '1250000', '1.3M'),
+    ('0.0%', '-0.0125', '-1.3%'),
+    # 分数
+    ('# ?/4', '0.375', '2/4'),
+    ('?/16', '1.75', '28/16'),
+    # 格式段
+    ('0.00;(0.00)', '-2.5', '(2.50)'),
+    ('0;-0;"zero"', '0', 'zero'),
+    ('0;[Red]-0', '-3', '-3'),
+    ('"+"0;"-"0;0', '4', '+4'),
+    # 条件
+    ('[>=100]"big";[<0]"neg";0', '150', 'big'),
+    ('[>=100]"big";[<0]"neg";0', '-5', 'neg'),
+    ('[>=100]"big";[<0]"neg";0', '42', '42'),
+    ('[<1000]0" g";0.00," kg"', '2500', '2.50 kg'),
+    # 文字和文本段
+    ('0.0" kg"', '12.34', '12.3 kg'),
+    ('\\$#,##0', '1234', '$1,234'),
+    ('[$€-407]#,##0.00', '1234.5', '€1,234.50'),
+    ('0;-0;0;"text: "@', '5', '5'),
+    ('@', '5.5', '5.5'),
+    ('General" pcs"', '3', '3 pcs'),
+    ('0', 'abc', 'abc'),
+])
+def test_number_formats(code, text, expected):
+    assert render(code, text) == expected
+
+@pytest.mark.parametrize("code, text, date1904, expected", [
+    ('yyyy-mm-dd', '1', False, '1900-01-01'),
+    ('yyyy-mm-dd', '59', False, '1900-02-28'),
+    ('yyyy-mm-dd', '61', False, '1900-03-01'),
+    ('yyyy-mm-dd', '45123', False, '2023-07-16'),
+    ('yyyy-mm-dd', '0', True, '1904-01-01'),
+    ('yyyy-mm-dd', '43661', True, '2023-07-16'),
+    ('yyyy-mm-dd hh:mm:ss', '45123.999999', False, '2023-07-17 00:00:00'),
+    ('d-mmm-yy', '45123', False, '16-Jul-23'),
+    ('dddd, mmmm d', '45123', False, 'Sunday, July 16'),
+    ('h:mm AM/PM', '0.25', False, '6:00 AM'),
+    ('h:mm AM/PM', '0.75', False, '6:00 PM'),
+    ('[mm]:ss', '0.05', False, '72:00'),
+    ('yyyy-mm-dd', '-1', False, '-1'),
+])
+def test_date_formats(code, text, date1904, expected):
+    assert render(code, text, date1904) == expected
+
+def test_read_cell_styles_maps_style_index_to_format():
+    styles = ('<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+              '<numFmts count="1"><numFmt numFmtId="164" formatCode="0.0%"/></numFmts>'
+              '<cellXfs count="4"><xf numFmtId="0"/><xf numFmtId="14"/><xf numFmtId="164"/><xf numFmtId="3"/></cellXfs>'
+              '</styleSheet>')
+    workbook = ('<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<workbookPr date1904="1"/><sheets/></workbook>')
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('xl/styles.xml', styles)
+        archive.writestr('xl/workbook.xml', workbook)
+    with zipfile.ZipFile(data) as archive:
+        cell_styles = read_cell_styles(archive)
+
+    assert cell_styles.format(None, '0.5') == '0.5'
+    assert cell_styles.format('0', '0.5') == '0.5'
+    assert cell_styles.format('1', '43661') == '2023/7/16'
+    assert cell_styles.format('2', '0.1234') == '12.3%'
+    assert cell_styles.format('3', '1234.5') == '1,235'
+
+def test_date_formats_are_memoised():
+    formatter = CellFormat('yyyy-mm-dd')
+    assert formatter('45123') == formatter('45123') == '2023-07-16'
+    assert formatter.memo == {'45123': '2023-07-16'}
@@ -0,0 +1,27 @@
+import os
+from csv2markdown import csv_to_markdown
+
+def convert(tmp_path, name, content, split_rows=0):
+    input_path = tmp_path / name
+    input_path.write_text(content, encoding='utf-8')
+    return csv_to_markdown(str(input_path), str(tmp_path / "out" / "x.md"), split_rows=split_rows)
+
+def test_tsv_is_split_on_tabs_only(tmp_path):
+    (tmp_path / "out").mkdir()
+    outputs = convert(tmp_path, "x.tsv", "a\tb,c\n1\t2,3\n")
+
+    with open(outputs[0], encoding='utf-8') as f:
+        assert f.read() == "|a|b,c|\n|-|-|\n|1|2,3|\n"
+
+def test_resplitting_removes_stale_parts(tmp_path):
+    (tmp_path / "out").mkdir()
+    rows = "".join(f"{index},{index * 2}\n" for index in range(6))
+    first = convert(tmp_path, "x.csv", "a,b\n" + rows, split_rows=2)
+    assert [os.path.basename(path) for path in first] == ["x.md", "x-part2.md", "x-part3.md"]
+
+    second = convert(tmp_path, "x.tsv", "c\td\n1\t2\n", split_rows=2)
+
+    assert [os.path.basename(path) for path in second] == ["x.md"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["x.md"]
+    with open(second[0], encoding='utf-8') as f:
+        assert f.read() == "|c|d|\n|-|-|\n|1|2|\n"
@@ -0,0 +1,86 @@
+import json
+import os
+import pytest
+from converter import Converter
+from document_ir import iter_raw_markdown
+from document_renderers import get_format_paths, write_documents
+
+# html2text 风格的网页转换结果
+WEB_MARKDOWN = """# Title
+
+Intro with **bold**, _italic_, `code` and a [link](https://example.com/a).
+Second line of the same paragraph.
+
+## Section
+
+  * first item
+    * nested item
+  1. ordered
+
+![chart](images/chart%201.png)
+
+| Name | Value |
+|---|---|
+| a \\| b | 1 |
+
+```python
+print("hi")
+```
+
+* * *
+
+> quoted text
+"""
+
+def write_formats(tmp_path, chunks, formats):
+    nodes = iter_raw_markdown(chunks)
+    paths = write_documents(nodes, get_format_paths(str(tmp_path / "page.md"), formats))
+    outputs = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            outputs[os.path.splitext(path)[1]] = f.read()
+    return outputs
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 4096])
+def test_raw_markdown_is_parsed_into_blocks_for_other_formats(tmp_path, chunk_size):
+    chunks = [WEB_MARKDOWN[index:index + chunk_size] for index in range(0, len(WEB_MARKDOWN), chunk_size)]
+    outputs = write_formats(tmp_path, chunks, ['markdown', 'wiki', 'text', 'json'])
+
+    assert outputs['.md'] == WEB_MARKDOWN
+    wiki = outputs['.wiki']
+    assert wiki.startswith("! Title\n\nIntro with ''bold'', //italic//, `code` and a [[link|https://example.com/a]]. "
+                           "Second line of the same paragraph.\n\n!! Section\n\n* first item\n** nested item\n# ordered\n")
+    assert "[img[chart|images/chart 1.png]]" in wiki
+    assert "|Name|Value|h\n|a &#124; b|1|\n" in wiki
+    assert '```python\nprint("hi")\n```' in wiki
+    assert "\n---\n" in wiki
+    # Wiki 中行首的 # 是有序列表，只能来自有序列表项
+    assert [line for line in wiki.splitlines() if line.startswith('#')] == ["# ordered"]
+
+    text = outputs['.txt']
+    assert "Title\n\nIntro with bold, italic, code and a link." in text
+    assert "**" not in text and "](" not in text and "|" not in text.replace("a | b", "")
+
+    blocks = json.loads(outputs['.json'])['blocks']
+    assert [block['type'] for block in blocks] == ['heading', 'paragraph', 'heading', 'list_item', 'list_item',
+                                                   'list_item', 'image', 'table', 'code', 'section', 'paragraph']
+    assert blocks[6] == {'type': 'image', 'src': 'images/chart 1.png', 'alt': 'chart', 'width': None}
+    assert blocks[7]['rows'] == [['a | b', '1']]
+
+def test_pptx_multi_format_output_uses_wiki_and_text_syntax(tmp_path):
+    pytest.importorskip("pptx2md")
+    from test_pptx2markdown import make_deck
+    deck = str(tmp_path / "deck.pptx")
+    make_deck(deck)
+    options = {'output_formats': ['markdown', 'wiki', 'text'], 'image_width': 800}
+
+    result = Converter(notifier=lambda *message: None).convert_file(deck, str(tmp_path), options)
+
+    assert sorted(os.path.basename(path) for path in result) == ['deck.md', 'deck.txt', 'deck.wiki']
+    with open(tmp_path / "deck.wiki", encoding='utf-8') as f:
+        wiki = f.read()
+    with open(tmp_path / "deck.txt", encoding='utf-8') as f:
+        text = f.read()
+    assert "! Slide" in wiki and "# Slide" not in wiki
+    assert '<img src="deck_img/' in wiki and "![" not in wiki
+    assert "Slide" in text and "#" not in text and "<img" not in text and "](" not in text
@@ -0,0 +1,87 @@
+import re
+import zipfile
+import pytest
+import excel2markdown
+from excel2markdown import SheetSelection, read_excel_rows
+
+def make_workbook(path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    sheet.append(["name", None, "value", None])
+    sheet.append([None, None, None, None])
+    sheet["A3"] = "a"
+    sheet["C3"] = 1
+    sheet["A4"] = "b"
+    sheet["D4"] = ""
+    workbook.save(path)
+
+def rewrite_dimension(path, replacement):
+    """把工作表的 <dimension> 替换为 replacement（空字符串即删除）"""
+    with zipfile.ZipFile(path) as archive:
+        members = {name: archive.read(name) for name in archive.namelist()}
+    sheet = members["xl/worksheets/sheet1.xml"].decode('utf-8')
+    members["xl/worksheets/sheet1.xml"] = re.sub(r'<dimension [^>]*/>', replacement, sheet).encode('utf-8')
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+
+def count_parsed_rows(monkeypatch):
+    parsed = []
+    iter_sheet_rows = excel2markdown.iter_sheet_rows
+
+    def counting(*args):
+        for item in iter_sheet_rows(*args):
+            parsed.append(item[0])
+            yield item
+
+    monkeypatch.setattr(excel2markdown, "iter_sheet_rows", counting)
+    return parsed
+
+def test_rows_are_yielded_while_parsing(tmp_path, monkeypatch):
+    path = str(tmp_path / "t.xlsx")
+    make_workbook(path)
+    parsed = count_parsed_rows(monkeypatch)
+
+    rows = read_excel_rows(path, "Data")
+
+    assert not isinstance(rows, list)
+    assert next(rows) == ["name", "", "value", ""]
+    assert parsed == [1]
+    assert list(rows) == [["", "", "", ""], ["a", "", "1", ""], ["b", "", "", ""]]
+
+@pytest.mark.parametrize("dimension", ["", '<dimension ref="A1"/>'])
+def test_width_is_scanned_without_usable_dimension(tmp_path, dimension):
+    path = str(tmp_path / "t.xlsx")
+    make_workbook(path)
+    rewrite_dimension(path, dimension)
+
+    assert list(read_excel_rows(path, "Data"))[-1] == ["b", "", "", ""]
+
+def test_skip_empty_columns_scans_before_streaming(tmp_path, monkeypatch):
+    path = str(tmp_path / "t.xlsx")
+    make_workbook(path)
+    parsed = count_parsed_rows(monkeypatch)
+    selection = SheetSelection(skip_empty_rows=True, skip_empty_columns=True)
+
+    rows = read_excel_rows(path, "Data", selection)
+
+    assert next(rows) == ["name", "value"]
+    assert list(rows) == [["a", "1"], ["b", ""]]
+    assert parsed == [1, 2, 3, 4] * 2
+
+def test_max_rows_and_column_range(tmp_path):
+    path = str(tmp_path / "t.xlsx")
+    make_workbook(path)
+
+    rows = read_excel_rows(path, "Data", SheetSelection("B:C", skip_empty_rows=True), max_rows=2)
+
+    assert list(rows) == [["", "value"], ["", "1"]]
+
+def test_missing_sheet_fails_before_iteration(tmp_path):
+    path = str(tmp_path / "t.xlsx")
+    make_workbook(path)
+
+    with pytest.raises(ValueError):
+        read_excel_rows(path, "Missing")
@@ -0,0 +1,42 @@
+import html2text
+import pytest
+from html2markdown import iter_html2text_markdown
+
+PAGES = [
+    "<html><head><title>示例</title></head><body><h1>标题</h1><p>第一段文字，" + "很长的句子 " * 40 + "</p>"
+    "<h2>小节</h2><p>Some <b>bold</b> and <i>italic</i> text with a <a href='https://example.com/a'>link</a>.</p>"
+    "<ul><li>item one " + "word " * 30 + "</li><li>item two</li></ul><p>end</p></body></html>",
+    "<body><blockquote><p>" + "quoted text " * 30 + "</p></blockquote><h3>After</h3><p>Tail&nbsp;text</p>"
+    "<pre><code>def f():\n    return 1\n\n\n    pass</code></pre><p>" + "after code " * 20 + "</p></body>",
+    "<body><table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>" + "cell " * 30 + "</td></tr></table>"
+    "<p>x</p><br><br><p>y</p><h4><a href='/h'>Heading in link</a></h4><hr><ol><li>" + "n " * 50 + "</li></ol>"
+    "<p><img src='a.png' alt='pic'> image</p></body>",
+    "<div>" + "".join(f"<h2>Section {i}</h2><p>{'lorem ipsum dolor sit amet ' * (i % 7 + 1)}"
+                      f"<a href='https://example.com/{i}'>link {i}</a></p><p>  </p>" for i in range(60)) + "</div>",
+    "<p>" + "<br>".join("line " * (i % 20) for i in range(80)) + "</p><dl><dt>term</dt><dd>definition</dd></dl>",
+]
+
+def iter_chunks(text, size):
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+@pytest.mark.parametrize("body_width", [0, 40, 78])
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 65536])
+@pytest.mark.parametrize("page", range(len(PAGES)))
+def test_streamed_output_matches_handle(page, chunk_size, body_width):
+    h = html2text.HTML2Text()
+    h.body_width = body_width
+    expected = h.handle(PAGES[page])
+    streamed = "".join(iter_html2text_markdown(iter_chunks(PAGES[page], chunk_size), body_width=body_width))
+    assert streamed == expected
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_streamed_output_matches_handle_with_code_fences_and_unwrapped_links(monkeypatch, chunk_size):
+    monkeypatch.setattr(html2text.config, "WRAP_LINKS", False)
+    monkeypatch.setattr(html2text.config, "BACKQUOTE_CODE_STYLE", True)
+    html = PAGES[1] + PAGES[3] + PAGES[1]
+    h = html2text.HTML2Text()
+    h.body_width = 60
+    expected = h.handle(html)
+    streamed = "".join(iter_html2text_markdown(iter_chunks(html, chunk_size), body_width=60))
+    assert streamed == expected
@@ -0,0 +1,40 @@
+import sys
+import pytest
+import html_scanner
+from html_scanner import create_scanner, get_parser_name
+
+PAGE = '<html><head><title> 标题 </title></head><body><a href="/a">第一</a><p><a href="b.html">二<b>号</b></a></body></html>'
+
+@pytest.fixture(autouse=True)
+def reset_auto_parser(monkeypatch):
+    monkeypatch.setattr(html_scanner, "auto_parser", None)
+
+def test_auto_uses_lxml_when_installed_and_reports_it_once(capsys):
+    pytest.importorskip("lxml.etree")
+
+    assert get_parser_name() == 'lxml'
+    assert get_parser_name('auto') == 'lxml'
+    assert capsys.readouterr().out == "HTML解析器: lxml\n"
+
+def test_auto_falls_back_without_lxml(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "lxml.etree", None)
+
+    assert get_parser_name() == 'html.parser'
+    assert "html.parser" in capsys.readouterr().out
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_scanners_find_links_and_title(parser):
+    if parser == 'lxml':
+        pytest.importorskip("lxml.etree")
+    scanner = create_scanner('utf-8', parser)
+    data = PAGE.encode('utf-8')
+    for start in range(0, len(data), 7):
+        scanner.feed(data[start:start + 7])
+    scanner.close()
+
+    assert scanner.title == "标题"
+    assert scanner.links == [("/a", "第一"), ("b.html", "二号")]
+
+def test_unknown_parser_is_rejected():
+    with pytest.raises(ValueError):
+        get_parser_name('bs4')
@@ -0,0 +1,36 @@
+import os
+import signal
+import pytest
+from job_sandbox import Budget, run_isolated
+
+def make_workbook(path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for index in range(3):
+        sheet = workbook.active if index == 0 else workbook.create_sheet()
+        sheet.title = f"S{index}"
+        sheet.append(["name", "value"])
+        for row in range(20):
+            sheet.append([f"row{row}", row * index])
+    workbook.save(path)
+
+def test_isolated_xlsx_job_converts_sheets_in_parallel(tmp_path):
+    input_path = str(tmp_path / "t.xlsx")
+    make_workbook(input_path)
+    options = {'selected_sheets': ['S0', 'S1', 'S2'], 'has_header': True, 'parallel_sheets': True, 'max_workers': 2,
+               'isolate_jobs': True, 'time_limit': 60}
+
+    result, messages = run_isolated(input_path, str(tmp_path), options, Budget.from_options(options))
+
+    assert messages == []
+    assert sorted(os.path.basename(path) for path in result) == ["t-S0.md", "t-S1.md", "t-S2.md"]
+    with open(tmp_path / "t-S2.md", encoding='utf-8') as f:
+        assert "row19" in f.read()
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGXCPU'), reason="需要 SIGXCPU")
+def test_describe_exit_names_the_limit_that_was_hit():
+    budget = Budget(memory_mb=512, cpu_seconds=10, wall_seconds=30)
+    assert "CPU" in budget.describe_exit(-signal.SIGXCPU, 12)
+    assert "运行时间" in budget.describe_exit(-signal.SIGKILL, 31)
+    message = budget.describe_exit(-signal.SIGKILL, 12)
+    assert "CPU" not in message and "内存" in message
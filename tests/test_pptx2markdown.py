@@ -0,0 +1,59 @@
+import io
+import os
+import re
+from urllib.parse import unquote
+import pytest
+from markdown_sink import Asset
+from pptx2markdown import iter_pptx_markdown, remove_replaced_images, rewrite_image_links
+
+IMAGE_TARGET = re.compile(r'<img src="([^"]+)"|!\[\]\(([^)]+)\)')
+
+def make_deck(path):
+    pptx = pytest.importorskip("pptx")
+    Image = pytest.importorskip("PIL.Image")
+    from pptx.util import Inches
+    presentation = pptx.Presentation()
+    for color, size in (((200, 10, 10), (1600, 900)), ((10, 200, 10), (100, 50)), ((200, 10, 10), (1600, 900))):
+        image = io.BytesIO()
+        Image.new('RGB', size, color).save(image, 'PNG')
+        image.seek(0)
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = "Slide"
+        slide.shapes.add_picture(image, Inches(1), Inches(1))
+    presentation.save(path)
+
+@pytest.mark.parametrize("image_width", [800, 0])
+def test_image_links_point_to_optimized_files_for_deck_name_with_space(tmp_path, image_width):
+    pytest.importorskip("pptx2md")
+    deck = str(tmp_path / "Q3 Report.pptx")
+    make_deck(deck)
+
+    parts = list(iter_pptx_markdown(deck, image_width=image_width))
+    assets = {part.name for part in parts if isinstance(part, Asset)}
+    text = ''.join(part for part in parts if isinstance(part, str))
+    targets = [unquote(html or markdown) for html, markdown in IMAGE_TARGET.findall(text)]
+
+    assert len(targets) == 3
+    assert {target.split('/', 1)[0] for target in targets} == {"Q3 Report_img"}
+    # 重复的图片只保存一份，每个链接都指向实际输出的文件
+    assert {target.split('/', 1)[1] for target in targets} == assets
+    assert len(assets) == 2
+
+def test_unmatched_links_keep_their_original_files(tmp_path):
+    folder = tmp_path / "Q3 Report_img"
+    folder.mkdir()
+    for name in ("Q3 Report_0.png", "Q3 Report_1.png", "a.png", "b.png"):
+        (folder / name).write_bytes(b"")
+    renames = {"Q3 Report_0.png": "a.png", "Q3 Report_1.png": "b.png"}
+    markdown = io.StringIO('![](Q3%20Report_img/Q3%20Report_0.png)\n'
+                           '<img src="Q3 Report_img\\Q3 Report_0.png" />\n'
+                           'Q3 Report_img/Q3 Report_1.png\n')
+    rewritten = set()
+
+    text = ''.join(rewrite_image_links(markdown, "Q3 Report_img", renames, rewritten))
+    remove_replaced_images(str(folder), renames, rewritten)
+
+    assert text == ('![](Q3%20Report_img/a.png)\n'
+                    '<img src="Q3 Report_img\\a.png" />\n'
+                    'Q3 Report_img/Q3 Report_1.png\n')
+    assert sorted(os.listdir(folder)) == ["Q3 Report_1.png", "a.png"]
@@ -1,7 +1,4 @@
 import re
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
 def is_url(text):
     url_pattern = re.compile(
@@ -13,10 +10,6 @@ def is_url(text):
         r'(?:/?|[/?]\S+)$', re.IGNORECASE)
     return url_pattern.match(text) is not None
 
-def get_webpage_title(url):
-    try:
-        response = requests.get(url, timeout=5)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return soup.title.string if soup.title else urlparse(url).netloc
-    except:
-        return urlparse(url).netloc
\ No newline at end of file
+def get_webpage_title(url, parser='auto'):
+    from html_scanner import extract_title
+    return extract_title(url, parser, timeout=5)